@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The application modules are not a package; they import each other by name
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "usr/share/biglinux/biglinux-settings")
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture
+def app_dir(monkeypatch):
+    """Run the test from the application directory, as the application does."""
+    monkeypatch.chdir(APP_DIR)
+    return APP_DIR
@@ -0,0 +1,76 @@
+"""A minimal org.freedesktop.systemd1 service for the tests.
+
+Usage: fake_systemd.py <bus address> <state file> <call log>
+The state file is JSON: {"units": {name: ActiveState},
+"unit_files": {path: UnitFileState}, "malformed": false}. With "malformed",
+the methods reply with an array of strings instead of their real types.
+Every call is appended to the call log as a JSON line."""
+import fnmatch
+import json
+import sys
+
+from gi.repository import Gio, GLib
+
+BUS_NAME = "org.freedesktop.systemd1"
+OBJECT_PATH = "/org/freedesktop/systemd1"
+UNIT_PATH = "/org/freedesktop/systemd1/unit/fake"
+
+INTROSPECTION = """
+<node>
+  <interface name="org.freedesktop.systemd1.Manager">
+    <method name="ListUnitsByNames">
+      <arg type="as" name="names" direction="in"/>
+      <arg type="{units}" name="units" direction="out"/>
+    </method>
+    <method name="ListUnitFilesByPatterns">
+      <arg type="as" name="states" direction="in"/>
+      <arg type="as" name="patterns" direction="in"/>
+      <arg type="{unit_files}" name="unit_files" direction="out"/>
+    </method>
+  </interface>
+</node>
+"""
+
+
+def main():
+    address, state_path, log_path = sys.argv[1:4]
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    malformed = state.get("malformed", False)
+    loop = GLib.MainLoop()
+
+    def on_call(connection, sender, path, interface, method, parameters, invocation):
+        args = parameters.unpack()
+        with open(log_path, "a", encoding="utf-8") as log:
+            log.write(json.dumps([method, args]) + "\n")
+        if malformed:
+            invocation.return_value(GLib.Variant("(as)", (["malformed"],)))
+        elif method == "ListUnitsByNames":
+            units = [
+                (name, "", "loaded", state["units"][name], "running", "", UNIT_PATH, 0, "", "/")
+                for name in args[0] if name in state["units"]
+            ]
+            invocation.return_value(GLib.Variant("(a(ssssssouso))", (units,)))
+        else:
+            unit_files = [
+                (path, file_state) for path, file_state in state["unit_files"].items()
+                if any(fnmatch.fnmatch(path.rsplit("/", 1)[-1], p) for p in args[1])
+            ]
+            invocation.return_value(GLib.Variant("(a(ss))", (unit_files,)))
+
+    connection = Gio.DBusConnection.new_for_address_sync(
+        address,
+        Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+        None,
+        None,
+    )
+    connection.connect("closed", lambda *args: loop.quit())
+    types = {"units": "as", "unit_files": "as"} if malformed else {"units": "a(ssssssouso)", "unit_files": "a(ss)"}
+    node = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION.format(**types))
+    connection.register_object(OBJECT_PATH, node.interfaces[0], on_call, None, None)
+    Gio.bus_own_name_on_connection(connection, BUS_NAME, Gio.BusNameOwnerFlags.NONE, None, None)
+    loop.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from check_providers import ProviderUnavailable
+from docker_state import COMPOSE_CONFIG_FILES_LABEL, COMPOSE_PROJECT_LABEL, DockerState
+
+
+class FakeDaemon:
+    """Unix socket server answering each request with a canned HTTP response."""
+
+    def __init__(self, socket_path, status=200, body=b"[]"):
+        self.status = status
+        self.body = body
+        self.requests = []
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(socket_path)
+        self._server.listen()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn:
+                request = b""
+                while b"\r\n\r\n" not in request:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    request += chunk
+                self.requests.append(request.split(b"\r\n", 1)[0].decode())
+                conn.sendall(
+                    f"HTTP/1.1 {self.status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(self.body)}\r\nConnection: close\r\n\r\n".encode()
+                    + self.body
+                )
+
+    def close(self):
+        self._server.close()
+
+
+def container(project, config_file, state, status=""):
+    return {
+        "Names": [f"/{project}-1"],
+        "State": state,
+        "Status": status,
+        "Labels": {COMPOSE_PROJECT_LABEL: project, COMPOSE_CONFIG_FILES_LABEL: config_file},
+    }
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemons = []
+
+    def start(**kwargs):
+        d = FakeDaemon(str(tmp_path / "docker.sock"), **kwargs)
+        daemons.append(d)
+        return d
+
+    yield start
+    for d in daemons:
+        d.close()
+
+
+def test_one_request_answers_every_project(daemon, tmp_path):
+    body = json.dumps([
+        container("web", "/srv/web/compose.yml", "running", "Up 2 minutes (healthy)"),
+        container("db", "/srv/db/compose.yml", "exited", "Exited (0) 1 hour ago"),
+        {"Names": ["/plain"], "State": "running", "Labels": {}},
+    ]).encode()
+    d = daemon(body=body)
+    state = DockerState(str(tmp_path / "docker.sock"))
+
+    assert state.is_compose_running("/srv/web/compose.yml")
+    assert not state.is_compose_running("/srv/db/compose.yml")
+    assert not state.is_compose_running("/srv/other/compose.yml")
+    assert state.projects()["web"]["containers"] == [{"name": "web-1", "state": "running", "health": "healthy"}]
+    assert set(state.projects()) == {"web", "db"}
+    assert d.requests == ["GET /containers/json?all=1 HTTP/1.1"]
+
+    state.begin_pass()
+    state.projects()
+    assert len(d.requests) == 2
+
+
+def test_missing_daemon_means_nothing_runs(tmp_path):
+    state = DockerState(str(tmp_path / "docker.sock"))
+    assert state.projects() == {}
+    assert not state.is_compose_running("/srv/web/compose.yml")
+
+
+def test_refused_connection_means_nothing_runs(tmp_path):
+    # A socket file left behind by a stopped daemon
+    path = str(tmp_path / "docker.sock")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.close()
+    assert os.path.exists(path)
+    assert DockerState(path).projects() == {}
+
+
+@pytest.mark.parametrize("body", [b"not json", b'{"message": "truncated', b'{"message": "no list"}', b"[1, 2]"])
+def test_malformed_response_is_unavailable(daemon, tmp_path, body):
+    daemon(body=body)
+    with pytest.raises(ProviderUnavailable):
+        DockerState(str(tmp_path / "docker.sock")).projects()
+
+
+def test_error_status_is_unavailable(daemon, tmp_path):
+    daemon(status=500, body=b'{"message": "server error"}')
+    with pytest.raises(ProviderUnavailable, match="500"):
+        DockerState(str(tmp_path / "docker.sock")).projects()
@@ -0,0 +1,95 @@
+import pytest
+
+import grub_config
+from grub_config import GrubConfig, GrubConfigError
+
+DEFAULT_GRUB = """\
+# GRUB boot loader configuration
+GRUB_DEFAULT=saved
+GRUB_TIMEOUT=5
+GRUB_DISTRIBUTOR="BigLinux"
+GRUB_CMDLINE_LINUX_DEFAULT="quiet acpi_osi=\\"Windows 2015\\" splash"
+GRUB_CMDLINE_LINUX=""
+"""
+
+
+def load(tmp_path, text=DEFAULT_GRUB):
+    path = tmp_path / "grub"
+    path.write_text(text)
+    config = GrubConfig(str(path), str(tmp_path / "cmdline"))
+    assert config.load()
+    return config
+
+
+def saved(config):
+    config.save()
+    with open(config.path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_change_timeout(tmp_path):
+    config = load(tmp_path)
+    assert config.set_timeout(1)
+    assert not config.set_timeout(1)
+    assert saved(config) == DEFAULT_GRUB.replace("GRUB_TIMEOUT=5", "GRUB_TIMEOUT=1")
+    assert (tmp_path / "grub.bak").read_text() == DEFAULT_GRUB
+
+
+def test_last_assignment_is_edited(tmp_path):
+    config = load(tmp_path, 'GRUB_TIMEOUT=5\nGRUB_TIMEOUT="10"\n# GRUB_TIMEOUT=3\n')
+    assert config.get("GRUB_TIMEOUT") == "10"
+    config.set_timeout(2)
+    # The quotes of the edited line are kept
+    assert saved(config) == 'GRUB_TIMEOUT=5\nGRUB_TIMEOUT="2"\n# GRUB_TIMEOUT=3\n'
+
+
+def test_single_quotes_are_kept(tmp_path):
+    config = load(tmp_path, "GRUB_CMDLINE_LINUX_DEFAULT='quiet splash'\n")
+    config.add_params("mitigations=off")
+    assert saved(config) == "GRUB_CMDLINE_LINUX_DEFAULT='quiet splash mitigations=off'\n"
+
+
+def test_add_and_remove_one_parameter(tmp_path):
+    config = load(tmp_path)
+    assert config.configured_params() == ["quiet", 'acpi_osi="Windows 2015"', "splash"]
+
+    assert config.add_params("nowatchdog")
+    assert not config.add_params("nowatchdog")
+    assert config.configured_params() == ["quiet", 'acpi_osi="Windows 2015"', "splash", "nowatchdog"]
+    text = saved(config)
+    assert 'GRUB_CMDLINE_LINUX_DEFAULT="quiet acpi_osi=\\"Windows 2015\\" splash nowatchdog"\n' in text
+
+    assert config.remove_params("splash")
+    assert not config.remove_params("splash")
+    assert saved(config) == DEFAULT_GRUB.replace('\\" splash"', '\\" nowatchdog"')
+
+
+def test_quoted_parameter_is_removed_whole(tmp_path):
+    config = load(tmp_path)
+    assert config.remove_params('acpi_osi="Windows 2015"')
+    assert config.configured_params() == ["quiet", "splash"]
+
+
+@pytest.mark.parametrize("line", [
+    'GRUB_CMDLINE_LINUX_DEFAULT="quiet $(cat /etc/kernel-params)"',
+    'GRUB_CMDLINE_LINUX_DEFAULT="$GRUB_CMDLINE_LINUX_DEFAULT quiet"',
+    "GRUB_CMDLINE_LINUX_DEFAULT=$EXTRA",
+    'GRUB_CMDLINE_LINUX_DEFAULT="quiet"" splash"',
+    "GRUB_CMDLINE_LINUX_DEFAULT=`cat /etc/kernel-params`",
+])
+def test_non_plain_values_are_refused(tmp_path, line):
+    config = load(tmp_path, line + "\n")
+    with pytest.raises(GrubConfigError):
+        config.add_params("nowatchdog")
+    with pytest.raises(GrubConfigError):
+        config.remove_params(" ".join(config.configured_params()))
+    assert config.lines == [line]
+
+
+def test_command_line_refuses_without_writing(tmp_path, monkeypatch):
+    path = tmp_path / "grub"
+    path.write_text('GRUB_TIMEOUT=$(echo 5)\n')
+    monkeypatch.setattr(GrubConfig, "regenerate", staticmethod(lambda: pytest.fail("regenerated")))
+    assert grub_config.main(["--file", str(path), "--timeout", "1"]) == 1
+    assert path.read_text() == 'GRUB_TIMEOUT=$(echo 5)\n'
+    assert not (tmp_path / "grub.bak").exists()
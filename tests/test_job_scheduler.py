@@ -0,0 +1,34 @@
+import pytest
+
+from job_scheduler import DOCKER, GRUB, PACMAN, USER, operation_resources, script_resources
+
+
+@pytest.mark.parametrize("script, resources", [
+    # Calls system/fastGrubRun.sh by its installed path
+    ("system/fastGrub.sh", {GRUB}),
+    # Call their Run script through $PWD
+    ("performance/noWatchdog.sh", {GRUB}),
+    ("performance/meltdownMitigations.sh", {GRUB}),
+    # Install the container's package through docker/dockerInstallRun.sh
+    ("docker/adguardInstall.sh", {PACMAN}),
+    ("docker/jellyfinInstall.sh", {PACMAN}),
+    ("docker/dockerEnable.sh", {DOCKER, PACMAN}),
+    ("docker/jellyfinRun.sh", {DOCKER}),
+    # Everything happens in the user's home
+    ("ai/comfyUIInstall.sh", {USER}),
+])
+def test_script_resources(app_dir, script, resources):
+    assert script_resources(script) == resources
+
+
+def test_called_scripts_are_followed_once(tmp_path):
+    a = tmp_path / "a.sh"
+    b = tmp_path / "b.sh"
+    a.write_text('#!/bin/bash\n"${BASH_SOURCE%/*}/b.sh"\n')
+    b.write_text('#!/bin/bash\n"${BASH_SOURCE%/*}/a.sh"\nupdate-grub\n')
+    assert script_resources(str(a)) == {GRUB}
+
+
+def test_operation_resources():
+    assert operation_resources(["install:vim", "grub-add:quiet", "enable:sshd"]) == {PACMAN, GRUB}
+    assert operation_resources(["enable:sshd", "flag-on:/etc/big-preload/enable-x"]) == {USER}
@@ -0,0 +1,137 @@
+import os
+import struct
+
+import pytest
+
+from search_index import SearchIndex
+
+DOMAIN = "biglinux-settings-test"
+
+
+def write_mo(path, messages):
+    """Write a GNU .mo catalog of messages (msgid -> msgstr)."""
+    messages = {"": "Content-Type: text/plain; charset=UTF-8\n", **messages}
+    keys = sorted(messages)
+    ids = [k.encode() for k in keys]
+    strs = [messages[k].encode() for k in keys]
+    start = 7 * 4 + 16 * len(keys)
+    offsets, data = [], b""
+    for s in ids + strs:
+        offsets.append((len(s), start + len(data)))
+        data += s + b"\0"
+    header = struct.pack("Iiiiiii", 0x950412DE, 0, len(keys), 28, 28 + 8 * len(keys), 0, 0)
+    table = b"".join(struct.pack("ii", *o) for o in offsets)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(header + table + data)
+
+
+def add(index, title, script="group/row.sh", subtitle="", keywords=()):
+    return index.add(object(), None, "page", None, title, subtitle, script, "icon", "", keywords)
+
+
+def titles(entries):
+    return [entry.title for entry in entries]
+
+
+def test_exact_before_prefix_before_substring():
+    index = SearchIndex()
+    add(index, "Autodock")
+    add(index, "Docker")
+    add(index, "Dock")
+    add(index, "Clock")
+
+    assert titles(index.search("dock")) == ["Dock", "Docker", "Autodock"]
+
+
+def test_typos_are_tolerated():
+    index = SearchIndex()
+    add(index, "Bluetooth")
+    add(index, "Firewall")
+
+    assert titles(index.search("bluetoth")) == ["Bluetooth"]
+    # Short words are never looked up as typos
+    assert index.search("blx") == []
+
+
+def test_title_ranks_above_subtitle():
+    index = SearchIndex()
+    add(index, "Night light", subtitle="Less blue light, easier on the eyes")
+    add(index, "Blue light filter")
+
+    assert titles(index.search("blue")) == ["Blue light filter", "Night light"]
+
+
+def test_every_word_has_to_match():
+    index = SearchIndex()
+    add(index, "SSH server")
+    add(index, "Samba server")
+
+    assert titles(index.search("server ssh")) == ["SSH server"]
+
+
+def test_accents_and_case_are_ignored():
+    index = SearchIndex()
+    add(index, "Configuração de Energia")
+
+    for query in ("configuracao", "CONFIGURAÇÃO", "Configuracão energia"):
+        assert titles(index.search(query)) == ["Configuração de Energia"]
+
+
+def test_script_name_and_keywords_are_searched():
+    index = SearchIndex()
+    add(index, "Faster boot menu", script="system/fastGrub.sh", keywords=("timeout",))
+
+    assert titles(index.search("grub")) == ["Faster boot menu"]
+    assert titles(index.search("timeout")) == ["Faster boot menu"]
+
+
+def test_rows_are_found_in_english_and_other_languages(tmp_path, monkeypatch):
+    localedir = tmp_path / "locale"
+    write_mo(localedir / "pt_BR/LC_MESSAGES" / f"{DOMAIN}.mo", {"Power saving": "Economia de energia"})
+    write_mo(localedir / "de/LC_MESSAGES" / f"{DOMAIN}.mo", {"Power saving": "Stromsparmodus"})
+    monkeypatch.setenv("LANGUAGE", "pt_BR")
+    index = SearchIndex(DOMAIN, str(localedir))
+    # Rows are added with their labels in the current language
+    add(index, "Economia de energia")
+
+    assert titles(index.search("economia")) == ["Economia de energia"]
+    assert titles(index.search("power saving")) == ["Economia de energia"]
+    # Other languages are only read once asked for
+    assert index.search("stromsparmodus") == []
+    index.load_languages()
+    index.build()
+    assert titles(index.search("stromsparmodus")) == ["Economia de energia"]
+
+
+def test_build_steps_match_a_full_build():
+    entries = [f"Setting {word}" for word in ("alpha", "beta", "gamma", "delta")] * 50
+    stepped, full = SearchIndex(), SearchIndex()
+    for title in entries:
+        add(stepped, title)
+        add(full, title)
+
+    steps = 0
+    while stepped.build_step(seconds=0):
+        steps += 1
+    assert steps > 1
+    assert stepped.ready
+    for query in ("setting", "alp", "gamma setting", "detla"):
+        assert [e.position for e in stepped.search(query)] == [e.position for e in full.search(query)]
+
+
+@pytest.mark.parametrize("query", ["docker container", "grub timeout", "bluetoth", "dokcer", "ssh"])
+def test_narrowed_search_matches_the_full_search(query):
+    """An extended query searched within the previous results finds exactly
+    what searching everything finds, typo lookups included."""
+    index = SearchIndex()
+    for title in ("Docker", "Docker containers", "Container runtime", "Bluetooth", "Blue light",
+                  "GRUB timeout", "Grub theme", "SSH server", "Dock"):
+        add(index, title)
+    previous = None
+    for end in range(1, len(query) + 1):
+        prefix = query[:end]
+        full = index.search(prefix)
+        if previous is not None:
+            assert index.search(prefix, within=previous) == full, prefix
+        previous = full
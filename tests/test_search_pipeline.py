@@ -0,0 +1,104 @@
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import GLib  # noqa: E402
+
+from search_index import SearchIndex  # noqa: E402
+from search_pipeline import SearchPipeline  # noqa: E402
+
+TITLES = (
+    "Docker", "Docker containers", "Container runtime", "Bluetooth", "Blue light",
+    "GRUB timeout", "Grub theme", "SSH server", "Dock",
+)
+
+
+class Recorder:
+    """on_results of a pipeline; also records the within= of every search."""
+
+    def __init__(self, index):
+        self.results = []
+        self.within = []
+        search = index.search
+
+        def recording_search(query, page=None, within=None):
+            self.within.append(within is not None)
+            return search(query, page, within)
+
+        index.search = recording_search
+
+    def __call__(self, query, matches):
+        self.results.append((query, [entry.title for entry in matches]))
+
+
+def make_index():
+    index = SearchIndex()
+    for title in TITLES:
+        index.add(object(), None, "page", None, title, "", "group/row.sh", "icon")
+    return index
+
+
+def run_until(condition, timeout_s=5):
+    context = GLib.MainContext.default()
+    deadline = GLib.get_monotonic_time() + timeout_s * 1_000_000
+    while not condition():
+        assert GLib.get_monotonic_time() < deadline, "timed out"
+        context.iteration(True)
+
+
+def full_search(query):
+    return [entry.title for entry in make_index().search(query)]
+
+
+@pytest.mark.parametrize("query", ["docker cont", "dokcer", "bluetoth", "grub t"])
+def test_typed_queries_find_what_a_full_search_finds(query):
+    index = make_index()
+    recorder = Recorder(index)
+    pipeline = SearchPipeline(index, recorder, delay_ms=0)
+
+    for end in range(1, len(query) + 1):
+        pipeline.submit(query[:end])
+        run_until(lambda: len(recorder.results) == end)
+        assert recorder.results[-1] == (query[:end], full_search(query[:end]))
+    # Every query after the first extended the previous one
+    assert recorder.within[0] is False
+    assert all(recorder.within[1:])
+
+
+def test_changed_index_is_searched_in_full():
+    index = make_index()
+    recorder = Recorder(index)
+    pipeline = SearchPipeline(index, recorder, delay_ms=0)
+    pipeline.submit("dock")
+    run_until(lambda: recorder.results)
+
+    index.add(object(), None, "page", None, "Dockyard", "", "group/row.sh", "icon")
+    pipeline.submit("docky")
+    run_until(lambda: len(recorder.results) == 2)
+    assert recorder.results[-1] == ("docky", ["Dockyard"])
+    assert recorder.within[-1] is False
+
+
+def test_only_the_last_of_quick_keystrokes_is_searched():
+    index = make_index()
+    recorder = Recorder(index)
+    pipeline = SearchPipeline(index, recorder, delay_ms=50)
+    for query in ("b", "bl", "blu"):
+        pipeline.submit(query)
+    run_until(lambda: recorder.results)
+    assert recorder.results == [("blu", full_search("blu"))]
+
+
+def test_query_waiting_for_the_index_is_dropped_by_cancel():
+    index = make_index()
+    recorder = Recorder(index)
+    pipeline = SearchPipeline(index, recorder, delay_ms=0)
+    # A page added its rows right before the search: they are indexed first
+    pipeline.prepare = lambda: index.add(object(), None, "page", None, "Late row", "", "group/row.sh", "icon")
+    index.build_step = lambda seconds=0, step=index.build_step: step(0)
+
+    pipeline.submit("late")
+    run_until(lambda: pipeline._waiting is not None)
+    pipeline.cancel()
+    run_until(lambda: pipeline._build is None)
+    assert recorder.results == []
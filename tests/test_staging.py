@@ -0,0 +1,66 @@
+import os
+import stat
+
+import pytest
+
+pytest.importorskip("gi")
+
+from staging import _run_batch, operations  # noqa: E402
+
+
+def write_command(directory, name, body):
+    path = directory / name
+    path.write_text("#!/bin/bash\n" + body)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+
+@pytest.fixture
+def commands(tmp_path, monkeypatch):
+    """pkexec runs its command as is; systemctl and pacman log their
+    arguments, and systemctl fails for broken.service."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = tmp_path / "log"
+    write_command(bin_dir, "pkexec", 'exec "$@"\n')
+    write_command(bin_dir, "systemctl", f'echo "systemctl $*" >> {log}\n[[ " $* " != *" broken.service "* ]]\n')
+    write_command(bin_dir, "pacman", f'echo "pacman $*" >> {log}\n')
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    return log
+
+
+def test_batch_script_is_executable(app_dir):
+    assert os.access("common/applyBatch.sh", os.X_OK)
+
+
+def test_batch_runs_through_pkexec(app_dir, commands):
+    batch = [
+        *operations(("package", "vim"), True),
+        *operations(("systemd", "enable-now", "disable-now", "sshd.service"), False),
+        *operations(("systemd", "start", "stop", "broken.service"), True),
+        "flag-off:/tmp/not-a-preload-flag",
+    ]
+    lines = []
+    codes, returncode = _run_batch(batch, None, lines.append, in_jobs=True)
+
+    assert returncode == 0
+    assert codes == {
+        "install:vim": 0,
+        "disable-now:sshd.service": 0,
+        "start:broken.service": 1,
+        "flag-off:/tmp/not-a-preload-flag": 1,
+    }
+    # Progress is streamed to the job, services stop before and start after packages
+    assert "#Stopping services..." in lines
+    assert "#Installing packages..." in lines
+    assert commands.read_text().splitlines() == [
+        "systemctl disable --now -- sshd.service",
+        "pacman -Syu --noconfirm -- vim",
+        "systemctl start -- broken.service",
+    ]
+
+
+def test_missing_pkexec_is_reported(app_dir, monkeypatch, tmp_path):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    lines = []
+    assert _run_batch(["install:vim"], None, lines.append) == ({}, 127)
+    assert lines[0].startswith("ERROR: Failed to run common/applyBatch.sh")
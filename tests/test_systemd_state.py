@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("gi")
+if shutil.which("dbus-daemon") is None:
+    pytest.skip("a private bus needs dbus-daemon", allow_module_level=True)
+
+from gi.repository import Gio, GLib  # noqa: E402
+
+from check_providers import ProviderUnavailable  # noqa: E402
+from systemd_state import SYSTEMD_BUS_NAME, SystemdState  # noqa: E402
+
+FAKE_SYSTEMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_systemd.py")
+
+
+def connect(address):
+    return Gio.DBusConnection.new_for_address_sync(
+        address,
+        Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+        None,
+        None,
+    )
+
+
+def has_owner(connection, name):
+    reply = connection.call_sync(
+        "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "NameHasOwner",
+        GLib.Variant("(s)", (name,)), GLib.VariantType.new("(b)"), Gio.DBusCallFlags.NONE, 1000, None,
+    )
+    return reply.unpack()[0]
+
+
+@pytest.fixture
+def bus_address():
+    """Address of a private bus of the test's own."""
+    test_bus = Gio.TestDBus.new(Gio.TestDBusFlags.NONE)
+    test_bus.up()
+    yield test_bus.get_bus_address()
+    test_bus.down()
+
+
+@pytest.fixture
+def bus(bus_address):
+    connection = connect(bus_address)
+    yield connection
+    connection.close_sync(None)
+
+
+@pytest.fixture
+def systemd(bus, bus_address, tmp_path):
+    """systemd(units, unit_files, malformed=False) runs tests/fake_systemd.py
+    on the private bus and returns a function listing the calls it got."""
+    processes = []
+    log = tmp_path / "calls"
+
+    def start(units=None, unit_files=None, malformed=False):
+        state = tmp_path / "state.json"
+        state.write_text(json.dumps({"units": units or {}, "unit_files": unit_files or {}, "malformed": malformed}))
+        processes.append(subprocess.Popen([sys.executable, FAKE_SYSTEMD, bus_address, str(state), str(log)]))
+        deadline = time.monotonic() + 10
+        while not has_owner(bus, SYSTEMD_BUS_NAME):
+            assert processes[-1].poll() is None, "fake systemd exited"
+            assert time.monotonic() < deadline, "fake systemd did not start"
+            time.sleep(0.02)
+        return lambda: [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait()
+
+
+def test_units_of_a_pass_are_fetched_together(bus, systemd):
+    calls = systemd(
+        units={"sshd.service": "active", "cups.socket": "inactive", "bluetooth.service": "active"},
+        unit_files={
+            "/usr/lib/systemd/system/sshd.service": "enabled",
+            "/usr/lib/systemd/system/cups.socket": "disabled",
+            "/usr/lib/systemd/system/bluetooth.service": "enabled",
+        },
+    )
+    state = SystemdState(system_bus=bus)
+    state.begin_pass([("sshd", False), ("cups.socket", False)])
+
+    assert state.get("sshd", "ActiveState") == "active"
+    assert state.get("sshd.service", "UnitFileState") == "enabled"
+    assert state.get("cups.socket", "ActiveState") == "inactive"
+    assert state.get("cups.socket", "UnitFileState") == "disabled"
+    assert calls() == [
+        ["ListUnitsByNames", [["cups.socket", "sshd.service"]]],
+        ["ListUnitFilesByPatterns", [[], ["cups.socket", "sshd.service"]]],
+    ]
+
+    # A unit outside the pass is fetched alone
+    assert state.get("bluetooth", "UnitFileState") == "enabled"
+    assert calls()[2] == ["ListUnitsByNames", [["bluetooth.service"]]]
+
+
+def test_user_units_use_the_user_bus(bus, systemd):
+    systemd(units={"pipewire.service": "active"})
+    state = SystemdState(system_bus=object(), user_bus=bus)
+    state.begin_pass([("pipewire", True)])
+
+    assert state.get("pipewire", "ActiveState", user=True) == "active"
+
+
+def test_missing_unit_is_inactive_and_not_found(bus, systemd):
+    systemd(units={"sshd.service": "active"})
+    state = SystemdState(system_bus=bus)
+    state.begin_pass([("nosuch", False), ("sshd", False)])
+
+    assert state.get("nosuch", "ActiveState") == "inactive"
+    assert state.get("nosuch", "UnitFileState") == "not-found"
+    assert state.get("sshd", "ActiveState") == "active"
+
+
+def test_unreachable_systemd_is_unavailable_until_the_next_pass(bus, systemd):
+    state = SystemdState(system_bus=bus)
+    state.begin_pass([("sshd", False)])
+    with pytest.raises(ProviderUnavailable):
+        state.get("sshd", "ActiveState")
+    # Not asked again in the same pass
+    with pytest.raises(ProviderUnavailable, match="not reachable"):
+        state.get("sshd", "UnitFileState")
+
+    systemd(units={"sshd.service": "active"})
+    state.begin_pass([])
+    assert state.get("sshd", "ActiveState") == "active"
+
+
+def test_malformed_reply_is_unavailable(bus, systemd):
+    calls = systemd(units={"sshd.service": "active"}, malformed=True)
+    state = SystemdState(system_bus=bus)
+    state.begin_pass([("sshd", False)])
+
+    with pytest.raises(ProviderUnavailable, match=r"\(as\)"):
+        state.get("sshd", "ActiveState")
+    assert [call[0] for call in calls()] == ["ListUnitsByNames"]
@@ -4,10 +4,13 @@
 export TEXTDOMAINDIR="/usr/share/locale"
 export TEXTDOMAIN=biglinux-settings
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if pacman -Q chatbox-bin &>/dev/null; then
+  if pkgInstalled chatbox-bin; then
     echo "true"
   else
     echo "false"
@@ -7,6 +7,9 @@ export TEXTDOMAIN=biglinux-settings
 # Assign the received arguments to variables with clear names
 function="$1"
 
+# inJobsPanel, progressPhase, progressPercent
+source "${BASH_SOURCE%/*}/../common/progress.sh"
+
 # Starts Zenity IN THE BACKGROUND, as the user, with the full environment
 if [[ "$function" == "install" ]]; then
   zenityTitle=$"comfyUI Install...."
@@ -20,9 +23,11 @@ fi
 updateTask() {
   if [[ "$function" == "install" ]]; then
     # clone and venv
+    progressPhase $"Downloading comfyUI..."
     git clone https://github.com/Comfy-Org/ComfyUI.git $HOME/ComfyUI
     cd $HOME/ComfyUI
     python -m venv .
+    progressPercent 10
 
     # discover GPU
     vgaList=$(lspci | grep -iE "VGA|3D|Display")
@@ -37,6 +42,7 @@ updateTask() {
     fi
 
     # install GPU depends
+    progressPhase $"Installing PyTorch, this step take a long time..."
     if [ -z "$gpu" ];then
       echo "GPU not found"
       exit 1
@@ -51,7 +57,10 @@ updateTask() {
       bin/pip install torch torchvision torchaudio --extra-index-url https://download.pytorch.org/whl/cu130
     fi
 
+    progressPercent 60
+    progressPhase $"Installing comfyUI..."
     bin/pip install comfy-cli
+    progressPercent 70
     bash -c "yes | bin/comfy install --$gpu --restore"
 
     sleep 1
@@ -67,11 +76,18 @@ updateTask() {
   fi
   return 0
 }
-# updateTask > "$pipePath"
-updateTask | zenity --progress --title="$zenityTitle" --text="$zenityText" --pulsate --auto-close --no-cancel
+# Progress goes to the jobs panel through stdout, or to a zenity dialog
+if inJobsPanel; then
+  progressPhase "$zenityText"
+  # Subshell, like in the pipe below: updateTask may exit or cd
+  (updateTask)
+  exitCode=$?
+else
+  updateTask | zenity --progress --title="$zenityTitle" --text="$zenityText" --pulsate --auto-close --no-cancel
 
-# CAPTURES THE STATUS OF THE FUNCTION (the first command in the pipe)
-exitCode=${PIPESTATUS[0]}
+  # CAPTURES THE STATUS OF THE FUNCTION (the first command in the pipe)
+  exitCode=${PIPESTATUS[0]}
+fi
 
 # Shows the final result to the user, also with the correct theme.
 if [[ "$exitCode" == "0" ]] && [[ "$function" == "install" ]]; then
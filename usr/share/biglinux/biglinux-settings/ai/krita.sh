@@ -4,10 +4,13 @@
 export TEXTDOMAINDIR="/usr/share/locale"
 export TEXTDOMAIN=biglinux-settings
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if [[ -d "$HOME/.local/share/krita/pykrita/ai_diffusion" ]] && pacman -Q krita &>/dev/null; then
+  if [[ -d "$HOME/.local/share/krita/pykrita/ai_diffusion" ]] && pkgInstalled krita; then
     echo "true"
   else
     echo "false"
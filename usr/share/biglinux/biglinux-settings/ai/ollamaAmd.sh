@@ -9,10 +9,13 @@ info() {
   zenity --info --text="$zenityText" --width=300 --height=200
 }
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if pacman -Q ollama-rocm &>/dev/null; then
+  if pkgInstalled ollama-rocm; then
     echo "true"
   else
     echo "false"
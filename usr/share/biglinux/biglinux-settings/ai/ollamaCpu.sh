@@ -9,10 +9,13 @@ info() {
   zenity --info --text="$zenityText" --width=300 --height=200
 }
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if pacman -Q ollama &>/dev/null && ! pacman -Q ollama-vulkan &>/dev/null && ! pacman -Q ollama-rocm &>/dev/null && ! pacman -Q ollama-cuda &>/dev/null ; then
+  if pkgInstalled ollama && ! pkgInstalled ollama-vulkan && ! pkgInstalled ollama-rocm && ! pkgInstalled ollama-cuda ; then
     echo "true"
   else
     echo "false"
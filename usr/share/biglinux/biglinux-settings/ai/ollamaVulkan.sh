@@ -9,10 +9,13 @@ info() {
   zenity --info --text="$zenityText" --width=300 --height=200
 }
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if pacman -Q ollama-vulkan &>/dev/null; then
+  if pkgInstalled ollama-vulkan; then
     echo "true"
   else
     echo "false"
@@ -7,8 +7,18 @@ import locale
 import os
 import subprocess
 import socket
+import time
+import settings_registry
 
+from check_providers import ProviderUnavailable
+from check_providers import evaluate as evaluate_check
+from check_providers import spec_units
+from dependencies import affected_scripts
 from gi.repository import Adw, Gio, Gtk
+from job_scheduler import JobCancelled
+from staging import apply_changes
+from state_cache import MISSING
+from tracing import NO_SPAN, tracer
 from typing import Optional
 
 # Set up gettext for application localization.
@@ -38,6 +48,12 @@ class BaseSettingsPage(Adw.Bin):
         self.sub_switches = {}
         # Mapping from script path to timeout value (seconds). If None, default 90.
         self.switch_timeouts: dict[str, Optional[int]] = {}
+        # Mapping from script path to an in-process check spec (see check_providers)
+        self.switch_checks: dict[str, tuple] = {}
+        # Mapping from script path to a batchable toggle action (see staging)
+        self.switch_actions: dict[str, tuple] = {}
+        # Per widget counter, so late results from an older check are ignored
+        self._check_generations = {}
 
 
 
@@ -91,9 +107,37 @@ class BaseSettingsPage(Adw.Bin):
         # group.set_header_suffix(reload_button)
         return group
 
+    def create_registry_rows(self, page_id):
+        """Builds the groups and rows of a page from the settings registry."""
+        content = self.create_scrolled_content()
+        groups = settings_registry.registry().page_groups(page_id)
+        # Only look up the address if a row shows it
+        local_ip = self.get_local_ip() if any(s.info for g in groups for s in g.settings) else ""
+        for group in groups:
+            group_widget = self.create_group(_(group.title), _(group.description), group.scripts)
+            content.append(group_widget)
+            parents = {}  # script -> switch of the group's main rows
+            for setting in group.settings:
+                args = (group_widget, _(setting.title), setting.subtitle_text(), setting.script, setting.icon)
+                options = dict(
+                    info_text=setting.info_text(local_ip),
+                    timeout=setting.timeout,
+                    check=setting.check,
+                    action=setting.action,
+                    keywords=setting.keywords,
+                )
+                if setting.parent:
+                    self.create_sub_row(*args, parents[setting.parent], **options)
+                else:
+                    parents[setting.script] = self.create_row(*args, **options)
+        return content
+
     # Function to create a switch with a details area and clickable link.
-    def create_row(self, parent_group, title, subtitle_with_markup, script_name, icon_name, info_text: Optional[str] = None, timeout: Optional[int] = None):
-        """Builds a custom row mimicking Adw.ActionRow to allow for a clickable link in the subtitle."""
+    def create_row(self, parent_group, title, subtitle_with_markup, script_name, icon_name, info_text: Optional[str] = None, timeout: Optional[int] = None, check: Optional[tuple] = None, action: Optional[tuple] = None, keywords: tuple = ()):
+        """Builds a custom row mimicking Adw.ActionRow to allow for a clickable link in the subtitle.
+        If a check spec is given (see check_providers), it is used instead of the script's check action.
+        An action (see staging) lets the toggle be applied in a batch with others.
+        Keywords are extra words the row is found by in searches."""
         # Uses Adw.PreferencesRow as a base to get the correct background and border style.
         row = Adw.PreferencesRow()
 
@@ -149,6 +193,11 @@ class BaseSettingsPage(Adw.Bin):
             setattr(switch, "_info_icon", info_icon)
             main_box.append(info_icon)
 
+        # Spinner shown in place of the switch while its state is being checked.
+        spinner = Gtk.Spinner(valign=Gtk.Align.CENTER, visible=False)
+        setattr(switch, "_spinner", spinner)
+        main_box.append(spinner)
+
         main_box.append(switch)
 
         # Associate the script with the switch
@@ -156,12 +205,22 @@ class BaseSettingsPage(Adw.Bin):
         script_path = os.path.join(script_group, f"{script_name}.sh")
         self.switch_scripts[switch] = script_path
         self.switch_timeouts[script_path] = timeout
+        if check is not None:
+            self.switch_checks[script_path] = check
+        if action is not None:
+            self.switch_actions[script_path] = action
+        setattr(switch, "_title", title)
+        self.main_window.state_events.register(script_path, check)
         switch.connect("state-set", self.on_switch_changed)
 
         parent_group.add(row)
+        self.main_window.search_index.add(
+            row, parent_group, self, switch, title, subtitle_with_markup, script_path, icon_name,
+            parent_group.get_title(), keywords,
+        )
         return switch
 
-    def create_sub_row(self, parent_group, title, subtitle_with_markup, script_name, icon_name, parent_switch: Gtk.Switch, info_text: Optional[str] = None, timeout: Optional[int] = None):
+    def create_sub_row(self, parent_group, title, subtitle_with_markup, script_name, icon_name, parent_switch: Gtk.Switch, info_text: Optional[str] = None, timeout: Optional[int] = None, check: Optional[tuple] = None, action: Optional[tuple] = None, keywords: tuple = ()):
         # Cria o row (mesma lógica de create_row, mas sem retorno do switch direto)
         row = Adw.PreferencesRow()
         row._is_sub_row = True
@@ -217,15 +276,29 @@ class BaseSettingsPage(Adw.Bin):
             setattr(switch, "_info_icon", info_icon)
             main_box.append(info_icon)
 
+        spinner = Gtk.Spinner(valign=Gtk.Align.CENTER, visible=False)
+        setattr(switch, "_spinner", spinner)
+        main_box.append(spinner)
+
         main_box.append(switch)
 
         script_group = getattr(parent_group, "script_group", "default")
         script_path = os.path.join(script_group, f"{script_name}.sh")
         self.switch_scripts[switch] = script_path
         self.switch_timeouts[script_path] = timeout
+        if check is not None:
+            self.switch_checks[script_path] = check
+        if action is not None:
+            self.switch_actions[script_path] = action
+        setattr(switch, "_title", title)
+        self.main_window.state_events.register(script_path, check)
         switch.connect("state-set", self.on_switch_changed)
 
         parent_group.add(row)
+        self.main_window.search_index.add(
+            row, parent_group, self, switch, title, subtitle_with_markup, script_path, icon_name,
+            parent_group.get_title(), keywords,
+        )
 
         # It starts hidden
         row.set_visible(False)
@@ -243,19 +316,45 @@ class BaseSettingsPage(Adw.Bin):
             print(_("Script not found: {}").format(script_path))
             return (None, msg)
 
+        # Prefer the declarative check, evaluated without forking bash
+        check = self.switch_checks.get(script_path)
+        if check is not None:
+            try:
+                with tracer.span(script_path, "check", kind=check[0]):
+                    status = evaluate_check(check, self.main_window.check_context)
+            except ProviderUnavailable as e:
+                print(_("Falling back to script {}: {}").format(script_path, e))
+            else:
+                if status is None:
+                    return (None, _("Unavailable: not supported on this system."))
+                return (True, _("Enabled")) if status else (False, _("Disabled"))
+
+        # A script that keeps hanging or failing is answered from its last
+        # good result until its next background retry
+        health = self.main_window.script_health
+        if health.should_skip(script_path):
+            tracer.instant(script_path, "quarantined")
+            last_result = health.last_result(script_path)
+            if last_result is None:
+                return (None, _("Unavailable: script is not responding."))
+            return last_result
+
+        # Let the script use the shared package snapshot instead of pacman -Q
+        env = dict(os.environ, **self.main_window.package_index.env())
+        started = time.monotonic()
         try:
-            result = subprocess.run(
-                [script_path, "check"], capture_output=True, text=True, timeout=10
+            result = self.main_window.script_workers.run(
+                script_path, ["check"], timeout=10, env=env
             )
             if result.returncode == 0:
                 output = result.stdout.strip().lower()
                 if output == "true":
-                    return (True, _("Enabled"))
+                    state = (True, _("Enabled"))
                 elif output == "false":
-                    return (False, _("Disabled"))
+                    state = (False, _("Disabled"))
                 elif output == "true_disabled":
                     # Returns a special string state and an explanatory message.
-                    return (
+                    state = (
                         "true_disabled",
                         _(
                             "Enabled by system configuration (e.g., Real-Time Kernel) and cannot be changed here."
@@ -268,16 +367,31 @@ class BaseSettingsPage(Adw.Bin):
                             script_path, result.stdout.strip()
                         )
                     )
-                    return (None, msg)
+                    state = (None, msg)
+                health.record_success(script_path, time.monotonic() - started, state)
+                return state
             else:
                 msg = _("Unavailable: script returned an error.")
                 print(_("Error checking state: {}").format(result.stderr))
+                health.record_failure(script_path, time.monotonic() - started)
                 return (None, msg)
         except (subprocess.TimeoutExpired, Exception) as e:
             msg = _("Unavailable: failed to run script.")
             print(_("Error running script {}: {}").format(script_path, e))
+            health.record_failure(
+                script_path,
+                time.monotonic() - started,
+                timed_out=isinstance(e, subprocess.TimeoutExpired),
+            )
             return (None, msg)
 
+    def _quarantine_tooltip(self, row, script_path):
+        """Flags a row whose script is quarantined and shown from its last known state."""
+        if self.main_window.script_health.is_quarantined(script_path):
+            row.set_tooltip_text(
+                _("This check is not responding; showing the last known state. It will be retried automatically.")
+            )
+
     def toggle_script_state(self, script_path, new_state, timeout: Optional[int] = None):
         """Executes a script with the 'toggle' argument to change the system state.
         Returns True on success, False on failure."""
@@ -290,10 +404,10 @@ class BaseSettingsPage(Adw.Bin):
 
         try:
             state_str = "true" if new_state else "false"
-            result = subprocess.run(
+            # Runs as a job: progress and output are shown live in the jobs panel
+            result = self.main_window.jobs.run(
+                self.script_title(script_path),
                 [script_path, "toggle", state_str],
-                capture_output=True,
-                text=True,
                 timeout=timeout if timeout is not None else 90,
             )
 
@@ -311,11 +425,8 @@ class BaseSettingsPage(Adw.Bin):
                 )
                 print(f"ERROR: {error_msg}")
 
-                if result.stderr.strip():
-                    print(f"ERROR: Script stderr: {result.stderr.strip()}")
-
                 if result.stdout.strip():
-                    print(f"ERROR: Script stdout: {result.stdout.strip()}")
+                    print(f"ERROR: Script output: {result.stdout.strip()}")
 
                 return False
 
@@ -323,6 +434,9 @@ class BaseSettingsPage(Adw.Bin):
             error_msg = _("Script timeout: {}").format(script_path)
             print(f"ERROR: {error_msg}")
             return False
+        except JobCancelled:
+            print(_("Cancelled: {}").format(script_path))
+            return False
         except Exception as e:
             error_msg = _("Error running script {}: {}").format(script_path, e)
             print(f"ERROR: {error_msg}")
@@ -337,161 +451,302 @@ class BaseSettingsPage(Adw.Bin):
             is_supported = not getattr(row, "_hidden_no_support", False)
             switch._info_icon.set_visible(state and is_supported)
 
-    def sync_all_switches(self):
-        """Synchronizes all UI widgets and disables them if their script is invalid, providing a tooltip with the reason."""
+    def _set_row_busy(self, switch: Gtk.Switch, busy: bool, message: Optional[str] = None) -> None:
+        """Shows a spinner on a row while its state is being checked or changed."""
+        row = switch.get_parent().get_parent()
+        spinner = getattr(switch, "_spinner", None)
+        if spinner:
+            spinner.set_visible(busy)
+            spinner.set_spinning(busy)
+        switch.set_sensitive(not busy)
+        row.set_tooltip_text((message or _("Checking...")) if busy else None)
+
+    def _next_check_generation(self, widget):
+        generation = self._check_generations.get(widget, 0) + 1
+        self._check_generations[widget] = generation
+        return generation
+
+    def sync_all_switches(self, scripts=None):
+        """Synchronizes all UI widgets and disables them if their script is invalid, providing a tooltip with the reason.
+        The checks run in the background; each row is updated as soon as its own result arrives.
+        If scripts is given, only the widgets bound to those scripts are synchronized."""
+        engine = self.main_window.check_engine
+        state_cache = self.main_window.state_cache
+        # Ends when the result of the last check of this pass has been applied
+        span = tracer.begin(
+            f"sync {type(self).__name__}", "sync", scripts=len(scripts) if scripts is not None else "all"
+        )
+        # One package database scan per sync pass, shared by every check
+        self.main_window.package_index.refresh()
+        # One Docker API request answers every container row of this pass
+        self.main_window.docker_state.begin_pass()
+        # Fetch every systemd unit state needed by this pass in one D-Bus round
+        self.main_window.systemd_state.begin_pass(
+            unit
+            for script_path, check in self.switch_checks.items()
+            if scripts is None or script_path in scripts
+            for unit in spec_units(check)
+        )
+
         # Sync all switches
         for switch, script_path in self.switch_scripts.items():
-            row = switch.get_parent().get_parent()
-            status, message = self.check_script_state(script_path)
-
-            switch.handler_block_by_func(self.on_switch_changed)
-
-            if status == "true_disabled":
-                # State: Enabled but cannot be changed - hide it from interface.
-                row.set_visible(False)
-                row._hidden_no_support = True
-                self._toggle_info_icon_visibility(switch, False)
-            elif status is None:
-                # Feature not supported - hide it from interface.
-                row.set_visible(False)
-                row._hidden_no_support = True
-                self._toggle_info_icon_visibility(switch, False)
-            else:
-                row.set_sensitive(True)
-                if not getattr(row, "_is_sub_row", False):
-                    row.set_visible(True)
-                row.set_tooltip_text(None)
-                row._hidden_no_support = False
-                switch.handler_block_by_func(self.on_switch_changed)
-                switch.set_active(status)
-                switch.handler_unblock_by_func(self.on_switch_changed)
-                self._toggle_info_icon_visibility(switch, status)
-
-            switch.handler_unblock_by_func(self.on_switch_changed)
-            print(
-                _("Switch {} synchronized: {}").format(
-                    os.path.basename(script_path), status
-                )
+            if scripts is not None and script_path not in scripts:
+                continue
+            generation = self._next_check_generation(switch)
+            # Paint the last known state right away and revalidate it in the
+            # background; only show the "checking…" placeholder without one.
+            # Rows that already show a state are revalidated silently.
+            if not hasattr(switch, "_applied_status"):
+                cached = state_cache.get(script_path)
+                if cached is MISSING:
+                    self._set_row_busy(switch, True)
+                else:
+                    self._apply_switch_state(
+                        switch, script_path, (cached, None), generation, from_cache=True
+                    )
+            engine.submit(
+                self.check_script_state,
+                (script_path,),
+                span.wrap(
+                    lambda result, s=switch, p=script_path, g=generation: self._apply_switch_state(
+                        s, p, result, g
+                    )
+                ),
+                key=script_path,
             )
 
         # Sync all status indicators
         for indicator, script_path in self.status_indicators.items():
-            row = indicator.get_parent().get_parent()
-            status, message = self.check_script_state(script_path)
-
-            # Always remove all state classes first to ensure a clean slate
-            indicator.remove_css_class("status-on")
-            indicator.remove_css_class("status-off")
-            indicator.remove_css_class("status-unavailable")
-
-            if status is None:
-                # Feature not supported - hide it from interface.
-                row.set_visible(False)
-                row._hidden_no_support = True
-            else:
-                row.set_sensitive(True)
+            if scripts is not None and script_path not in scripts:
+                continue
+            generation = self._next_check_generation(indicator)
+            engine.submit(
+                self.check_script_state,
+                (script_path,),
+                span.wrap(
+                    lambda result, i=indicator, p=script_path, g=generation: self._apply_indicator_state(
+                        i, p, result, g
+                    )
+                ),
+                key=script_path,
+            )
+        span.release()
+
+    def refresh_after_toggle(self, script_path):
+        """Re-checks only the toggled script and the settings that depend on it, on every page."""
+        self.main_window.refresh_scripts(affected_scripts(script_path))
+
+    def _apply_switch_state(self, switch, script_path, result, generation, from_cache=False):
+        """Applies a check result to a switch row. Runs on the GTK main loop."""
+        # Ignore results from a check that was superseded by a newer one
+        if generation != self._check_generations.get(switch):
+            return
+        # A toggle is running on this row; it refreshes the row when it finishes
+        if getattr(switch, "_toggle_running", False):
+            return
+        # Keep showing a staged change until it is applied or discarded
+        if getattr(switch, "_staged", False):
+            return
+        status, message = result
+        row = switch.get_parent().get_parent()
+        self._set_row_busy(switch, False)
+        self._quarantine_tooltip(row, script_path)
+
+        if not from_cache:
+            self.main_window.state_cache.put(script_path, status, self.switch_checks.get(script_path))
+            # Nothing to correct when the check confirms what is already shown
+            if getattr(switch, "_applied_status", MISSING) == status:
+                return
+        switch._applied_status = status
+
+        if status == "true_disabled":
+            # State: Enabled but cannot be changed - hide it from interface.
+            row.set_visible(False)
+            row._hidden_no_support = True
+            self._toggle_info_icon_visibility(switch, False)
+        elif status is None:
+            # Feature not supported - hide it from interface.
+            row.set_visible(False)
+            row._hidden_no_support = True
+            self._toggle_info_icon_visibility(switch, False)
+        else:
+            row.set_sensitive(True)
+            if not getattr(row, "_is_sub_row", False):
                 row.set_visible(True)
-                row.set_tooltip_text(None)
-                row._hidden_no_support = False
-                if status:
-                    indicator.add_css_class("status-on")
-                else:
-                    indicator.add_css_class("status-off")
-            print(
-                _("Indicator {} synchronized: {}").format(
-                    os.path.basename(script_path), status
-                )
+            row._hidden_no_support = False
+            switch.handler_block_by_func(self.on_switch_changed)
+            switch.set_active(status)
+            switch.handler_unblock_by_func(self.on_switch_changed)
+            self._toggle_info_icon_visibility(switch, status)
+
+        print(
+            _("Switch {} synchronized: {}").format(
+                os.path.basename(script_path), status
             )
+        )
+        self._update_sub_switch_visibility()
+
+    def _apply_indicator_state(self, indicator, script_path, result, generation):
+        """Applies a check result to a status indicator. Runs on the GTK main loop."""
+        if generation != self._check_generations.get(indicator):
+            return
+        status, message = result
+        row = indicator.get_parent().get_parent()
+
+        # Always remove all state classes first to ensure a clean slate
+        indicator.remove_css_class("status-on")
+        indicator.remove_css_class("status-off")
+        indicator.remove_css_class("status-unavailable")
+
+        if status is None:
+            # Feature not supported - hide it from interface.
+            row.set_visible(False)
+            row._hidden_no_support = True
+        else:
+            row.set_sensitive(True)
+            row.set_visible(True)
+            row.set_tooltip_text(None)
+            self._quarantine_tooltip(row, script_path)
+            row._hidden_no_support = False
+            if status:
+                indicator.add_css_class("status-on")
+            else:
+                indicator.add_css_class("status-off")
+        print(
+            _("Indicator {} synchronized: {}").format(
+                os.path.basename(script_path), status
+            )
+        )
 
-        # Handle visibility of sub‑switches
+    def _update_sub_switch_visibility(self):
+        """Shows sub-switches only when their parent is active and supported."""
         for parent_switch, child_rows in self.sub_switches.items():
             parent_state = parent_switch.get_active()
             for child_row in child_rows:
                 is_supported = not getattr(child_row, "_hidden_no_support", False)
                 child_row.set_visible(parent_state and is_supported)
 
-    def on_switch_changed(self, switch, state):
-        """Callback executed when a user manually toggles a switch."""
-        script_path = self.switch_scripts.get(switch)
+    def script_title(self, script_path):
+        """Title of the row of a script, used to name its jobs."""
+        for switch, path in self.switch_scripts.items():
+            if path == script_path:
+                return getattr(switch, "_title", os.path.basename(script_path))
+        return os.path.basename(script_path)
+
+    def _run_toggle(self, script_path, state):
+        """Runs the toggle of a script. Called from a background thread."""
         # Use the timeout configured for this script, if any
         timeout = self.switch_timeouts.get(script_path)
+        return self.toggle_script_state(script_path, state, timeout=timeout)
 
-        if script_path:
-            script_name = os.path.basename(script_path)
-            print(_("Changing {} to {}").format(script_name, "on" if state else "off"))
+    def on_switch_changed(self, switch, state):
+        """Callback executed when a user manually toggles a switch.
+        The script runs in the background; the switch keeps its old state,
+        with a spinner, until the script finishes."""
+        script_path = self.switch_scripts.get(switch)
+        if not script_path:
+            return False
+        if getattr(switch, "_toggle_running", False):
+            return True
 
-            # Attempt to change the system state
-            success = self.toggle_script_state(script_path, state, timeout=timeout)
+        # In staging mode the change is only recorded; it is applied with the others
+        staging = self.main_window.staging
+        if staging.enabled:
+            staging.stage(self, switch, script_path, state)
+            return False
 
+        script_name = os.path.basename(script_path)
+        print(_("Changing {} to {}").format(script_name, "on" if state else "off"))
+
+        switch._toggle_running = True
+        switch._toggle_span = tracer.begin(script_path, "toggle", state=state)
+        self._set_row_busy(switch, True, _("Applying..."))
+        action = self.switch_actions.get(script_path)
+        helper = self.main_window.privileged_helper
+        if action is not None and helper.available():
+            # Whitelisted root operation: no pkexec, no new authentication prompt
+            self.main_window.check_engine.submit_toggle(
+                apply_changes,
+                ([(script_path, state, action)], self._run_toggle, helper, self.main_window.jobs),
+                lambda results: self._on_toggle_finished(
+                    switch, script_path, state, isinstance(results, dict) and results.get(script_path, False)
+                ),
+            )
+        else:
+            self.main_window.check_engine.submit_toggle(
+                self._run_toggle,
+                (script_path, state),
+                lambda success: self._on_toggle_finished(switch, script_path, state, success),
+            )
+        # Returning True keeps the switch state unchanged until the script finishes.
+        return True
+
+    def _on_toggle_finished(self, switch, script_path, state, success):
+        """Applies the outcome of a toggle. Runs on the GTK main loop."""
+        script_name = os.path.basename(script_path)
+        switch._toggle_running = False
+        getattr(switch, "_toggle_span", NO_SPAN).end(success=success)
+        switch._toggle_span = NO_SPAN
+        self._set_row_busy(switch, False)
+
+        # Block signal to prevent an infinite loop
+        switch.handler_block_by_func(self.on_switch_changed)
+        if success:
+            switch.set_state(state)
+        else:
             # If the script fails, revert the switch to its previous state
             # to keep the UI consistent with the actual system state.
-            if not success:
-                # Block signal to prevent an infinite loop
-                switch.handler_block_by_func(self.on_switch_changed)
-                switch.set_active(not state)
-                switch.handler_unblock_by_func(self.on_switch_changed)
-
-                print(
-                    _("ERROR: Failed to change {} to {}").format(
-                        script_name, "on" if state else "off"
-                    )
+            switch.set_active(not state)
+            switch.set_state(not state)
+        switch.handler_unblock_by_func(self.on_switch_changed)
+
+        if not success:
+            print(
+                _("ERROR: Failed to change {} to {}").format(
+                    script_name, "on" if state else "off"
                 )
-                self.main_window.show_toast(_("Failed to change setting: {}").format(script_name))
-                return True
-            else:
-                # If this switch is a parent, adjust visibility of its sub‑switches
-                if switch in self.sub_switches:
-                    for child_row in self.sub_switches[switch]:
-                        is_supported = not getattr(child_row, "_hidden_no_support", False)
-                        child_row.set_visible(state and is_supported)
+            )
+            self.main_window.show_toast(_("Failed to change setting: {}").format(script_name))
+            return
+
+        switch._applied_status = state
+        self.main_window.state_cache.put(script_path, state, self.switch_checks.get(script_path))
+        self._toggle_info_icon_visibility(switch, state)
 
-                # Refresh all switches to reflect real state
-                self.sync_all_switches()
+        # If this switch is a parent, adjust visibility of its sub‑switches
+        if switch in self.sub_switches:
+            for child_row in self.sub_switches[switch]:
+                is_supported = not getattr(child_row, "_hidden_no_support", False)
+                child_row.set_visible(state and is_supported)
 
-        return False
+        # Refresh the affected switches to reflect real state
+        self.refresh_after_toggle(script_path)
 
     def filter_rows(self, search_text, hide_group_headers=False):
         """Filter rows based on search text. Returns True if any rows are visible."""
-        if not hasattr(self, "content_box"):
-            return True
+        index = self.main_window.search_index
+        groups = {}
+        for entry in index.page_entries(self):
+            groups.setdefault(entry.group, []).append(entry)
+        matches = set(index.search(search_text, page=self)) if search_text else set()
 
         total_visible = 0
-        for child in self._get_all_children(self.content_box):
-            if isinstance(child, Adw.PreferencesGroup):
-                visible = self._filter_group(child, search_text, hide_group_headers)
-                total_visible += visible
-
-        return total_visible > 0
+        for group, entries in groups.items():
+            total_visible += self._filter_group(group, entries, search_text, matches, hide_group_headers)
+        return total_visible > 0 or not groups
 
     def get_matching_rows(self, search_text):
         """Get list of rows that match search text with their parent groups."""
-        if not hasattr(self, "content_box"):
-            return []
-
-        matching = []
-        for child in self._get_all_children(self.content_box):
-            if isinstance(child, Adw.PreferencesGroup):
-                listbox = self._find_listbox_in_widget(child)
-                if not listbox:
-                    continue
-
-                row = listbox.get_first_child()
-                while row:
-                    if isinstance(row, (Adw.PreferencesRow, Gtk.ListBoxRow)):
-                        # Skip rows hidden due to lack of support
-                        if getattr(row, "_hidden_no_support", False):
-                            row = row.get_next_sibling()
-                            continue
-
-                        text = self._get_row_text(row).lower()
-                        if search_text in text:
-                            matching.append((row, child))
-                    row = row.get_next_sibling()
-
-        return matching
-
-    def _filter_group(self, group, search_text, hide_group_headers=False):
-        """Filter rows within a PreferencesGroup. Returns count of visible rows."""
+        return [
+            (entry.row, entry.group)
+            for entry in self.main_window.search_index.search(search_text, page=self)
+            # Skip rows hidden due to lack of support
+            if not getattr(entry.row, "_hidden_no_support", False)
+        ]
+
+    def _filter_group(self, group, entries, search_text, matches, hide_group_headers=False):
+        """Filter the indexed rows of a PreferencesGroup; matches are the
+        entries found by the search. Returns count of visible rows."""
         visible_count = 0
 
         # Save original description on first call
@@ -511,85 +766,32 @@ class BaseSettingsPage(Adw.Bin):
             if suffix:
                 suffix.set_visible(True)
 
-        # PreferencesGroup uses an internal GtkListBox
-        listbox = self._find_listbox_in_widget(group)
-        if not listbox:
-            return 0
-
-        row = listbox.get_first_child()
-        while row:
-            if isinstance(row, (Adw.PreferencesRow, Gtk.ListBoxRow)):
-                # Skip rows hidden due to lack of support
-                if getattr(row, "_hidden_no_support", False):
-                    row = row.get_next_sibling()
-                    continue
-
-                if not search_text:
-                    if getattr(row, "_is_sub_row", False):
-                        parent_switch = None
-                        # Procura quem é o pai desta row
-                        for p_switch, children in self.sub_switches.items():
-                            if row in children:
-                                parent_switch = p_switch
-                                break
-
-                        if parent_switch:
-                            # Visível apenas se o pai estiver ativo
-                            row.set_visible(parent_switch.get_active())
-                        else:
-                            # Fallback seguro
-                            row.set_visible(False)
-                    else:
-                        # Row normal fica sempre visível sem busca
-                        row.set_visible(True)
-
-                    visible_count += 1
+        parents = {
+            child: parent_switch
+            for parent_switch, children in self.sub_switches.items()
+            for child in children
+        }
+        for entry in entries:
+            row = entry.row
+            # Skip rows hidden due to lack of support
+            if getattr(row, "_hidden_no_support", False):
+                continue
+
+            if not search_text:
+                if getattr(row, "_is_sub_row", False):
+                    parent_switch = parents.get(row)
+                    # Visível apenas se o pai estiver ativo (fallback seguro: oculta)
+                    row.set_visible(parent_switch is not None and parent_switch.get_active())
                 else:
-                    text = self._get_row_text(row).lower()
-                    visible = search_text in text
-                    row.set_visible(visible)
-                    if visible:
-                        visible_count += 1
-            row = row.get_next_sibling()
+                    # Row normal fica sempre visível sem busca
+                    row.set_visible(True)
+                visible_count += 1
+            else:
+                visible = entry in matches
+                row.set_visible(visible)
+                if visible:
+                    visible_count += 1
 
         # Hide group if no visible rows (but always show if no search)
         group.set_visible(visible_count > 0 or not search_text)
         return visible_count
-
-    def _find_listbox_in_widget(self, widget):
-        """Recursively find GtkListBox inside a widget."""
-        if isinstance(widget, Gtk.ListBox):
-            return widget
-        child = widget.get_first_child() if hasattr(widget, "get_first_child") else None
-        while child:
-            result = self._find_listbox_in_widget(child)
-            if result:
-                return result
-            child = child.get_next_sibling()
-        return None
-
-    def _get_row_text(self, row):
-        """Extract searchable text from a row widget."""
-        texts = []
-        self._collect_label_texts(row, texts)
-        return " ".join(texts)
-
-    def _collect_label_texts(self, widget, texts):
-        """Recursively collect text from all labels in a widget."""
-        if isinstance(widget, Gtk.Label):
-            text = widget.get_text() or widget.get_label() or ""
-            if text:
-                texts.append(text)
-        child = widget.get_first_child() if hasattr(widget, "get_first_child") else None
-        while child:
-            self._collect_label_texts(child, texts)
-            child = child.get_next_sibling()
-
-    def _get_all_children(self, widget):
-        """Get all direct children of a widget."""
-        children = []
-        child = widget.get_first_child() if hasattr(widget, "get_first_child") else None
-        while child:
-            children.append(child)
-            child = child.get_next_sibling()
-        return children
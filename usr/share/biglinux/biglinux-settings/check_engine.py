@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from gi.repository import GLib
+
+# Default number of check scripts allowed to run at the same time.
+DEFAULT_CONCURRENCY = min(8, (os.cpu_count() or 2) * 2)
+# Number of toggle threads. Toggles needing the same resource (e.g. pacman)
+# wait for each other in the job scheduler, so queued ones hold a thread.
+TOGGLE_CONCURRENCY = 8
+
+
+class CheckEngine:
+    """Runs state checks on a bounded worker pool, off the GTK main thread.
+
+    Results are delivered back on the main loop, one by one, as soon as each
+    check finishes, so pages can update their rows progressively."""
+
+    def __init__(self, max_workers: int = DEFAULT_CONCURRENCY):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="check"
+        )
+        # Toggles get their own pool so long installs never delay the checks
+        self._toggle_executor = ThreadPoolExecutor(
+            max_workers=TOGGLE_CONCURRENCY, thread_name_prefix="toggle"
+        )
+        # Per-pass memoization: key -> future. Only used on the main loop.
+        self._memo = {}
+
+    def begin_pass(self):
+        """Start a new sync pass, at the start of each window-level sync:
+        every check runs again."""
+        self._memo.clear()
+
+    def submit(self, func, args, callback, key=None):
+        """Runs func(*args) on the worker pool and calls callback(result)
+        on the GTK main loop when it finishes.
+        Calls with the same key share one run per sync pass, across all pages."""
+        if key is None:
+            return self._submit(self._executor, func, args, callback, None)
+
+        future = self._memo.get(key)
+        if future is not None:
+            future.add_done_callback(self._done_callback(callback, None))
+            return future
+        future = self._submit(self._executor, func, args, callback, None)
+        self._memo[key] = future
+        return future
+
+    def submit_toggle(self, func, args, callback):
+        """Like submit(), for toggle scripts. A failed call is reported as False."""
+        return self._submit(self._toggle_executor, func, args, callback, False)
+
+    def _submit(self, executor, func, args, callback, error_result):
+        future = executor.submit(func, *args)
+        future.add_done_callback(self._done_callback(callback, error_result))
+        return future
+
+    def _done_callback(self, callback, error_result):
+        def on_done(future):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error in background task: {e}")
+                if error_result is None:
+                    return
+                result = error_result
+            GLib.idle_add(self._deliver, callback, result)
+
+        return on_done
+
+    @staticmethod
+    def _deliver(callback, result):
+        callback(result)
+        return GLib.SOURCE_REMOVE
+
+    def shutdown(self):
+        """Stops accepting new checks and drops the ones still queued.
+        Toggles already started are left to finish."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._toggle_executor.shutdown(wait=False)
@@ -0,0 +1,151 @@
+import os
+import subprocess
+
+from grub_config import GRUB_DEFAULT_FILE
+from package_index import PACMAN_LOCAL_DB
+
+# Declarative checks evaluated in-process, without forking bash.
+#
+# A check spec is a tuple whose first item is the predicate name:
+#   ("file", path)                    path exists
+#   ("dir", path)                     path is a directory
+#   ("grep", path, text)              file contains text (False if missing)
+#   ("key_value", path, key, value)   like: grep KEY= file | cut -d= -f2 == value
+#   ("package", name)                 package is installed
+#   ("unit_active", unit[, "user"])   systemd unit is active
+#   ("unit_enabled", unit[, "user"])  systemd unit file state is "enabled"
+#   ("compose_running", compose_file) a container of that compose project is running
+#   ("kernel_param", parameter)       parameter is both in /proc/cmdline and in the
+#                                     command line configured in /etc/default/grub
+#   ("all", spec, ...) / ("any", spec, ...) / ("not", spec)
+#   ("requires", condition, spec)     unavailable (None) unless condition holds
+# Paths may start with "~". Anything not expressible stays in the script's
+# "check" action, which is also used whenever a provider cannot answer.
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a check cannot be answered in-process; the script is used instead."""
+
+
+class CheckContext:
+    """State sources shared by the in-process checks of a window."""
+
+    def __init__(self, package_index, systemd_state=None, docker_state=None, grub_config=None):
+        self.package_index = package_index
+        self.systemd_state = systemd_state
+        self.docker_state = docker_state
+        self.grub_config = grub_config
+
+    def kernel_param(self, param):
+        """(running, configured) state of a kernel parameter."""
+        if self.grub_config is None:
+            raise ProviderUnavailable("no GRUB config provider")
+        return self.grub_config.param_state(param)
+
+    def is_compose_running(self, compose_file):
+        if self.docker_state is None:
+            raise ProviderUnavailable("no Docker state provider")
+        return self.docker_state.is_compose_running(compose_file)
+
+    def is_installed(self, name):
+        installed = self.package_index.is_installed(name)
+        if installed is None:
+            raise ProviderUnavailable("package index not available")
+        return installed
+
+    def unit_state(self, unit, prop, user=False):
+        """Return "ActiveState" or "UnitFileState" of a systemd unit."""
+        if self.systemd_state is not None:
+            try:
+                return self.systemd_state.get(unit, prop, user)
+            except ProviderUnavailable as e:
+                print(f"systemd D-Bus query failed, using systemctl: {e}")
+        command = "is-active" if prop == "ActiveState" else "is-enabled"
+        args = ["systemctl"]
+        if user:
+            args.append("--user")
+        try:
+            result = subprocess.run(
+                args + [command, unit], capture_output=True, text=True, timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise ProviderUnavailable(str(e))
+        return result.stdout.strip()
+
+
+def _read_file(path):
+    try:
+        with open(os.path.expanduser(path), encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _key_value(path, key, expected):
+    content = _read_file(path)
+    if content is None:
+        return False
+    pattern = f"{key}="
+    values = [line.split("=")[1] for line in content.splitlines() if pattern in line]
+    return "\n".join(values) == expected
+
+
+def spec_units(spec):
+    """Yield the (unit, user) pairs a check spec needs."""
+    op, args = spec[0], spec[1:]
+    if op in ("unit_active", "unit_enabled"):
+        yield args[0], len(args) > 1 and args[1] == "user"
+    elif op in ("all", "any", "not", "requires"):
+        for sub in args:
+            yield from spec_units(sub)
+
+
+def spec_paths(spec):
+    """Yield the files a check spec reads. States that only change at
+    runtime (units, containers, the running kernel) have none."""
+    op, args = spec[0], spec[1:]
+    if op in ("file", "dir", "grep", "key_value", "compose_running"):
+        yield os.path.expanduser(args[0])
+    elif op == "package":
+        yield PACMAN_LOCAL_DB
+    elif op == "kernel_param":
+        yield GRUB_DEFAULT_FILE
+    elif op in ("all", "any", "not", "requires"):
+        for sub in args:
+            yield from spec_paths(sub)
+
+
+def evaluate(spec, context):
+    """Evaluate a check spec. Returns True, False or None (unavailable)."""
+    op, args = spec[0], spec[1:]
+    if op == "file":
+        return os.path.exists(os.path.expanduser(args[0]))
+    if op == "dir":
+        return os.path.isdir(os.path.expanduser(args[0]))
+    if op == "grep":
+        content = _read_file(args[0])
+        return content is not None and args[1] in content
+    if op == "key_value":
+        return _key_value(*args)
+    if op == "package":
+        return context.is_installed(args[0])
+    if op in ("unit_active", "unit_enabled"):
+        user = len(args) > 1 and args[1] == "user"
+        if op == "unit_active":
+            return context.unit_state(args[0], "ActiveState", user) == "active"
+        return context.unit_state(args[0], "UnitFileState", user) == "enabled"
+    if op == "compose_running":
+        return context.is_compose_running(args[0])
+    if op == "kernel_param":
+        return all(context.kernel_param(args[0]))
+    if op == "all":
+        return all(evaluate(sub, context) for sub in args)
+    if op == "any":
+        return any(evaluate(sub, context) for sub in args)
+    if op == "not":
+        return not evaluate(args[0], context)
+    if op == "requires":
+        if not evaluate(args[0], context):
+            return None
+        return evaluate(args[1], context)
+    raise ValueError(f"Unknown check: {op}")
@@ -0,0 +1,173 @@
+#!/bin/bash
+
+#Translation
+export TEXTDOMAINDIR="/usr/share/locale"
+export TEXTDOMAIN=biglinux-settings
+
+# Applies a batch of staged changes under a single elevation (see staging.py).
+# Usage: applyBatch.sh <user> <display> <xauthority> <dbus address> <lang> <language> <jobs> <operation>...
+# <jobs> is BIGLINUX_SETTINGS_JOBS of the caller (pkexec drops the environment).
+# Operations:
+#   install:<package>  remove:<package>
+#   grub-timeout:<seconds>  grub-add:<parameters>  grub-remove:<parameters>
+#   enable:<unit>  disable:<unit>  enable-now:<unit>  disable-now:<unit>  start:<unit>  stop:<unit>
+#   flag-on:<file>  flag-off:<file>    only the /etc/big-preload/enable-* flags of settings.json
+# All package changes share one pacman run per direction, all GRUB edits one
+# regeneration. For every operation a line "result <operation> <exit code>"
+# is written to stdout.
+
+# Assign the received arguments to variables with clear names
+originalUser="$1"
+userDisplay="$2"
+userXauthority="$3"
+userDbusAddress="$4"
+userLang="$5"
+userLanguage="$6"
+export BIGLINUX_SETTINGS_JOBS="$7"
+shift 7
+
+# inJobsPanel, progressPhase
+source "${BASH_SOURCE%/*}/progress.sh"
+
+# Helper function to run a command as the original user
+runAsUser() {
+  # Single quotes around variables are a good security practice
+  su "$originalUser" -c "export DISPLAY='$userDisplay'; export XAUTHORITY='$userXauthority'; export DBUS_SESSION_BUS_ADDRESS='$userDbusAddress'; export LANG='$userLang'; export LC_ALL='$userLang'; export LANGUAGE='$userLanguage'; $1"
+}
+
+installPackages=()
+removePackages=()
+grubOperations=()
+flagOperations=()
+stopOperations=()
+startOperations=()
+for operation in "$@"; do
+  kind="${operation%%:*}"
+  case "$kind" in
+    install) installPackages+=("${operation#*:}") ;;
+    remove) removePackages+=("${operation#*:}") ;;
+    grub-timeout|grub-add|grub-remove) grubOperations+=("$operation") ;;
+    flag-on|flag-off) flagOperations+=("$operation") ;;
+    disable|disable-now|stop) stopOperations+=("$operation") ;;
+    enable|enable-now|start) startOperations+=("$operation") ;;
+  esac
+done
+
+# Results go to the caller; the progress dialog reads everything else
+exec 4>&1
+report() {
+  local code="$1"
+  shift
+  for operation in "$@"; do
+    echo "result $operation $code" >&4
+  done
+}
+
+# Runs systemctl once per kind of operation, e.g. "systemctl enable a b"
+systemdTask() {
+  local kind units operation
+  for kind in disable disable-now stop enable enable-now start; do
+    units=()
+    for operation in "$@"; do
+      [[ "${operation%%:*}" == "$kind" ]] && units+=("${operation#*:}")
+    done
+    (( ${#units[@]} )) || continue
+    case "$kind" in
+      enable-now) systemctl enable --now -- "${units[@]}" ;;
+      disable-now) systemctl disable --now -- "${units[@]}" ;;
+      *) systemctl "$kind" -- "${units[@]}" ;;
+    esac
+    report $? "${units[@]/#/$kind:}"
+  done
+}
+
+grubTask() {
+  local operation grubArgs=()
+  for operation in "$@"; do
+    case "${operation%%:*}" in
+      grub-timeout) grubArgs+=(--timeout "${operation#*:}") ;;
+      grub-add) grubArgs+=(--add "${operation#*:}") ;;
+      grub-remove) grubArgs+=(--remove "${operation#*:}") ;;
+    esac
+  done
+  # One edit of /etc/default/grub and one regeneration for every GRUB change of the batch
+  python3 "${BASH_SOURCE%/*}/../grub_config.py" "${grubArgs[@]}"
+  report $? "$@"
+}
+
+# validFlag <path>
+# Returns 0 for a preload flag declared in settings.json that is not, and
+# is not inside, a symlink. The batch runs as root: any other path is refused.
+validFlag() {
+  local path="$1"
+  [[ "$path" =~ ^/etc/big-preload/enable-[A-Za-z0-9_-]+$ ]] || return 1
+  [[ "$path" != *..* ]] || return 1
+  [[ ! -L "$path" && ! -L "${path%/*}" ]] || return 1
+  grep -qF "\"$path\"" "${BASH_SOURCE%/*}/../settings.json"
+}
+
+flagTask() {
+  local operation path
+  for operation in "$@"; do
+    path="${operation#*:}"
+    if ! validFlag "$path"; then
+      echo $"Refusing to change $path: not a declared preload flag"
+      report 1 "$operation"
+      continue
+    fi
+    if [[ "${operation%%:*}" == "flag-on" ]]; then
+      mkdir -p -- "${path%/*}" && touch -- "$path"
+    else
+      rm -f -- "$path"
+    fi
+    report $? "$operation"
+  done
+}
+
+# Progress goes to the jobs panel through stdout, or to a zenity dialog
+# started IN THE BACKGROUND, as the user, reading from a named pipe (FIFO)
+zenityTitle=$"Applying changes"
+zenityText=$"Applying changes, please wait..."
+if inJobsPanel; then
+  pipePath="/dev/stdout"
+  progressPhase "$zenityText"
+else
+  pipePath="/tmp/apply_batch_pipe_$$"
+  mkfifo "$pipePath"
+  runAsUser "zenity --progress --title=\"$zenityTitle\" --text=\"$zenityText\" --pulsate --auto-close --no-cancel < '$pipePath'" &
+fi
+
+# Executes the root tasks: services are stopped before their packages are
+# removed and started after their packages are installed.
+applyTask() {
+  if (( ${#stopOperations[@]} )); then
+    progressPhase $"Stopping services..."
+    systemdTask "${stopOperations[@]}"
+  fi
+  if (( ${#removePackages[@]} )); then
+    progressPhase $"Removing packages..."
+    pacman -Rcs --noconfirm -- "${removePackages[@]}"
+    report $? "${removePackages[@]/#/remove:}"
+  fi
+  if (( ${#installPackages[@]} )); then
+    progressPhase $"Installing packages..."
+    pacman -Syu --noconfirm -- "${installPackages[@]}"
+    report $? "${installPackages[@]/#/install:}"
+  fi
+  (( ${#flagOperations[@]} )) && flagTask "${flagOperations[@]}"
+  if (( ${#grubOperations[@]} )); then
+    progressPhase $"Updating GRUB..."
+    grubTask "${grubOperations[@]}"
+  fi
+  if (( ${#startOperations[@]} )); then
+    progressPhase $"Starting services..."
+    systemdTask "${startOperations[@]}"
+  fi
+  return 0
+}
+applyTask > "$pipePath" 2>&1
+
+# Cleans up the pipe
+inJobsPanel || rm "$pipePath"
+
+exit 0
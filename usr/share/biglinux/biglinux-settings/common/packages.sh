@@ -0,0 +1,13 @@
+#!/bin/bash
+
+# pkgInstalled <package>
+# Returns 0 if the package is installed.
+# biglinux-settings exports BIGLINUX_SETTINGS_PACKAGES, a snapshot with one
+# installed package name per line, so checks don't need to run pacman.
+pkgInstalled() {
+  if [[ -r "$BIGLINUX_SETTINGS_PACKAGES" ]]; then
+    grep -qxF -- "$1" "$BIGLINUX_SETTINGS_PACKAGES"
+  else
+    pacman -Q "$1" &>/dev/null
+  fi
+}
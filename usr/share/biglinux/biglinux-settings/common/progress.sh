@@ -0,0 +1,23 @@
+#!/bin/bash
+
+# Progress reporting for long running scripts.
+# biglinux-settings runs toggles as jobs and exports BIGLINUX_SETTINGS_JOBS=1:
+# their output is shown live in the window, so progress is written to stdout
+# with the zenity --progress protocol ("42" is the percentage done, "#text"
+# the current phase) instead of opening a zenity dialog.
+
+# inJobsPanel
+# Returns 0 if the script was started by biglinux-settings.
+inJobsPanel() {
+  [[ -n "$BIGLINUX_SETTINGS_JOBS" ]]
+}
+
+# progressPhase <text>
+progressPhase() {
+  echo "#$1"
+}
+
+# progressPercent <0-100>
+progressPercent() {
+  echo "$1"
+}
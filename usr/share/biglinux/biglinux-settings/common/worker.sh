@@ -0,0 +1,39 @@
+#!/bin/bash
+
+# Long-lived worker used by biglinux-settings (see script_workers.py).
+# Scripts are sourced in a forked subshell, so bash, the translation
+# environment and the common helpers are loaded once per worker instead of
+# once per script run.
+#
+# Usage: worker.sh <file for the scripts' stderr>
+# Request, one line on stdin, each field followed by \037 (so empty
+# arguments are kept):
+#   <id> <script> <args...>
+# Reply on stdout:
+#   the script's stdout (without trailing newlines),
+#   its stderr lines prefixed with \037,
+#   then \036<id> <exit status>
+
+#Translation
+export TEXTDOMAINDIR="/usr/share/locale"
+export TEXTDOMAIN=biglinux-settings
+
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/packages.sh"
+
+errFile=$1
+
+while IFS=$'\037' read -r -a request; do
+  id=${request[0]}
+  script=${request[1]}
+  output=$(
+    set -- "${request[@]:2}"
+    source "$script" </dev/null 2>"$errFile"
+  )
+  status=$?
+  [[ -n "$output" ]] && printf '%s\n' "$output"
+  while IFS= read -r line; do
+    printf '\037%s\n' "$line"
+  done <"$errFile"
+  printf '\036%s %d\n' "$id" "$status"
+done
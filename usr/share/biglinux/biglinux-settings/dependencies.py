@@ -0,0 +1,64 @@
+import os
+
+# Dependency graph between settings.
+# After a toggle only the toggled script and the scripts whose state may have
+# changed because of it need to be checked again. Script paths are relative to
+# the application directory, as used by the pages (e.g. "ai/ollamaCpu.sh").
+
+# Scripts that exclude each other: turning one on changes the others.
+EXCLUSIVE_GROUPS = [
+    [
+        "ai/ollamaCpu.sh",
+        "ai/ollamaVulkan.sh",
+        "ai/ollamaNvidia.sh",
+        "ai/ollamaAmd.sh",
+    ],
+]
+
+# Different scripts that check and change the same thing.
+SHARED_STATE_GROUPS = [
+    ["ai/openNotebookInstall.sh", "docker/openNotebookInstall.sh"],
+]
+
+# script -> scripts whose state it depends on
+DEPENDS_ON = {
+    "ai/ollamaShare.sh": EXCLUSIVE_GROUPS[0],
+    "ai/comfyUIRun.sh": ["ai/comfyUI.sh"],
+    "system/sshEnable.sh": ["system/sshStart.sh"],
+    "docker/adguardRun.sh": ["docker/dockerEnable.sh"],
+    "docker/jellyfinRun.sh": ["docker/dockerEnable.sh"],
+    "docker/lampRun.sh": ["docker/dockerEnable.sh"],
+    "docker/nextcloud-plusRun.sh": ["docker/dockerEnable.sh"],
+    "docker/openNotebookRun.sh": ["docker/dockerEnable.sh"],
+    "docker/portainer-clientRun.sh": ["docker/dockerEnable.sh"],
+    "docker/swsRun.sh": ["docker/dockerEnable.sh"],
+    "docker/v2rayaRun.sh": ["docker/dockerEnable.sh"],
+}
+
+
+def _direct_dependents(script_path):
+    dependents = set()
+    for group in EXCLUSIVE_GROUPS + SHARED_STATE_GROUPS:
+        if script_path in group:
+            dependents.update(group)
+    for dependent, requirements in DEPENDS_ON.items():
+        if script_path in requirements:
+            dependents.add(dependent)
+    # By convention "<name>Run.sh" depends on "<name>Install.sh"
+    base, ext = os.path.splitext(script_path)
+    if base.endswith("Install"):
+        dependents.add(base[: -len("Install")] + "Run" + ext)
+    dependents.discard(script_path)
+    return dependents
+
+
+def affected_scripts(script_path):
+    """Return the toggled script plus every script that (transitively) depends on it."""
+    affected = {script_path}
+    pending = [script_path]
+    while pending:
+        for dependent in _direct_dependents(pending.pop()):
+            if dependent not in affected:
+                affected.add(dependent)
+                pending.append(dependent)
+    return affected
@@ -1,9 +1,12 @@
 #!/bin/bash
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if [[ "$(LANG=C jamesdsp --get master_enable)" == "true" ]] && pacman -Q jamesdsp &>/dev/null; then
+  if [[ "$(LANG=C jamesdsp --get master_enable)" == "true" ]] && pkgInstalled jamesdsp; then
     echo "true"
   else
     echo "false"
@@ -14,7 +14,12 @@ userDisplay="$6"
 userXauthority="$7"
 userDbusAddress="$8"
 userLang="$9"
-userLanguage="$10"
+userLanguage="${10}"
+# Set when started from the biglinux-settings jobs panel (pkexec drops the environment)
+export BIGLINUX_SETTINGS_JOBS="${11}"
+
+# inJobsPanel, progressPhase
+source "${BASH_SOURCE%/*}/../common/progress.sh"
 
 # Helper function to run a command as the original user
 runAsUser() {
@@ -22,11 +27,7 @@ runAsUser() {
   su "$originalUser" -c "export DISPLAY='$userDisplay'; export XAUTHORITY='$userXauthority'; export DBUS_SESSION_BUS_ADDRESS='$userDbusAddress'; export LANG='$userLang'; export LC_ALL='$userLang'; export LANGUAGE='$userLanguage'; $1"
 }
 
-# 1. Creates a named pipe (FIFO) for communication with Zenity
-pipePath="/tmp/container_manager_pipe_$$"
-mkfifo "$pipePath"
-
-# 2. Starts Zenity IN THE BACKGROUND, as the user
+# 1. Progress text
 if [[ "$function" == "install" ]]; then
   zenityTitle=$"Installing $package"
   zenityText=$"Installing $package, Please wait..."
@@ -34,7 +35,17 @@ elif [[ "$function" == "remove" ]]; then
   zenityTitle=$"Removing $package"
   zenityText=$"Removing $package, Please wait..."
 fi
-runAsUser "zenity --progress --title=\"$zenityTitle\" --text=\"$zenityText\" --pulsate --auto-close --no-cancel < '$pipePath'" &
+
+# 2. Progress goes to the jobs panel through stdout, or to a zenity dialog
+# started IN THE BACKGROUND, as the user, reading from a named pipe (FIFO)
+if inJobsPanel; then
+  pipePath="/dev/stdout"
+  progressPhase "$zenityText"
+else
+  pipePath="/tmp/container_manager_pipe_$$"
+  mkfifo "$pipePath"
+  runAsUser "zenity --progress --title=\"$zenityTitle\" --text=\"$zenityText\" --pulsate --auto-close --no-cancel < '$pipePath'" &
+fi
 
 # 3. Executes the root tasks.
 managePackage() {
@@ -51,7 +62,7 @@ managePackage() {
 managePackage > "$pipePath"
 
 # 4. Cleans up the pipe
-rm "$pipePath"
+inJobsPanel || rm "$pipePath"
 
 # 5. Shows the final result
 if [[ "$exitCode" == "0" ]]; then
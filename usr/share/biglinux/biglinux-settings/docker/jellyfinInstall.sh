@@ -3,10 +3,13 @@ package="biglinux-docker-jellyfin"
 packageName="jellyfin"
 port="8096"
 
+# pkgInstalled helper
+source "${BASH_SOURCE%/*}/../common/packages.sh"
+
 # check current status
 # action=$1
 if [ "$1" == "check" ]; then
-  if pacman -Q "$package" &> /dev/null; then
+  if pkgInstalled "$package"; then
       echo "true"
   else
       echo "false"
@@ -17,9 +20,9 @@ if [ "$1" == "check" ]; then
 # state=$2
 elif [ "$1" == "toggle" ]; then
   if [ "$2" == "true" ]; then
-    pkexec $PWD/docker/dockerInstallRun.sh "install" "$package" "$packageName" "$port" "$USER" "$DISPLAY" "$XAUTHORITY" "$DBUS_SESSION_BUS_ADDRESS" "$LANG" "$LANGUAGE"
+    pkexec $PWD/docker/dockerInstallRun.sh "install" "$package" "$packageName" "$port" "$USER" "$DISPLAY" "$XAUTHORITY" "$DBUS_SESSION_BUS_ADDRESS" "$LANG" "$LANGUAGE" "$BIGLINUX_SETTINGS_JOBS"
   else
-    pkexec $PWD/docker/dockerInstallRun.sh "remove" "$package" "$packageName" "$port" "$USER" "$DISPLAY" "$XAUTHORITY" "$DBUS_SESSION_BUS_ADDRESS" "$LANG" "$LANGUAGE"
+    pkexec $PWD/docker/dockerInstallRun.sh "remove" "$package" "$packageName" "$port" "$USER" "$DISPLAY" "$XAUTHORITY" "$DBUS_SESSION_BUS_ADDRESS" "$LANG" "$LANGUAGE" "$BIGLINUX_SETTINGS_JOBS"
   fi
   exit $?
 fi
@@ -0,0 +1,146 @@
+import http.client
+import json
+import os
+import re
+import socket
+import threading
+import urllib.parse
+from typing import Optional
+
+from check_providers import ProviderUnavailable
+
+DEFAULT_DOCKER_SOCKET = "/var/run/docker.sock"
+DOCKER_API_TIMEOUT = 5
+
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+COMPOSE_CONFIG_FILES_LABEL = "com.docker.compose.project.config_files"
+HEALTH_RE = re.compile(r"\((healthy|unhealthy|health: starting)\)")
+# Container events that can change what the rows show
+WATCHED_EVENTS = ["start", "stop", "die", "pause", "unpause", "destroy", "health_status"]
+
+
+def _default_socket_path():
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    return DEFAULT_DOCKER_SOCKET
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a unix socket, as used by the Docker Engine API."""
+
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class DockerState:
+    """Snapshot of compose projects and containers from the Docker Engine API.
+
+    One request to the daemon socket per refresh answers every container row,
+    instead of one "docker compose ls" per row. The socket path can be passed
+    in (e.g. a fake server in tests); by default DOCKER_HOST or
+    /var/run/docker.sock is used."""
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or _default_socket_path()
+        self._lock = threading.Lock()
+        self._projects = None
+
+    def begin_pass(self):
+        """Forget the current snapshot; the next lookup fetches a new one."""
+        with self._lock:
+            self._projects = None
+
+    def _request(self, path):
+        conn = _UnixHTTPConnection(self.socket_path, DOCKER_API_TIMEOUT)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise ProviderUnavailable(f"Docker API returned {response.status}")
+            return json.loads(body)
+        finally:
+            conn.close()
+
+    def _fetch(self):
+        try:
+            containers = self._request("/containers/json?all=1")
+        except (FileNotFoundError, ConnectionRefusedError):
+            # The daemon is not running: no project is running either
+            return {}
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise ProviderUnavailable(f"Docker API not available: {e}")
+        if not isinstance(containers, list) or not all(isinstance(c, dict) for c in containers):
+            raise ProviderUnavailable("Docker API returned an unexpected container list")
+
+        projects = {}
+        for container in containers:
+            labels = container.get("Labels") or {}
+            name = labels.get(COMPOSE_PROJECT_LABEL)
+            if not name:
+                continue
+            project = projects.setdefault(name, {"config_files": set(), "containers": []})
+            config_files = labels.get(COMPOSE_CONFIG_FILES_LABEL, "")
+            project["config_files"].update(f for f in config_files.split(",") if f)
+            health = HEALTH_RE.search(container.get("Status", ""))
+            project["containers"].append(
+                {
+                    "name": (container.get("Names") or [""])[0].lstrip("/"),
+                    "state": container.get("State", ""),
+                    "health": health.group(1) if health else None,
+                }
+            )
+        return projects
+
+    def projects(self):
+        """Return {project name: {"config_files": set, "containers": [...]}}."""
+        with self._lock:
+            if self._projects is None:
+                self._projects = self._fetch()
+            return self._projects
+
+    def is_compose_running(self, compose_file):
+        """True if a container of the project defined by compose_file is running,
+        like: docker compose ls | grep compose_file | grep running"""
+        compose_file = os.path.expanduser(compose_file)
+        for project in self.projects().values():
+            if compose_file in project["config_files"]:
+                if any(c["state"] == "running" for c in project["containers"]):
+                    return True
+        return False
+
+    def watch_events(self, on_event):
+        """Stream container events from the daemon and call on_event() for each.
+        Blocks until the daemon closes the connection; run it in a thread."""
+        filters = json.dumps({"type": ["container"], "event": WATCHED_EVENTS})
+        path = "/events?" + urllib.parse.urlencode({"filters": filters})
+        conn = _UnixHTTPConnection(self.socket_path, None)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            if response.status != 200:
+                print(f"Docker events API returned {response.status}")
+                return
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                if line.strip():
+                    self.begin_pass()
+                    on_event()
+        except (OSError, http.client.HTTPException) as e:
+            print(f"Docker events stream closed: {e}")
+        finally:
+            conn.close()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+
+GRUB_DEFAULT_FILE = "/etc/default/grub"
+PROC_CMDLINE = "/proc/cmdline"
+CMDLINE_KEYS = ("GRUB_CMDLINE_LINUX_DEFAULT", "GRUB_CMDLINE_LINUX")
+# Regeneration commands, in order of preference; some systems don't have
+# them in the PATH, so full paths are checked.
+MKCONFIG_COMMANDS = (
+    ["/usr/bin/update-grub"],
+    ["/usr/sbin/update-grub"],
+    ["/usr/bin/grub-mkconfig", "-o", "/boot/grub/grub.cfg"],
+    ["/usr/sbin/grub-mkconfig", "-o", "/boot/grub/grub.cfg"],
+    ["/usr/bin/grub2-mkconfig", "-o", "/boot/grub2/grub.cfg"],
+    ["/usr/sbin/grub2-mkconfig", "-o", "/boot/grub2/grub.cfg"],
+)
+
+ASSIGNMENT_RE = re.compile(r"^\s*([A-Z_][A-Z0-9_]*)=(.*)$")
+# A kernel parameter: whitespace separates them, except inside double quotes
+# (e.g. acpi_osi="Windows 2015")
+KERNEL_PARAM_RE = re.compile(r'(?:[^\s"]+|"[^"]*")+')
+DOUBLE_QUOTE_ESCAPE_RE = re.compile(r'([\\"$`])')
+
+
+class GrubConfigError(Exception):
+    """Raised when a value can't be edited without risking to change its meaning."""
+
+
+def _unquote(value):
+    """Shell value of the right hand side of an assignment, or None if it
+    isn't a single word (e.g. two quoted parts or a syntax error)."""
+    try:
+        words = shlex.split(value, comments=True)
+    except ValueError:
+        return None
+    if len(words) > 1:
+        return None
+    return words[0] if words else ""
+
+
+def _quote(value, quote):
+    """Right hand side of an assignment of value, in the given quoting style."""
+    if quote == "'" and "'" not in value:
+        return f"'{value}'"
+    if quote or shlex.quote(value) != value:
+        return '"' + DOUBLE_QUOTE_ESCAPE_RE.sub(r"\\\1", value) + '"'
+    return value
+
+
+def _quote_style(raw):
+    quote = raw.strip()[:1]
+    return quote if quote in ("'", '"') else ""
+
+
+def split_params(cmdline):
+    """Kernel parameters of a command line, quoted values kept whole."""
+    return KERNEL_PARAM_RE.findall(cmdline)
+
+
+def read_kernel_cmdline(path=PROC_CMDLINE):
+    """Parameters of the running kernel, or None if they can't be read."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return split_params(f.read())
+    except OSError:
+        return None
+
+
+def mkconfig_command():
+    """The command that regenerates grub.cfg on this system, or None."""
+    for command in MKCONFIG_COMMANDS:
+        if os.path.exists(command[0]):
+            return command
+    return None
+
+
+class GrubConfig:
+    """/etc/default/grub, parsed once and edited in place.
+
+    Any number of timeout and kernel parameter edits are applied to the
+    parsed lines and written back atomically with save(); regenerate() then
+    runs grub-mkconfig a single time for all of them. Checks use
+    configured_params() and running_params() to compare the configured
+    command line with the one the system booted with; both are re-read only
+    when the files change."""
+
+    def __init__(self, path: str = GRUB_DEFAULT_FILE, proc_cmdline: str = PROC_CMDLINE):
+        self.path = path
+        self.proc_cmdline = proc_cmdline
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.lines = None
+        self._running = None
+
+    def load(self):
+        """(Re)parse the file if it changed. Returns False if it can't be read."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return True
+                with open(self.path, encoding="utf-8") as f:
+                    self.lines = f.read().splitlines()
+                self._mtime = mtime
+            except OSError:
+                self.lines = None
+                self._mtime = None
+                return False
+            return True
+
+    def _find(self, key):
+        """(line index, raw value) of the last assignment of key, the one
+        the shell keeps when grub-mkconfig sources the file."""
+        found = None, None
+        for index, line in enumerate(self.lines or []):
+            match = ASSIGNMENT_RE.match(line)
+            if match and match.group(1) == key:
+                found = index, match.group(2)
+        return found
+
+    def get(self, key):
+        """Value of a variable, unquoted, or None if it is not set."""
+        index, value = self._find(key)
+        if index is None:
+            return None
+        unquoted = _unquote(value)
+        return value.strip() if unquoted is None else unquoted
+
+    def _cmdline_key(self):
+        for key in CMDLINE_KEYS:
+            if self._find(key)[0] is not None:
+                return key
+        return CMDLINE_KEYS[0]
+
+    def _params(self):
+        params = []
+        for key in CMDLINE_KEYS:
+            params += split_params(self.get(key) or "")
+        return params
+
+    def configured_params(self):
+        """Kernel parameters configured for the next boot, or None."""
+        if not self.load():
+            return None
+        return self._params()
+
+    def running_params(self):
+        """Kernel parameters of the running system; they only change on reboot."""
+        if self._running is None:
+            self._running = read_kernel_cmdline(self.proc_cmdline)
+        return self._running
+
+    def param_state(self, param):
+        """(running, configured) for a parameter such as "mitigations=off"."""
+        running = self.running_params() or []
+        configured = self.configured_params() or []
+        return (param in running, param in configured)
+
+    def _set(self, key, value):
+        """Raises GrubConfigError if the current line is not one plainly
+        quoted value: rewriting it could change what grub-mkconfig reads."""
+        index, old = self._find(key)
+        quote = ""
+        if index is not None:
+            current = _unquote(old)
+            # Keep the quoting style of the existing line (GRUB_TIMEOUT=5, GRUB_CMDLINE_LINUX="...")
+            quote = _quote_style(old)
+            if current is None or _quote(current, quote) != old.strip():
+                raise GrubConfigError(f"{key} in {self.path} is not a plain value; it has to be edited by hand")
+            if current == value:
+                return False
+        line = f"{key}={_quote(value, quote)}"
+        if index is None:
+            self.lines.append(line)
+        else:
+            self.lines[index] = line
+        return True
+
+    def set_timeout(self, timeout):
+        """Set GRUB_TIMEOUT. Returns True if the file content changed."""
+        return self._set("GRUB_TIMEOUT", str(timeout))
+
+    def add_params(self, params):
+        """Add kernel parameters (a space separated string) that are not set yet.
+        Raises GrubConfigError (see _set)."""
+        present = self._params()
+        missing = [p for p in split_params(params) if p not in present]
+        if not missing:
+            return False
+        key = self._cmdline_key()
+        return self._set(key, " ".join(split_params(self.get(key) or "") + missing))
+
+    def remove_params(self, params):
+        """Remove kernel parameters (a space separated string) from every command
+        line variable. Raises GrubConfigError (see _set)."""
+        params = set(split_params(params))
+        changed = False
+        for key in CMDLINE_KEYS:
+            value = self.get(key)
+            if value is None:
+                continue
+            current = split_params(value)
+            kept = [p for p in current if p not in params]
+            if kept != current:
+                changed |= self._set(key, " ".join(kept))
+        return changed
+
+    def save(self):
+        """Write the edited lines atomically, keeping a .bak copy of the old file."""
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            shutil.copy2(self.path, f"{self.path}.bak")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(self.lines) + "\n")
+            shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+    @staticmethod
+    def regenerate():
+        """Regenerate grub.cfg once. Returns the exit code."""
+        command = mkconfig_command()
+        if command is None:
+            print("grub-mkconfig not found", file=sys.stderr)
+            return 1
+        return subprocess.run(command).returncode
+
+
+def main(argv=None):
+    """Apply GRUB edits as root: python3 grub_config.py [--timeout N] [--add P] [--remove P]"""
+    parser = argparse.ArgumentParser(description="Edit /etc/default/grub and regenerate GRUB once.")
+    parser.add_argument("--timeout", help="set GRUB_TIMEOUT")
+    parser.add_argument("--add", action="append", default=[], help="kernel parameters to add")
+    parser.add_argument("--remove", action="append", default=[], help="kernel parameters to remove")
+    parser.add_argument("--file", default=GRUB_DEFAULT_FILE, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    config = GrubConfig(args.file)
+    if not config.load():
+        print(f"Cannot read {args.file}", file=sys.stderr)
+        return 1
+    changed = False
+    try:
+        if args.timeout is not None:
+            changed |= config.set_timeout(args.timeout)
+        for params in args.remove:
+            changed |= config.remove_params(params)
+        for params in args.add:
+            changed |= config.add_params(params)
+    except GrubConfigError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not changed:
+        print("GRUB configuration already up to date.")
+        return 0
+    try:
+        config.save()
+    except OSError as e:
+        print(f"Cannot write {args.file}: {e}", file=sys.stderr)
+        return 1
+    return config.regenerate()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
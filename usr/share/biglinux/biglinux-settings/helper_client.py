@@ -0,0 +1,110 @@
+from gi.repository import Gio, GLib
+
+HELPER_BUS_NAME = "org.biglinux.Settings.Helper"
+HELPER_OBJECT_PATH = "/org/biglinux/Settings/Helper"
+HELPER_IFACE = "org.biglinux.Settings.Helper"
+
+DBUS_BUS_NAME = "org.freedesktop.DBus"
+DBUS_OBJECT_PATH = "/org/freedesktop/DBus"
+DBUS_IFACE = "org.freedesktop.DBus"
+DBUS_TIMEOUT_MS = 5000
+
+
+class HelperUnavailable(Exception):
+    """Raised when the privileged helper can't be reached; callers fall back to pkexec."""
+
+
+class HelperClient:
+    """Client of the privileged helper service (privileged_helper.py).
+
+    apply() sends a list of "kind:value" operations (see common/applyBatch.sh),
+    waits for the job to finish and returns {operation: exit code}. It blocks,
+    so it must be called from a background thread; on_output(line) is called
+    from that thread for every line of output the job streams back."""
+
+    def __init__(self, bus=None):
+        self._bus = bus
+        self._available = None
+
+    def _get_bus(self):
+        if self._bus is None:
+            try:
+                self._bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+            except GLib.Error as e:
+                raise HelperUnavailable(e.message)
+        return self._bus
+
+    def available(self):
+        """True if the helper is installed (D-Bus activatable) or running."""
+        if self._available is None:
+            try:
+                bus = self._get_bus()
+                names = set()
+                for method in ("ListActivatableNames", "ListNames"):
+                    reply = bus.call_sync(
+                        DBUS_BUS_NAME, DBUS_OBJECT_PATH, DBUS_IFACE, method, None,
+                        GLib.VariantType.new("(as)"), Gio.DBusCallFlags.NONE,
+                        DBUS_TIMEOUT_MS, None,
+                    )
+                    names.update(reply.unpack()[0])
+                self._available = HELPER_BUS_NAME in names
+            except (GLib.Error, HelperUnavailable) as e:
+                print(f"Privileged helper not available: {e}")
+                self._available = False
+        return self._available
+
+    def apply(self, operations, on_output=None):
+        bus = self._get_bus()
+        context = GLib.MainContext.new()
+        # Signals are dispatched to this thread's own main context, only while
+        # it is iterated below, so none is handled before the job ID is known.
+        context.push_thread_default()
+        state = {"job": None, "done": False, "lost": False}
+        codes = {}
+
+        def on_signal(connection, sender, path, iface, signal, params):
+            values = params.unpack()
+            if values[0] != state["job"]:
+                return
+            if signal == "Output" and on_output is not None:
+                on_output(values[1])
+            elif signal == "Result":
+                codes[values[1]] = values[2]
+            elif signal == "Finished":
+                state["done"] = True
+
+        def on_name_owner_changed(connection, sender, path, iface, signal, params):
+            name, old_owner, new_owner = params.unpack()
+            if name == HELPER_BUS_NAME and not new_owner:
+                state["lost"] = True
+
+        subscriptions = [
+            bus.signal_subscribe(
+                HELPER_BUS_NAME, HELPER_IFACE, None, HELPER_OBJECT_PATH, None,
+                Gio.DBusSignalFlags.NONE, on_signal,
+            ),
+            bus.signal_subscribe(
+                DBUS_BUS_NAME, DBUS_IFACE, "NameOwnerChanged", DBUS_OBJECT_PATH,
+                HELPER_BUS_NAME, Gio.DBusSignalFlags.NONE, on_name_owner_changed,
+            ),
+        ]
+        try:
+            try:
+                reply = bus.call_sync(
+                    HELPER_BUS_NAME, HELPER_OBJECT_PATH, HELPER_IFACE, "Apply",
+                    GLib.Variant("(as)", (list(operations),)),
+                    GLib.VariantType.new("(u)"), Gio.DBusCallFlags.NONE,
+                    DBUS_TIMEOUT_MS, None,
+                )
+            except GLib.Error as e:
+                raise HelperUnavailable(e.message)
+            state["job"] = reply.unpack()[0]
+            while not state["done"] and not state["lost"]:
+                context.iteration(True)
+            if state["lost"]:
+                print("Privileged helper exited before finishing the job")
+        finally:
+            for subscription in subscriptions:
+                bus.signal_unsubscribe(subscription)
+            context.pop_thread_default()
+        return codes
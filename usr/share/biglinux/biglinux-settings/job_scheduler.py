@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+
+# Resources a job can need. Jobs needing the same exclusive resource run one
+# at a time, in the order they were submitted; the others run in parallel.
+PACMAN = "pacman"  # pacman database lock
+GRUB = "grub"  # /etc/default/grub and grub-mkconfig
+DOCKER = "docker"  # docker daemon (compose projects)
+USER = "user"  # user configuration only
+EXCLUSIVE_RESOURCES = frozenset((PACMAN, GRUB, DOCKER))
+
+# What a toggle script does, found by reading it and the scripts it calls
+RESOURCE_PATTERNS = {
+    PACMAN: re.compile(r"\bpacman\s+-[A-Za-z]*[SRU]|\bpamac\s+(?:install|remove)"),
+    GRUB: re.compile(r"grub-mkconfig|update-grub|grub_config\.py"),
+    DOCKER: re.compile(r"\bdocker(?:\s+compose|-compose)\b|systemctl\s.*\bdocker\b"),
+}
+# Where the application is installed; scripts call each other by this path too
+INSTALL_DIR = "/usr/share/biglinux/biglinux-settings"
+# Scripts called by a script: "$PWD/group/fileRun.sh" or
+# "/usr/share/biglinux/biglinux-settings/group/fileRun.sh" (relative to the
+# app directory) or "${BASH_SOURCE%/*}/file.sh" (relative to the script)
+CALLED_SCRIPT_RE = re.compile(
+    r"(\$PWD|\$\{BASH_SOURCE%/\*\}|" + re.escape(INSTALL_DIR) + r")/([\w./-]+\.sh)"
+)
+
+# applyBatch.sh / privileged helper operation kind -> resource
+OPERATION_RESOURCES = {
+    "install": PACMAN,
+    "remove": PACMAN,
+    "grub-timeout": GRUB,
+    "grub-add": GRUB,
+    "grub-remove": GRUB,
+}
+
+_script_resources = {}
+
+
+def script_resources(script_path):
+    """Return the resources a toggle script needs. Results are cached."""
+    path = os.path.normpath(script_path)
+    resources = _script_resources.get(path)
+    if resources is None:
+        resources = _scan_script(path, set())
+        if not resources & EXCLUSIVE_RESOURCES:
+            resources.add(USER)
+        resources = frozenset(resources)
+        _script_resources[path] = resources
+    return resources
+
+
+def _scan_script(path, visited):
+    visited.add(path)
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return set()
+    resources = {name for name, pattern in RESOURCE_PATTERNS.items() if pattern.search(text)}
+    for base, called in CALLED_SCRIPT_RE.findall(text):
+        if base in ("$PWD", INSTALL_DIR):
+            called_path = os.path.normpath(called)
+        else:
+            called_path = os.path.normpath(os.path.join(os.path.dirname(path), called))
+        if called_path not in visited:
+            resources |= _scan_script(called_path, visited)
+    return resources
+
+
+def operation_resources(operations):
+    """Return the resources needed by "kind:value" batch operations."""
+    resources = {OPERATION_RESOURCES.get(o.partition(":")[0], USER) for o in operations}
+    if resources & EXCLUSIVE_RESOURCES:
+        resources.discard(USER)
+    return frozenset(resources)
+
+
+class JobCancelled(Exception):
+    """Raised when a queued job is cancelled before it starts."""
+
+
+class JobScheduler:
+    """Decides when jobs may start, based on the resources they need.
+
+    acquire() blocks the calling (background) thread until no running job
+    holds one of the job's exclusive resources and no job queued before it
+    needs one of them, so conflicting jobs keep their submission order.
+    on_queue_changed() is called, from any thread, when queue positions change."""
+
+    def __init__(self, on_queue_changed=None):
+        self.on_queue_changed = on_queue_changed
+        self._lock = threading.Condition()
+        self._queue = []  # jobs waiting to start, oldest first
+        self._running = []
+        self._cancelled = set()
+
+    @staticmethod
+    def _conflicts(a, b):
+        return bool(a.resources & b.resources & EXCLUSIVE_RESOURCES)
+
+    def _can_start(self, job):
+        for other in self._running:
+            if self._conflicts(job, other):
+                return False
+        for other in self._queue:
+            if other is job:
+                return True
+            if self._conflicts(job, other):
+                return False
+        return True
+
+    def position(self, job):
+        """1-based position of a queued job among the jobs it waits for, or 0."""
+        with self._lock:
+            if job not in self._queue:
+                return 0
+            ahead = [o for o in self._queue[: self._queue.index(job)] if self._conflicts(job, o)]
+            return len(ahead) + 1
+
+    def acquire(self, job):
+        with self._lock:
+            self._queue.append(job)
+            self._changed()
+            try:
+                while not self._can_start(job):
+                    if job in self._cancelled:
+                        raise JobCancelled(job.title)
+                    self._lock.wait()
+                if job in self._cancelled:
+                    raise JobCancelled(job.title)
+                self._running.append(job)
+            finally:
+                self._queue.remove(job)
+                self._cancelled.discard(job)
+                self._lock.notify_all()
+        self._changed()
+
+    def release(self, job):
+        with self._lock:
+            if job in self._running:
+                self._running.remove(job)
+            self._lock.notify_all()
+        self._changed()
+
+    def cancel(self, job):
+        """Cancel a queued job. Returns False if it is not queued anymore."""
+        with self._lock:
+            if job not in self._queue:
+                return False
+            self._cancelled.add(job)
+            self._lock.notify_all()
+            return True
+
+    def queued(self):
+        with self._lock:
+            return list(self._queue)
+
+    def _changed(self):
+        if self.on_queue_changed is not None:
+            self.on_queue_changed()
@@ -0,0 +1,216 @@
+import itertools
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+from gi.repository import GLib
+from job_scheduler import JobCancelled, JobScheduler, script_resources
+from tracing import tracer
+
+# Lines kept in memory per job; the full log is written to disk when it ends
+MAX_LOG_LINES = 2000
+# Finished jobs kept in the panel and log files kept on disk
+MAX_HISTORY = 20
+# Minimum delay between two panel updates of a job, in seconds
+UPDATE_INTERVAL = 0.1
+# Environment variable telling scripts to report progress on stdout instead
+# of opening a zenity dialog (see common/progress.sh)
+JOBS_ENV = "BIGLINUX_SETTINGS_JOBS"
+
+PERCENT_RE = re.compile(r"^\s*(\d{1,3})(?:\.\d+)?\s*%?\s*$")
+
+
+class Job:
+    """A running or finished script, with its progress and output."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id, title, command, resources):
+        self.id = job_id
+        self.title = title
+        self.command = command
+        self.resources = resources
+        self.state = Job.QUEUED
+        self.queue_position = 0
+        self.progress: Optional[float] = None  # 0.0 - 1.0, None while unknown
+        self.phase = ""
+        self.lines = deque(maxlen=MAX_LOG_LINES)
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.returncode: Optional[int] = None
+        self.log_path: Optional[str] = None
+        self._last_update = 0.0
+
+    def feed(self, line):
+        """Parse one output line, using the zenity --progress protocol:
+        a number is the percentage done, "#text" is the current phase."""
+        line = line.rstrip("\n")
+        match = PERCENT_RE.match(line)
+        if match:
+            self.progress = min(int(match.group(1)), 100) / 100
+        elif line.startswith("#"):
+            self.phase = line[1:].strip()
+        else:
+            self.lines.append(line)
+
+
+class JobManager:
+    """Runs scripts as jobs, reading their output line by line.
+
+    on_update(job) is called on the GTK main loop whenever a job is queued,
+    starts, makes progress or ends. Jobs are started by a JobScheduler, so
+    jobs needing the same resource (e.g. the pacman database) run one after
+    the other. The last MAX_HISTORY jobs are kept, and the log of every
+    finished job is saved in log_dir for diagnosis."""
+
+    def __init__(self, log_dir: str, on_update=None):
+        self.log_dir = log_dir
+        self.on_update = on_update
+        self.jobs = deque(maxlen=MAX_HISTORY)
+        self.scheduler = JobScheduler(self._on_queue_changed)
+        self._ids = itertools.count(1)
+
+    @contextmanager
+    def job(self, title, command, resources):
+        """Queue a job and wait until the scheduler lets it start; the body of
+        the with statement runs it, reports its output with output() and sets
+        job.returncode. Raises JobCancelled if it is cancelled while queued."""
+        job = Job(next(self._ids), title, command, resources)
+        self._notify(job, added=True)
+        try:
+            self.scheduler.acquire(job)
+        except JobCancelled:
+            job.state = Job.CANCELLED
+            job.finished = time.time()
+            self._notify(job)
+            raise
+        job.state = Job.RUNNING
+        self._notify(job)
+        try:
+            yield job
+        except BaseException:
+            if job.returncode is None:
+                job.returncode = 1
+            raise
+        finally:
+            self.scheduler.release(job)
+            self._finish(job, job.returncode)
+
+    def output(self, job, line):
+        """Feed a line of output to a running job. Called from its thread."""
+        job.feed(line)
+        now = time.monotonic()
+        if now - job._last_update >= UPDATE_INTERVAL:
+            job._last_update = now
+            self._notify(job)
+
+    def cancel(self, job):
+        """Cancel a queued job. Returns False if it already started."""
+        return self.scheduler.cancel(job)
+
+    def run(self, title, command, timeout=None, env=None, resources=None):
+        """Run command as a job and wait for it. Called from a background thread.
+        Returns a subprocess.CompletedProcess (stderr is merged into stdout) and
+        raises subprocess.TimeoutExpired like subprocess.run, or JobCancelled.
+        The resources it needs are read from the script when not given."""
+        if resources is None:
+            resources = script_resources(str(command[0]))
+        env = dict(os.environ if env is None else env, **{JOBS_ENV: "1"})
+        with self.job(title, command, resources) as job:
+            name = " ".join(map(str, command[:2]))
+            with tracer.span(name, "script", job=job.id) as span:
+                result = self._run_process(job, command, timeout, env)
+                span.set(exit_code=result.returncode, output_bytes=len(result.stdout))
+                return result
+
+    def _run_process(self, job, command, timeout, env):
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                bufsize=1,
+                env=env,
+            )
+        except OSError as e:
+            job.lines.append(str(e))
+            job.returncode = 127
+            raise
+
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, on_timeout) if timeout else None
+        if timer:
+            timer.start()
+        output = []
+        try:
+            for line in process.stdout:
+                output.append(line)
+                self.output(job, line)
+            returncode = process.wait()
+        finally:
+            if timer:
+                timer.cancel()
+        job.returncode = returncode
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, timeout, "".join(output))
+        return subprocess.CompletedProcess(command, returncode, "".join(output), "")
+
+    def _finish(self, job, returncode):
+        job.returncode = returncode
+        job.finished = time.time()
+        job.state = Job.SUCCEEDED if returncode == 0 else Job.FAILED
+        if job.state == Job.SUCCEEDED:
+            job.progress = 1.0
+        self._save_log(job)
+        self._notify(job)
+
+    def _save_log(self, job):
+        name = os.path.basename(str(job.command[0])).rsplit(".", 1)[0]
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(job.started))
+        path = os.path.join(self.log_dir, f"{stamp}-{job.id}-{name}.log")
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"$ {' '.join(map(str, job.command))}\n")
+                f.write("\n".join(job.lines))
+                f.write(f"\n[exit code {job.returncode}]\n")
+            job.log_path = path
+            # Keep only the newest logs
+            logs = sorted(n for n in os.listdir(self.log_dir) if n.endswith(".log"))
+            for old in logs[:-MAX_HISTORY]:
+                os.unlink(os.path.join(self.log_dir, old))
+        except OSError as e:
+            print(f"Error saving job log: {e}")
+
+    def _on_queue_changed(self):
+        for job in self.scheduler.queued():
+            position = self.scheduler.position(job)
+            if position and position != job.queue_position:
+                job.queue_position = position
+                self._notify(job)
+
+    def _notify(self, job, added=False):
+        GLib.idle_add(self._deliver, job, added)
+
+    def _deliver(self, job, added):
+        if added:
+            self.jobs.append(job)
+        if self.on_update is not None:
+            self.on_update(job)
+        return GLib.SOURCE_REMOVE
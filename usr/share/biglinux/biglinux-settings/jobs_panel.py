@@ -0,0 +1,145 @@
+import gi
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+import gettext
+import locale
+from gi.repository import Gtk
+from jobs import Job
+
+# Set up gettext for application localization.
+DOMAIN = "biglinux-settings"
+LOCALE_DIR = "/usr/share/locale"
+
+locale.setlocale(locale.LC_ALL, "")
+locale.bindtextdomain(DOMAIN, LOCALE_DIR)
+locale.textdomain(DOMAIN)
+
+gettext.bindtextdomain(DOMAIN, LOCALE_DIR)
+gettext.textdomain(DOMAIN)
+_ = gettext.gettext
+
+# Log lines shown for a job; the full log is in the job's log file
+VISIBLE_LOG_LINES = 200
+
+
+class JobRow(Gtk.Box):
+    """Progress, phase and live log of one job."""
+
+    def __init__(self, job, on_cancel):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=4)
+        self.job = job
+        self.set_margin_top(6)
+        self.set_margin_bottom(6)
+        self.set_margin_start(6)
+        self.set_margin_end(6)
+
+        title_box = Gtk.Box(spacing=6)
+        self.title_label = Gtk.Label(xalign=0, label=job.title, hexpand=True)
+        self.title_label.add_css_class("heading")
+        title_box.append(self.title_label)
+        self.cancel_button = Gtk.Button(icon_name="process-stop-symbolic")
+        self.cancel_button.add_css_class("flat")
+        self.cancel_button.set_tooltip_text(_("Cancel"))
+        self.cancel_button.connect("clicked", lambda button: on_cancel(job))
+        title_box.append(self.cancel_button)
+        self.append(title_box)
+
+        self.progress_bar = Gtk.ProgressBar(show_text=True)
+        self.append(self.progress_bar)
+
+        self.phase_label = Gtk.Label(xalign=0, wrap=True)
+        self.phase_label.add_css_class("caption")
+        self.phase_label.add_css_class("dim-label")
+        self.append(self.phase_label)
+
+        self.log_view = Gtk.TextView(editable=False, cursor_visible=False, monospace=True)
+        self.log_view.set_wrap_mode(Gtk.WrapMode.WORD_CHAR)
+        log_scroll = Gtk.ScrolledWindow(min_content_height=120, max_content_height=240)
+        log_scroll.set_propagate_natural_height(True)
+        log_scroll.set_child(self.log_view)
+        self.log_expander = Gtk.Expander(label=_("Log"))
+        self.log_expander.set_child(log_scroll)
+        self.append(self.log_expander)
+
+        self.update()
+
+    def update(self):
+        job = self.job
+        # Only queued jobs can be cancelled
+        self.cancel_button.set_visible(job.state == Job.QUEUED)
+        if job.state == Job.QUEUED:
+            self.progress_bar.set_fraction(0.0)
+            self.progress_bar.set_text(
+                _("Queued, position {} (waiting for {})").format(
+                    job.queue_position, ", ".join(sorted(job.resources))
+                )
+            )
+        elif job.state == Job.CANCELLED:
+            self.progress_bar.set_text(_("Cancelled"))
+        elif job.state == Job.RUNNING:
+            if job.progress is None:
+                self.progress_bar.pulse()
+                self.progress_bar.set_text(_("Running..."))
+            else:
+                self.progress_bar.set_fraction(job.progress)
+                self.progress_bar.set_text(f"{int(job.progress * 100)}%")
+        elif job.state == Job.SUCCEEDED:
+            self.progress_bar.set_fraction(1.0)
+            self.progress_bar.set_text(_("Done"))
+        else:
+            self.progress_bar.set_text(_("Failed (exit code {})").format(job.returncode))
+            self.progress_bar.add_css_class("error")
+            # Failures are what the log is for
+            self.log_expander.set_expanded(True)
+
+        phase = job.phase
+        if job.log_path and job.state in (Job.SUCCEEDED, Job.FAILED):
+            phase = _("Log saved to {}").format(job.log_path)
+        self.phase_label.set_label(phase)
+        self.phase_label.set_visible(bool(phase))
+
+        if self.log_expander.get_expanded():
+            lines = list(job.lines)[-VISIBLE_LOG_LINES:]
+            self.log_view.get_buffer().set_text("\n".join(lines))
+
+
+class JobsPanel(Gtk.Box):
+    """Live list of running and recent jobs, newest first."""
+
+    def __init__(self, on_cancel):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.set_size_request(420, -1)
+        self.on_cancel = on_cancel  # on_cancel(job), for queued jobs
+
+        self.empty_label = Gtk.Label(label=_("No recent operations"))
+        self.empty_label.add_css_class("dim-label")
+        self.empty_label.set_margin_top(12)
+        self.empty_label.set_margin_bottom(12)
+        self.append(self.empty_label)
+
+        self.list_box = Gtk.ListBox(selection_mode=Gtk.SelectionMode.NONE)
+        self.list_box.add_css_class("boxed-list")
+        scroll = Gtk.ScrolledWindow(max_content_height=480)
+        scroll.set_propagate_natural_height(True)
+        scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scroll.set_child(self.list_box)
+        self.append(scroll)
+
+        self.rows = {}  # job id -> JobRow
+
+    def update_job(self, job, history):
+        """Show the current state of a job; rows of jobs dropped from history are removed."""
+        row = self.rows.get(job.id)
+        if row is None:
+            row = JobRow(job, self.on_cancel)
+            self.rows[job.id] = row
+            self.list_box.prepend(row)
+        else:
+            row.update()
+
+        kept = {j.id for j in history}
+        for job_id in list(self.rows):
+            if job_id not in kept:
+                self.list_box.remove(self.rows.pop(job_id).get_parent())
+        self.empty_label.set_visible(not self.rows)
@@ -1,4 +1,9 @@
 #!/usr/bin/env python3
+import time
+
+# Start of the import phase, for --profile-startup
+MODULE_STARTED = time.perf_counter()
+
 import gi
 
 gi.require_version("Gtk", "4.0")
@@ -8,14 +13,36 @@ import gettext
 import json
 import locale
 import os
+import sys
 
+import startup_profile
+import tracing
 from ai_page import AIPage
+from check_engine import DEFAULT_CONCURRENCY, CheckEngine
+from check_providers import CheckContext
 from devices_page import DevicesPage
 from docker_page import DockerPage
+from docker_state import DockerState
 from gi.repository import Adw, Gdk, Gio, GLib, Gtk
+from grub_config import GrubConfig
+from helper_client import HelperClient
+from jobs import JobManager
+from jobs_panel import JobsPanel
+from package_index import PackageIndex
 from performance_page import PerformancePage
 from preload_page import PreloadPage
+from script_health import ScriptHealth
+from script_workers import ScriptWorkers
+from search_index import SearchIndex
+from search_pipeline import SearchPipeline
+from search_results import SearchResultsView
+from staging import StagedChanges, apply_changes
+from startup_profile import startup
+from state_cache import StateCache
+from state_events import StateEvents
+from systemd_state import SystemdState
 from system_page import SystemPage
+from tracing import tracer
 from usability_page import UsabilityPage
 
 DOMAIN = "biglinux-settings"
@@ -25,6 +52,10 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ICONS_DIR = os.path.join(BASE_DIR, "icons")
 CONFIG_DIR = os.path.expanduser("~/.config/biglinux-settings")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+STATE_CACHE_FILE = os.path.join(CONFIG_DIR, "state_cache.json")
+# Seconds between the first unsaved state cache change and saving it
+STATE_CACHE_SAVE_DELAY = 5
+JOB_LOGS_DIR = os.path.join(CONFIG_DIR, "job-logs")
 
 locale.setlocale(locale.LC_ALL, "")
 locale.bindtextdomain(DOMAIN, LOCALE_DIR)
@@ -37,35 +68,81 @@ _ = gettext.gettext
 
 class BiglinuxSettingsApp(Adw.Application):
     def __init__(self):
+        self.created = time.perf_counter()
         super().__init__(application_id="org.biglinux.biglinux-settings")
         GLib.set_prgname("biglinux-settings")
         self.connect("activate", self.on_activate)
 
     def on_activate(self, app):
+        startup.add("Adw init", time.perf_counter() - app.created)
         self.window = BiglinuxSettingsWindow(application=app)
-        self.window.present()
+        with startup.phase("window present"):
+            self.window.present()
 
 
 class BiglinuxSettingsWindow(Adw.ApplicationWindow):
     def __init__(self, **kwargs):
+        started = time.perf_counter()
         super().__init__(**kwargs)
         self.set_title(_("BigLinux Settings"))
 
         # Load saved window size or use defaults
-        saved_size = self._load_window_config()
-        width = saved_size.get("width", 1000)
-        height = saved_size.get("height", 700)
+        self.config = self._load_window_config()
+        width = self.config.get("width", 1000)
+        height = self.config.get("height", 700)
         self.set_default_size(width, height)
 
-        icon_theme = Gtk.IconTheme.get_for_display(Gdk.Display.get_default())
-        icon_theme.add_search_path(ICONS_DIR)
+        # Background engine used by all pages to check the state of their scripts
+        self.check_engine = CheckEngine(
+            self.config.get("check_concurrency", DEFAULT_CONCURRENCY)
+        )
+        # Warm bash workers that run the scripts' "check" action
+        self.script_workers = ScriptWorkers(
+            self.config.get("script_workers", self.check_engine.max_workers)
+        )
+        # Quarantines check scripts that keep hanging and retries them in the background
+        self.script_health = ScriptHealth(lambda path: self.refresh_scripts({path}))
+        # Root operations go through the privileged helper service when it is installed
+        self.privileged_helper = HelperClient()
+        # Toggle scripts run as jobs, with live progress and a log history
+        self.jobs = JobManager(JOB_LOGS_DIR, self._on_job_update)
+        # Switch changes collected in staging mode, applied together
+        self.staging = StagedChanges(self._on_staged_changed)
+        # Last known script states, used to paint rows before their checks finish
+        self.state_cache = StateCache(STATE_CACHE_FILE, on_change=self._schedule_state_cache_save)
+        self._state_cache_save = None
+        # Installed packages, shared by all package checks
+        self.package_index = PackageIndex()
+        # systemd unit states, fetched in bulk over D-Bus
+        self.systemd_state = SystemdState()
+        # Compose projects and containers, from the Docker Engine API
+        self.docker_state = DockerState()
+        # Configured and running kernel command line, shared by the GRUB rows
+        self.grub_config = GrubConfig()
+        # State sources used by the declarative (in-process) checks
+        self.check_context = CheckContext(
+            self.package_index, self.systemd_state, self.docker_state, self.grub_config
+        )
+        # Searchable text of every row, filled in as pages create their rows
+        self.search_index = SearchIndex(DOMAIN, LOCALE_DIR)
+        # Refreshes rows when their state is changed outside the app
+        self.state_events = StateEvents(self.refresh_scripts, self.docker_state)
+
+        startup.add("window and services", time.perf_counter() - started)
+
+        with startup.phase("icon theme"):
+            icon_theme = Gtk.IconTheme.get_for_display(Gdk.Display.get_default())
+            icon_theme.add_search_path(ICONS_DIR)
 
         self.sidebar_buttons = []
         self.pages_config = []
         self.is_searching = False
         self.current_page_id = None
-        self.load_css()
+        with startup.phase("CSS"):
+            self.load_css()
         self.setup_ui()
+        startup.expect_pages(len(self.pages_config))
+        self.connect("realize", self._on_first_realize)
 
         # Connect close signal to save window size
         self.connect("close-request", self._on_close_request)
@@ -84,17 +161,33 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
         """Save window configuration to JSON file."""
         try:
             os.makedirs(CONFIG_DIR, exist_ok=True)
-            width = self.get_width()
-            height = self.get_height()
-            config = {"width": width, "height": height}
+            # Keep other saved options (e.g. check_concurrency) untouched
+            config = dict(self.config)
+            config["width"] = self.get_width()
+            config["height"] = self.get_height()
             with open(CONFIG_FILE, "w", encoding="utf-8") as f:
                 json.dump(config, f, indent=2)
         except OSError as e:
             print(f"Error saving window config: {e}")
 
+    def _schedule_state_cache_save(self):
+        """Save the state cache once the sync pass that changed it settles."""
+        if self._state_cache_save is None:
+            self._state_cache_save = GLib.timeout_add_seconds(STATE_CACHE_SAVE_DELAY, self._save_state_cache)
+
+    def _save_state_cache(self):
+        self._state_cache_save = None
+        self.state_cache.save()
+        return GLib.SOURCE_REMOVE
+
     def _on_close_request(self, window):
         """Handle window close request - save configuration."""
         self._save_window_config()
+        self.state_cache.save()
+        self.state_events.stop()
+        self.check_engine.shutdown()
+        self.script_workers.shutdown()
+        tracer.finish()
         return False  # Allow window to close
 
     def load_css(self):
@@ -182,10 +275,36 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
         self.search_entry.set_placeholder_text(_("Search..."))
         self.search_entry.set_hexpand(False)
         self.search_entry.set_width_chars(30)
+        # The search pipeline debounces keystrokes itself
+        self.search_entry.set_search_delay(0)
         self.search_entry.connect("search-changed", self.on_search_changed)
+        self.search_pipeline = SearchPipeline(
+            self.search_index, self._show_search_results, self._ensure_all_pages
+        )
         content_header.set_title_widget(self.search_entry)
+
+        # Staging mode: switches only record changes, applied together later
+        self.staging_button = Gtk.ToggleButton(icon_name="document-edit-symbolic")
+        self.staging_button.set_tooltip_text(_("Stage changes and apply them together"))
+        self.staging_button.connect("toggled", self.on_staging_toggled)
+        content_header.pack_end(self.staging_button)
+
+        # Running and recent jobs, with their progress and logs
+        self.jobs_panel = JobsPanel(self.jobs.cancel)
+        jobs_popover = Gtk.Popover()
+        jobs_popover.set_child(self.jobs_panel)
+        self.jobs_button = Gtk.MenuButton(icon_name="view-list-bullet-symbolic")
+        self.jobs_button.set_tooltip_text(_("Operations"))
+        self.jobs_button.set_popover(jobs_popover)
+        content_header.pack_end(self.jobs_button)
         content_toolbar.add_top_bar(content_header)
 
+        # Pending changes bar
+        self.staging_banner = Adw.Banner()
+        self.staging_banner.set_button_label(_("Review and Apply"))
+        self.staging_banner.connect("button-clicked", self.on_review_staged_changes)
+        content_toolbar.add_top_bar(self.staging_banner)
+
         # === CREATE SEARCH RESULTS CONTAINER ===
         self.search_results_scroll = Gtk.ScrolledWindow()
         self.search_results_scroll.set_policy(
@@ -194,22 +313,17 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
         self.search_results_scroll.set_vexpand(True)
         self.search_results_scroll.set_visible(False)
 
-        self.search_results_box = Gtk.Box(
-            orientation=Gtk.Orientation.VERTICAL,
-            spacing=0,
-            margin_top=12,
-            margin_bottom=12,
-            margin_start=20,
-            margin_end=20,
-        )
-        self.search_results_scroll.set_child(self.search_results_box)
-
-        # Search results group (single group for all results)
-        self.search_results_group = Adw.PreferencesGroup()
-        self.search_results_box.append(self.search_results_group)
-
-        # Track original parents of rows for restoration
-        self.reparented_rows = []
+        # Search results, rendered from the search index; the pages are left
+        # untouched. The list view is the scrolled window's direct child so
+        # only the visible results get a row widget.
+        self.search_results_view = SearchResultsView()
+        self.search_results_view.set_margin_top(12)
+        self.search_results_view.set_margin_bottom(12)
+        self.search_results_view.set_margin_start(20)
+        self.search_results_view.set_margin_end(20)
+        self.search_results_scroll.set_child(self.search_results_view)
+        self.search_results_empty = Gtk.Label(label=_("No results found"), visible=False, vexpand=True)
+        self.search_results_empty.add_css_class("dim-label")
 
         # ScrolledWindow with all pages stacked vertically
         self.content_scroll = Gtk.ScrolledWindow()
@@ -223,6 +337,7 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
         self.content_wrapper = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         self.content_wrapper.append(self.content_scroll)
         self.content_wrapper.append(self.search_results_scroll)
+        self.content_wrapper.append(self.search_results_empty)
         content_toolbar.set_content(self.content_wrapper)
 
         content_page = Adw.NavigationPage.new(content_toolbar, _("Settings"))
@@ -276,14 +391,16 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
 
         for page in self.pages_config:
             # Sidebar button
-            btn = self.create_sidebar_button(page["label"], page["icon"], page["id"])
+            with startup.phase("sidebar and icons"):
+                btn = self.create_sidebar_button(page["label"], page["icon"], page["id"])
             self.sidebar_box.append(btn)
             self.sidebar_buttons.append(btn)
 
-            # Page instance
-            page_instance = page["class"](self)
-            page["instance"] = page_instance
-            self.pages_box.append(page_instance)
+            # Pages are built on demand (see _ensure_page)
+            page["instance"] = None
+
+        # Pages built from here on, by the prefetch too, share one sync pass
+        self.check_engine.begin_pass()
 
         # Select and show first page
         if self.sidebar_buttons:
@@ -291,51 +408,90 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
             self.current_page_id = self.pages_config[0]["id"]
             self._show_single_page(self.current_page_id)
 
+        # Build the remaining pages in the background once the window is shown
+        self.connect("map", self._on_first_map)
+
+    def _ensure_page(self, page):
+        """Build a page the first time it is needed and return its instance."""
+        if page["instance"] is None:
+            with tracer.span(page["id"], "page"):
+                page_instance = page["class"](self)
+            page_instance.set_visible(False)
+            page["instance"] = page_instance
+            self.search_index.set_page_title(page_instance, page["label"], self.pages_config.index(page))
+            # Keep the pages in sidebar order, whatever order they are built in
+            previous = None
+            for other in self.pages_config:
+                if other is page:
+                    break
+                if other["instance"] is not None:
+                    previous = other["instance"]
+            self.pages_box.insert_child_after(page_instance, previous)
+        return page["instance"]
+
+    def _on_first_realize(self, window):
+        """Mark the first frame for --profile-startup."""
+        self.disconnect_by_func(self._on_first_realize)
+        if startup.enabled:
+            clock = self.get_frame_clock()
+            handler = []
+
+            def on_after_paint(clock):
+                clock.disconnect(handler[0])
+                startup.milestone("first frame")
+
+            handler.append(clock.connect("after-paint", on_after_paint))
+
+    def _on_first_map(self, window):
+        """Start prefetching the other pages after the first paint."""
+        self.disconnect_by_func(self._on_first_map)
+        GLib.idle_add(self._prefetch_next_page, priority=GLib.PRIORITY_LOW)
+
+    def _prefetch_next_page(self):
+        """Build one not yet built page per idle call, so the UI stays responsive."""
+        for page in self.pages_config:
+            if page["instance"] is None:
+                self._ensure_page(page)
+                return GLib.SOURCE_CONTINUE
+        # Every row is added now; index them in idle time before the first search
+        self.search_pipeline.build_index()
+        return GLib.SOURCE_REMOVE
+
     def _show_single_page(self, page_id):
         """Show only one page (normal mode)."""
-        # Restore any reparented rows first
-        self._restore_reparented_rows()
-
         # Hide search results, show pages
         self.search_results_scroll.set_visible(False)
+        self.search_results_empty.set_visible(False)
         self.content_scroll.set_visible(True)
 
         for page in self.pages_config:
-            instance = page["instance"]
             is_current = page["id"] == page_id
+            if is_current:
+                instance = self._ensure_page(page)
+            else:
+                instance = page["instance"]
+                if instance is None:
+                    continue
             instance.set_visible(is_current)
             if hasattr(instance, "set_search_mode"):
                 instance.set_search_mode(False)
             if is_current and hasattr(instance, "filter_rows"):
                 instance.filter_rows("")
 
-    def _show_search_results(self, search_text):
-        """Show search results in a single compact container."""
-        # Restore any previously reparented rows first
-        self._restore_reparented_rows()
+    def _ensure_all_pages(self):
+        """Build every page, so the search index has all rows."""
+        for page in self.pages_config:
+            self._ensure_page(page)
 
+    def _show_search_results(self, query, matches):
+        """Show search results in a single compact container."""
+        if not self.is_searching:
+            return
         # Hide pages, show search results
         self.content_scroll.set_visible(False)
-        self.search_results_scroll.set_visible(True)
-
-        # Collect matching rows from all pages
-        for page in self.pages_config:
-            instance = page.get("instance")
-            if instance and hasattr(instance, "get_matching_rows"):
-                matching_rows = instance.get_matching_rows(search_text)
-                for row, original_parent in matching_rows:
-                    # Store original parent for restoration
-                    self.reparented_rows.append((row, original_parent))
-                    # Reparent to search results
-                    original_parent.remove(row)
-                    self.search_results_group.add(row)
-
-    def _restore_reparented_rows(self):
-        """Restore rows to their original parents."""
-        for row, original_parent in self.reparented_rows:
-            self.search_results_group.remove(row)
-            original_parent.add(row)
-        self.reparented_rows = []
+        count = self.search_results_view.show_matches(matches)
+        self.search_results_scroll.set_visible(count > 0)
+        self.search_results_empty.set_visible(count == 0)
 
     def on_search_changed(self, entry):
         search_text = entry.get_text().lower().strip()
@@ -344,6 +500,7 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
         if len(search_text) < 2:
             # Exit search mode
             self.is_searching = False
+            self.search_pipeline.cancel()
             for btn in self.sidebar_buttons:
                 btn.set_sensitive(True)
             self._show_single_page(self.current_page_id or self.pages_config[0]["id"])
@@ -352,7 +509,101 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
             self.is_searching = True
             for btn in self.sidebar_buttons:
                 btn.set_sensitive(False)
-            self._show_search_results(search_text)
+            self.search_pipeline.submit(search_text)
+
+    def refresh_scripts(self, scripts):
+        """Re-check the given scripts on every page that has already been built."""
+        self.check_engine.begin_pass()
+        for page in self.pages_config:
+            instance = page["instance"]
+            if instance is not None:
+                instance.sync_all_switches(scripts)
+
+    def _on_job_update(self, job):
+        """Called on the main loop when a job starts, makes progress or ends."""
+        self.jobs_panel.update_job(job, self.jobs.jobs)
+        running = sum(1 for j in self.jobs.jobs if j.state in (j.QUEUED, j.RUNNING))
+        if running:
+            self.jobs_button.add_css_class("accent")
+            self.jobs_button.set_tooltip_text(
+                gettext.ngettext("{} operation running", "{} operations running", running).format(running)
+            )
+        else:
+            self.jobs_button.remove_css_class("accent")
+            self.jobs_button.set_tooltip_text(_("Operations"))
+
+    def on_staging_toggled(self, button):
+        self.staging.enabled = button.get_active()
+        if not self.staging.enabled and len(self.staging):
+            self.staging.discard()
+            self.show_toast(_("Pending changes discarded"))
+
+    def _on_staged_changed(self):
+        count = len(self.staging)
+        self.staging_banner.set_title(
+            gettext.ngettext("{} pending change", "{} pending changes", count).format(count)
+        )
+        self.staging_banner.set_revealed(count > 0)
+
+    def on_review_staged_changes(self, banner):
+        """Shows the pending changes and lets the user apply or discard them."""
+        dialog = Adw.MessageDialog(
+            transient_for=self,
+            heading=_("Pending changes"),
+            body=_("The following changes will be applied together:"),
+        )
+        changes_list = Gtk.ListBox(selection_mode=Gtk.SelectionMode.NONE)
+        changes_list.add_css_class("boxed-list")
+        for script_path, (page, switch, state) in self.staging.changes.items():
+            row = Adw.ActionRow(
+                title=getattr(switch, "_title", os.path.basename(script_path)),
+                subtitle=_("Enable") if state else _("Disable"),
+            )
+            changes_list.append(row)
+        dialog.set_extra_child(changes_list)
+        dialog.add_response("cancel", _("Cancel"))
+        dialog.add_response("discard", _("Discard"))
+        dialog.add_response("apply", _("Apply"))
+        dialog.set_response_appearance("discard", Adw.ResponseAppearance.DESTRUCTIVE)
+        dialog.set_response_appearance("apply", Adw.ResponseAppearance.SUGGESTED)
+        dialog.set_default_response("apply")
+        dialog.connect("response", self._on_review_response)
+        dialog.present()
+
+    def _on_review_response(self, dialog, response):
+        if response == "discard":
+            self.staging.discard()
+        elif response == "apply":
+            self.apply_staged_changes()
+
+    def apply_staged_changes(self):
+        """Applies every pending change: privileged work in one batch, the rest script by script."""
+        staged = self.staging.take()
+        if not staged:
+            return
+        changes = []
+        for script_path, page, switch, state in staged:
+            switch._toggle_running = True
+            switch._toggle_span = tracer.begin(script_path, "toggle", state=state, staged=True)
+            page._set_row_busy(switch, True, _("Applying..."))
+            changes.append((script_path, state, page.switch_actions.get(script_path)))
+        pages = {script_path: page for script_path, page, switch, state in staged}
+
+        def run_toggle(script_path, state):
+            return pages[script_path]._run_toggle(script_path, state)
+
+        self.check_engine.submit_toggle(
+            apply_changes,
+            (changes, run_toggle, self.privileged_helper, self.jobs),
+            lambda results: self._on_staged_changes_applied(staged, results),
+        )
+
+    def _on_staged_changes_applied(self, staged, results):
+        if not isinstance(results, dict):
+            # The apply itself failed; every change is reported as failed
+            results = {}
+        for script_path, page, switch, state in staged:
+            page._on_toggle_finished(switch, script_path, state, results.get(script_path, False))
 
     def show_toast(self, message):
         toast = Adw.Toast(title=message, timeout=3)
@@ -360,6 +611,9 @@ class BiglinuxSettingsWindow(Adw.ApplicationWindow):
 
 
 def main():
+    # --trace[=FILE] and --profile-startup[=FILE] are handled here; GTK does not see them
+    argv = tracing.setup(sys.argv[1:])
+    startup_profile.setup(argv, MODULE_STARTED)
     app = BiglinuxSettingsApp()
     return app.run()
 
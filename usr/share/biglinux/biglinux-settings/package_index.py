@@ -0,0 +1,93 @@
+import os
+import tempfile
+import threading
+from typing import Optional
+
+PACMAN_LOCAL_DB = "/var/lib/pacman/local"
+# Environment variable through which check scripts find the snapshot file
+# (see common/packages.sh).
+SNAPSHOT_ENV = "BIGLINUX_SETTINGS_PACKAGES"
+
+
+def _default_snapshot_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, "biglinux-settings", "packages")
+
+
+class PackageIndex:
+    """Index of installed packages, read directly from the pacman database.
+
+    The index is rebuilt only when the mtime of the local database changes,
+    so any number of package checks in a sync pass cost a single scan. It is
+    available in-process through is_installed() and to shell scripts through
+    a snapshot file exported in the environment returned by env()."""
+
+    def __init__(self, db_path: str = PACMAN_LOCAL_DB, snapshot_path: Optional[str] = None):
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path or _default_snapshot_path()
+        self._lock = threading.Lock()
+        self._db_mtime = None
+        self._packages = None
+        self._snapshot_ok = False
+
+    def refresh(self):
+        """Rebuild the index if the pacman database changed since the last scan."""
+        try:
+            mtime = os.stat(self.db_path).st_mtime_ns
+        except OSError:
+            # Not a pacman system: lookups fall back to "not available"
+            with self._lock:
+                self._db_mtime = None
+                self._packages = None
+            return
+        with self._lock:
+            if mtime == self._db_mtime:
+                return
+            packages = {}
+            try:
+                with os.scandir(self.db_path) as entries:
+                    for entry in entries:
+                        # Entries are named "<name>-<pkgver>-<pkgrel>"
+                        parts = entry.name.rsplit("-", 2)
+                        if len(parts) == 3 and entry.is_dir():
+                            packages[parts[0]] = f"{parts[1]}-{parts[2]}"
+            except OSError as e:
+                print(f"Error reading pacman database: {e}")
+                self._db_mtime = None
+                self._packages = None
+                return
+            self._packages = packages
+            self._db_mtime = mtime
+            self._write_snapshot(packages)
+
+    def _write_snapshot(self, packages):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), mode=0o700, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(sorted(packages)))
+                f.write("\n")
+            os.replace(tmp_path, self.snapshot_path)
+            self._snapshot_ok = True
+        except OSError as e:
+            print(f"Error writing package snapshot: {e}")
+            self._snapshot_ok = False
+
+    def is_installed(self, name):
+        """Return True/False, or None if the index is not available."""
+        packages = self._packages
+        if packages is None:
+            return None
+        return name in packages
+
+    def version(self, name):
+        packages = self._packages
+        if packages is None:
+            return None
+        return packages.get(name)
+
+    def env(self):
+        """Environment variables that let check scripts use the snapshot."""
+        if self._packages is None or not self._snapshot_ok:
+            return {}
+        return {SNAPSHOT_ENV: self.snapshot_path}
@@ -40,41 +40,16 @@ fi
 
 # 3. Executes the root tasks.
 updateGrubTask() {
+  # Edits /etc/default/grub and regenerates GRUB only if something changed
   if [[ "$function" == "enable" ]]; then
-    if grep -q "$parameter" "/etc/default/grub"; then
-      # Already enabled, nothing to do. Inform zenity and exit the function gracefully.
-      echo $"Already enabled. No changes made." > "$pipePath"
-      return
-    elif grep -q "GRUB_CMDLINE_LINUX_DEFAULT=" "/etc/default/grub"; then
-      # Add the parameter
-      sed -i.bak -E "/^GRUB_CMDLINE_LINUX_DEFAULT=/ s|(['\"])$| $parameter\1|" "/etc/default/grub"
-    elif grep -q "GRUB_CMDLINE_LINUX=" "/etc/default/grub"; then
-      # Add the parameter
-      sed -i.bak -E "/^GRUB_CMDLINE_LINUX=/ s|(['\"])$| $parameter\1|" "/etc/default/grub"
-    fi
+    python3 "${BASH_SOURCE%/*}/../grub_config.py" --add "$parameter" > "$pipePath"
+    exitCode=$?
     > /tmp/meltdownMitigations
   else
-    # remove the parameter
-    sed -i -E "s/$parameter//g" "/etc/default/grub"
-    rm /tmp/meltdownMitigations
+    python3 "${BASH_SOURCE%/*}/../grub_config.py" --remove "$parameter" > "$pipePath"
+    exitCode=$?
+    rm -f /tmp/meltdownMitigations
   fi
-
-  # Run update-grub only if changes were made
-  # some systems do not have update-grub and grub-mkconfig in the path, so check the file directly.
-  if [[ -e "/usr/bin/update-grub" ]];then
-    /usr/bin/update-grub > "$pipePath"
-  elif [[ -e "/usr/sbin/update-grub" ]];then
-    /usr/sbin/update-grub > "$pipePath"
-  elif [[ -e "/usr/bin/grub-mkconfig" ]];then
-    /usr/bin/grub-mkconfig > "$pipePath"
-  elif [[ -e "/usr/sbin/grub-mkconfig" ]];then
-    /usr/sbin/grub-mkconfig > "$pipePath"
-  elif [[ -e "/usr/bin/grub2-mkconfig" ]];then
-    /usr/bin/grub2-mkconfig > "$pipePath"
-  elif [[ -e "/usr/sbin/grub2-mkconfig" ]];then
-    /usr/sbin/grub2-mkconfig > "$pipePath"
-  fi
-  exitCode=$?
 }
 updateGrubTask
 
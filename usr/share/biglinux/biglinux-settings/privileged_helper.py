@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# Privileged helper of biglinux-settings.
+#
+# Started by D-Bus activation on the system bus (see
+# /usr/share/dbus-1/system-services/org.biglinux.Settings.Helper.service)
+# and runs as root until it has been idle for IDLE_TIMEOUT seconds. It only
+# executes whitelisted operations, each authorized through polkit with its
+# own action ID, and streams their output back to the caller as signals.
+# Polkit keeps an authorization for the session, so an operation is only
+# accepted if a row of settings.json declares it: a caller can't use the
+# helper to install any package, enable any unit or add any kernel parameter.
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+from gi.repository import Gio, GLib
+
+from grub_config import GrubConfig, GrubConfigError, mkconfig_command
+from helper_client import HELPER_BUS_NAME, HELPER_IFACE, HELPER_OBJECT_PATH
+import settings_registry
+from staging import declared_operations
+
+IDLE_TIMEOUT = 10 * 60
+
+POLKIT_BUS_NAME = "org.freedesktop.PolicyKit1"
+POLKIT_OBJECT_PATH = "/org/freedesktop/PolicyKit1/Authority"
+POLKIT_IFACE = "org.freedesktop.PolicyKit1.Authority"
+POLKIT_ALLOW_USER_INTERACTION = 1
+
+INTROSPECTION_XML = f"""
+<node>
+  <interface name="{HELPER_IFACE}">
+    <method name="Apply">
+      <arg type="as" name="operations" direction="in"/>
+      <arg type="u" name="job" direction="out"/>
+    </method>
+    <signal name="Output">
+      <arg type="u" name="job"/>
+      <arg type="s" name="line"/>
+    </signal>
+    <signal name="Result">
+      <arg type="u" name="job"/>
+      <arg type="s" name="operation"/>
+      <arg type="i" name="code"/>
+    </signal>
+    <signal name="Finished">
+      <arg type="u" name="job"/>
+    </signal>
+  </interface>
+</node>
+"""
+
+# Operation kind -> (polkit action ID, validation pattern of its value).
+# Operations use the same "kind:value" form as common/applyBatch.sh.
+# None of them may start with "-" (see parse_operation).
+_PARAM = r"[A-Za-z0-9=_.,:/+][A-Za-z0-9=_.,:/+-]*"
+_PARAMS = rf"{_PARAM}(?: {_PARAM})*"
+_PACKAGE = r"[a-z0-9@_+][a-z0-9@._+-]*"
+_UNIT = r"[A-Za-z0-9@_:][A-Za-z0-9@._:-]*"
+OPERATIONS = {
+    "install": ("org.biglinux.settings.packages", _PACKAGE),
+    "remove": ("org.biglinux.settings.packages", _PACKAGE),
+    "enable": ("org.biglinux.settings.services", _UNIT),
+    "disable": ("org.biglinux.settings.services", _UNIT),
+    "enable-now": ("org.biglinux.settings.services", _UNIT),
+    "disable-now": ("org.biglinux.settings.services", _UNIT),
+    "start": ("org.biglinux.settings.services", _UNIT),
+    "stop": ("org.biglinux.settings.services", _UNIT),
+    "flag-on": ("org.biglinux.settings.flags", r"/etc/big-preload/enable-[A-Za-z0-9._-]+"),
+    "flag-off": ("org.biglinux.settings.flags", r"/etc/big-preload/enable-[A-Za-z0-9._-]+"),
+    "grub-timeout": ("org.biglinux.settings.grub", r"[0-9]+"),
+    "grub-add": ("org.biglinux.settings.grub", _PARAMS),
+    "grub-remove": ("org.biglinux.settings.grub", _PARAMS),
+}
+STOP_KINDS = ("disable", "disable-now", "stop")
+START_KINDS = ("enable", "enable-now", "start")
+
+
+def parse_operation(operation, allowed):
+    """Split "kind:value" and validate it against its pattern and the
+    declared operations. Returns (kind, value) or None."""
+    if operation not in allowed:
+        return None
+    kind, _, value = operation.partition(":")
+    if kind not in OPERATIONS or not re.fullmatch(OPERATIONS[kind][1], value):
+        return None
+    # A value starting with "-" would be read as an option by pacman or systemctl
+    if any(word.startswith("-") for word in value.split()):
+        return None
+    return kind, value
+
+
+class Helper:
+    def __init__(self, loop, allowed):
+        self.loop = loop
+        self.allowed = allowed  # operations declared by the settings registry
+        self.connection = None
+        self._next_job = 1
+        self._running = 0
+        self._last_activity = time.monotonic()
+        # One job at a time: pacman and grub-mkconfig must not run concurrently
+        self._job_lock = threading.Lock()
+
+    # D-Bus
+
+    def on_bus_acquired(self, connection, name):
+        self.connection = connection
+        node = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION_XML)
+        connection.register_object(
+            HELPER_OBJECT_PATH, node.interfaces[0], self.on_method_call, None, None
+        )
+
+    def on_name_lost(self, connection, name):
+        print(f"Lost the bus name {name}", file=sys.stderr)
+        self.loop.quit()
+
+    def on_method_call(self, connection, sender, path, iface, method, params, invocation):
+        if method != "Apply":
+            invocation.return_dbus_error(f"{HELPER_IFACE}.Error", f"Unknown method {method}")
+            return
+        operations = params.unpack()[0]
+        parsed = [parse_operation(o, self.allowed) for o in operations]
+        if None in parsed:
+            invalid = operations[parsed.index(None)]
+            invocation.return_dbus_error(f"{HELPER_IFACE}.InvalidOperation", invalid)
+            return
+        job = self._next_job
+        self._next_job += 1
+        self._running += 1
+        invocation.return_value(GLib.Variant("(u)", (job,)))
+        threading.Thread(
+            target=self._run_job, args=(job, sender, parsed), daemon=True
+        ).start()
+
+    def _emit(self, signal, signature, values):
+        """Emit a signal from the main loop (jobs run in their own thread)."""
+        GLib.idle_add(self._emit_now, signal, GLib.Variant(signature, values))
+
+    def _emit_now(self, signal, values):
+        self.connection.emit_signal(None, HELPER_OBJECT_PATH, HELPER_IFACE, signal, values)
+        return False
+
+    # Jobs
+
+    def _authorize(self, sender, action_id):
+        subject = ("system-bus-name", {"name": GLib.Variant("s", sender)})
+        try:
+            reply = self.connection.call_sync(
+                POLKIT_BUS_NAME,
+                POLKIT_OBJECT_PATH,
+                POLKIT_IFACE,
+                "CheckAuthorization",
+                GLib.Variant(
+                    "((sa{sv})sa{ss}us)",
+                    (subject, action_id, {}, POLKIT_ALLOW_USER_INTERACTION, ""),
+                ),
+                GLib.VariantType.new("((bba{ss}))"),
+                Gio.DBusCallFlags.NONE,
+                GLib.MAXINT,  # The user may take a while to type the password
+                None,
+            )
+        except GLib.Error as e:
+            print(f"polkit check failed: {e.message}", file=sys.stderr)
+            return False
+        is_authorized, is_challenge, details = reply.unpack()[0]
+        return is_authorized
+
+    def _run_job(self, job, sender, operations):
+        try:
+            with self._job_lock:
+                authorized = {}
+                for kind, value in operations:
+                    action_id = OPERATIONS[kind][0]
+                    if action_id not in authorized:
+                        authorized[action_id] = self._authorize(sender, action_id)
+                allowed = [(k, v) for k, v in operations if authorized[OPERATIONS[k][0]]]
+                for kind, value in operations:
+                    if not authorized[OPERATIONS[kind][0]]:
+                        self._result(job, [(kind, value)], 126)
+                self._apply(job, allowed)
+        finally:
+            self._emit("Finished", "(u)", (job,))
+            GLib.idle_add(self._job_done)
+
+    def _job_done(self):
+        self._running -= 1
+        self._last_activity = time.monotonic()
+        return False
+
+    def _result(self, job, operations, code):
+        for kind, value in operations:
+            self._emit("Result", "(usi)", (job, f"{kind}:{value}", code))
+
+    def _command(self, job, command):
+        """Run a command, streaming its output lines. Returns the exit code."""
+        try:
+            process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace"
+            )
+        except OSError as e:
+            self._emit("Output", "(us)", (job, str(e)))
+            return 127
+        for line in process.stdout:
+            self._emit("Output", "(us)", (job, line.rstrip("\n")))
+        return process.wait()
+
+    def _apply(self, job, operations):
+        """Same order as common/applyBatch.sh: services are stopped before their
+        packages are removed and started after their packages are installed."""
+
+        def of_kind(*kinds):
+            return [(k, v) for k, v in operations if k in kinds]
+
+        for kind in STOP_KINDS:
+            self._systemd(job, kind, of_kind(kind))
+        removals = of_kind("remove")
+        if removals:
+            code = self._command(job, ["pacman", "-Rcs", "--noconfirm", "--"] + [v for k, v in removals])
+            self._result(job, removals, code)
+        installs = of_kind("install")
+        if installs:
+            code = self._command(job, ["pacman", "-Syu", "--noconfirm", "--"] + [v for k, v in installs])
+            self._result(job, installs, code)
+        for kind, value in of_kind("flag-on", "flag-off"):
+            try:
+                # Never follow a symlink planted in place of the flag or its directory
+                if os.path.islink(value) or os.path.islink(os.path.dirname(value)):
+                    raise OSError(f"Refusing to follow a symlink: {value}")
+                if kind == "flag-on":
+                    os.makedirs(os.path.dirname(value), exist_ok=True)
+                    os.close(os.open(value, os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW, 0o644))
+                elif os.path.exists(value):
+                    os.unlink(value)
+                code = 0
+            except OSError as e:
+                self._emit("Output", "(us)", (job, str(e)))
+                code = 1
+            self._result(job, [(kind, value)], code)
+        grub = of_kind("grub-timeout", "grub-add", "grub-remove")
+        if grub:
+            self._result(job, grub, self._grub(job, grub))
+        for kind in START_KINDS:
+            self._systemd(job, kind, of_kind(kind))
+
+    def _systemd(self, job, kind, operations):
+        if not operations:
+            return
+        units = [v for k, v in operations]
+        if kind in ("enable-now", "disable-now"):
+            command = ["systemctl", kind.split("-")[0], "--now", "--"] + units
+        else:
+            command = ["systemctl", kind, "--"] + units
+        self._result(job, operations, self._command(job, command))
+
+    def _grub(self, job, operations):
+        config = GrubConfig()
+        if not config.load():
+            self._emit("Output", "(us)", (job, f"Cannot read {config.path}"))
+            return 1
+        changed = False
+        try:
+            for kind, value in operations:
+                if kind == "grub-timeout":
+                    changed |= config.set_timeout(value)
+                elif kind == "grub-remove":
+                    changed |= config.remove_params(value)
+                else:
+                    changed |= config.add_params(value)
+        except GrubConfigError as e:
+            self._emit("Output", "(us)", (job, str(e)))
+            return 1
+        if not changed:
+            return 0
+        try:
+            config.save()
+        except OSError as e:
+            self._emit("Output", "(us)", (job, str(e)))
+            return 1
+        command = mkconfig_command()
+        if command is None:
+            self._emit("Output", "(us)", (job, "grub-mkconfig not found"))
+            return 1
+        return self._command(job, command)
+
+    def check_idle(self):
+        if self._running == 0 and time.monotonic() - self._last_activity > IDLE_TIMEOUT:
+            self.loop.quit()
+            return False
+        return True
+
+
+def main():
+    if os.geteuid() != 0:
+        print("The privileged helper must run as root.", file=sys.stderr)
+        return 1
+    allowed = declared_operations(settings_registry.registry().actions())
+    if not allowed:
+        print("No operation declared in the settings registry.", file=sys.stderr)
+    loop = GLib.MainLoop()
+    helper = Helper(loop, allowed)
+    Gio.bus_own_name(
+        Gio.BusType.SYSTEM,
+        HELPER_BUS_NAME,
+        Gio.BusNameOwnerFlags.NONE,
+        helper.on_bus_acquired,
+        None,
+        helper.on_name_lost,
+    )
+    GLib.timeout_add_seconds(60, helper.check_idle)
+    loop.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
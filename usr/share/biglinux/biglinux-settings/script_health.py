@@ -0,0 +1,127 @@
+import math
+import threading
+import time
+from collections import deque
+
+from gi.repository import GLib
+
+# Consecutive failed runs (timeouts, errors) before a script is quarantined
+FAILURE_THRESHOLD = 3
+# Retry delays of a quarantined script, in seconds (doubled after each failed retry)
+RETRY_MIN_DELAY = 30
+RETRY_MAX_DELAY = 15 * 60
+LATENCY_HISTORY = 20
+
+
+class _Record:
+    __slots__ = (
+        "latencies", "failures", "timeouts", "last_result", "retry_at", "retry_delay", "retry_source",
+    )
+
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        self.failures = 0
+        self.timeouts = 0
+        self.last_result = None
+        self.retry_at = None  # Set while the script is quarantined
+        self.retry_delay = RETRY_MIN_DELAY
+        self.retry_source = None  # GLib source id of the pending retry
+
+
+class ScriptHealth:
+    """Health of the check scripts: latency history and consecutive failures.
+
+    A script that fails FAILURE_THRESHOLD times in a row (typically a
+    timeout, e.g. qdbus6 with no KWin) is quarantined: its checks are
+    answered from the last good result without running it, and it is retried
+    in the background with exponential backoff. on_retry(script_path) is
+    called from a GLib timeout when a retry is due; a script has at most one
+    retry pending."""
+
+    def __init__(self, on_retry=None):
+        self.on_retry = on_retry
+        self._lock = threading.Lock()
+        self._records = {}
+
+    def _record(self, script_path):
+        record = self._records.get(script_path)
+        if record is None:
+            record = self._records[script_path] = _Record()
+        return record
+
+    def record_success(self, script_path, latency, result):
+        with self._lock:
+            record = self._record(script_path)
+            record.latencies.append(latency)
+            record.failures = 0
+            record.timeouts = 0
+            record.last_result = result
+            if record.retry_at is not None:
+                print(f"Script {script_path} is responding again")
+            record.retry_at = None
+            record.retry_delay = RETRY_MIN_DELAY
+            if record.retry_source is not None:
+                GLib.source_remove(record.retry_source)
+                record.retry_source = None
+
+    def record_failure(self, script_path, latency, timed_out=False):
+        with self._lock:
+            record = self._record(script_path)
+            record.latencies.append(latency)
+            record.failures += 1
+            if timed_out:
+                record.timeouts += 1
+            if record.failures < FAILURE_THRESHOLD:
+                return
+            if record.retry_at is None:
+                print(f"Script {script_path} quarantined after {record.failures} failures")
+            else:
+                record.retry_delay = min(record.retry_delay * 2, RETRY_MAX_DELAY)
+            record.retry_at = time.monotonic() + record.retry_delay
+            if self.on_retry is not None and record.retry_source is None:
+                record.retry_source = GLib.timeout_add_seconds(record.retry_delay, self._retry, script_path)
+
+    def _retry(self, script_path):
+        with self._lock:
+            record = self._records[script_path]
+            record.retry_source = None
+            if record.retry_at is None:
+                return False
+            # A failure since scheduling pushed the retry further back
+            remaining = record.retry_at - time.monotonic()
+            if remaining > 1:
+                record.retry_source = GLib.timeout_add_seconds(math.ceil(remaining), self._retry, script_path)
+                return False
+            # Whole second timeouts can fire a little early; the retry is due now
+            record.retry_at = time.monotonic()
+        self.on_retry(script_path)
+        return False
+
+    def is_quarantined(self, script_path):
+        with self._lock:
+            record = self._records.get(script_path)
+            return record is not None and record.retry_at is not None
+
+    def should_skip(self, script_path):
+        """True if the script is quarantined and its next retry is not due yet."""
+        with self._lock:
+            record = self._records.get(script_path)
+            return (
+                record is not None
+                and record.retry_at is not None
+                and time.monotonic() < record.retry_at
+            )
+
+    def last_result(self, script_path):
+        with self._lock:
+            record = self._records.get(script_path)
+            return record.last_result if record else None
+
+    def stats(self, script_path):
+        """Return (median latency, consecutive failures, consecutive timeouts)."""
+        with self._lock:
+            record = self._records.get(script_path)
+            if record is None or not record.latencies:
+                return (None, 0, 0)
+            latencies = sorted(record.latencies)
+            return (latencies[len(latencies) // 2], record.failures, record.timeouts)
@@ -0,0 +1,218 @@
+import itertools
+import os
+import re
+import select
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from tracing import tracer
+
+WORKER_SCRIPT = "common/worker.sh"
+# A worker is replaced after this many requests, so leaks in sourced
+# scripts (exported variables, stray background jobs) don't pile up.
+MAX_REQUESTS_PER_WORKER = 200
+
+OUTPUT_END = b"\x1e"
+STDERR_PREFIX = "\x1f"
+# Ends each field of a request; unlike a tab, consecutive ones keep empty fields
+FIELD_END = "\x1f"
+
+BASH_SHEBANG_RE = re.compile(rb"#!\s*(?:/usr)?/bin/(?:env\s+)?bash\b")
+# Scripts using these behave differently when sourced by a worker ($0 is the
+# worker, $$ and $PPID its pids), so they are executed instead
+SOURCE_UNSAFE_RE = re.compile(rb"\$(?:\{?0\b|\$|\{?PPID\b)")
+
+
+class _Worker:
+    """One bash process running common/worker.sh."""
+
+    def __init__(self, env):
+        self.env = env
+        self.requests = 0
+        fd, self.stderr_path = tempfile.mkstemp(prefix="biglinux-settings-worker-")
+        os.close(fd)
+        self.process = subprocess.Popen(
+            ["bash", WORKER_SCRIPT, self.stderr_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            # Own process group, so a hung script can be killed with everything it started
+            start_new_session=True,
+        )
+        self._buffer = b""
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, request_id, script_path, args, timeout):
+        fields = [str(request_id), script_path, *args]
+        self.requests += 1
+        self.process.stdin.write(("".join(field + FIELD_END for field in fields) + "\n").encode())
+        self.process.stdin.flush()
+
+        marker = OUTPUT_END + f"{request_id} ".encode()
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while marker not in self._buffer or not self._buffer.endswith(b"\n"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.kill()
+                raise subprocess.TimeoutExpired([script_path, *args], timeout)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise OSError(f"worker exited while running {script_path}")
+                self._buffer += chunk
+
+        output, _, tail = self._buffer.partition(marker)
+        status_line, _, self._buffer = tail.partition(b"\n")
+        stdout, stderr = [], []
+        for line in output.decode(errors="replace").splitlines(keepends=True):
+            if line.startswith(STDERR_PREFIX):
+                stderr.append(line[1:])
+            else:
+                stdout.append(line)
+        return subprocess.CompletedProcess(
+            [script_path, *args], int(status_line), "".join(stdout), "".join(stderr)
+        )
+
+    def kill(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        self._remove_stderr_file()
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+        self._remove_stderr_file()
+
+    def _remove_stderr_file(self):
+        try:
+            os.unlink(self.stderr_path)
+        except FileNotFoundError:
+            pass
+
+
+def _span_name(script_path, args):
+    return " ".join([script_path, *args[:1]])
+
+
+def _trace_result(span, result):
+    span.set(
+        exit_code=result.returncode,
+        output_bytes=len(result.stdout or "") + len(result.stderr or ""),
+    )
+
+
+class ScriptWorkers:
+    """Pool of long-lived bash workers that run the scripts' "check" action.
+
+    Each request forks a subshell of a warm worker instead of exec'ing a new
+    bash. A request that times out kills its worker (and whatever the script
+    started); the next request gets a fresh one. With size 0 every script is
+    run as its own process, as before; so are scripts that can't be sourced
+    (see can_source)."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = []
+        self._count = 0
+        self._available = threading.Condition(self._lock)
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._sourceable = {}  # script path -> (mtime, can be sourced)
+
+    def can_source(self, script_path):
+        """True if script_path is a bash script that behaves the same when
+        sourced by a worker as when executed."""
+        try:
+            mtime = os.stat(script_path).st_mtime_ns
+        except OSError:
+            return False
+        cached = self._sourceable.get(script_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(script_path, "rb") as f:
+                content = f.read()
+        except OSError:
+            return False
+        sourceable = bool(BASH_SHEBANG_RE.match(content)) and not SOURCE_UNSAFE_RE.search(content)
+        if not sourceable:
+            print(f"Script {script_path} is not run by a worker: it is not bash or uses $0, $$ or $PPID")
+        self._sourceable[script_path] = (mtime, sourceable)
+        return sourceable
+
+    def run(self, script_path, args, timeout, env=None):
+        """Run script_path with args; returns a subprocess.CompletedProcess
+        (text output) and raises subprocess.TimeoutExpired like subprocess.run."""
+        env = dict(os.environ if env is None else env)
+        if self.size <= 0 or not self.can_source(script_path):
+            with tracer.span(_span_name(script_path, args), "script") as span:
+                result = subprocess.run(
+                    [script_path, *args], capture_output=True, text=True, timeout=timeout, env=env
+                )
+                _trace_result(span, result)
+            return result
+        if any(FIELD_END in a or "\n" in a for a in [script_path, *args]):
+            raise ValueError("script arguments cannot contain \\x1f or newlines")
+        worker = self._acquire(env)
+        try:
+            with tracer.span(
+                _span_name(script_path, args), "script", worker=worker.process.pid
+            ) as span:
+                result = worker.run(next(self._ids), script_path, args, timeout)
+                _trace_result(span, result)
+        except BaseException:
+            worker.kill()
+            self._release(None)
+            raise
+        self._release(worker)
+        return result
+
+    def _acquire(self, env):
+        with self._available:
+            while not self._idle and self._count >= self.size:
+                self._available.wait()
+            worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                self._count += 1
+        if worker is not None:
+            if worker.alive() and worker.env == env and worker.requests < MAX_REQUESTS_PER_WORKER:
+                return worker
+            worker.close()
+        try:
+            return _Worker(env)
+        except OSError:
+            self._release(None)
+            raise
+
+    def _release(self, worker):
+        with self._available:
+            if worker is None or self._closed:
+                self._count -= 1
+                if worker is not None:
+                    worker.close()
+            else:
+                self._idle.append(worker)
+            self._available.notify()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for worker in idle:
+            worker.close()
@@ -0,0 +1,401 @@
+import gettext
+import html
+import os
+import re
+import time
+import unicodedata
+
+from tracing import tracer
+
+MARKUP_TAG_RE = re.compile(r"<[^>]*>")
+WORD_RE = re.compile(r"\w+")
+# Parts of a camelCase or dashed script name: "disableBalooIndexer" -> disable, Baloo, Indexer
+NAME_PART_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+# How much a match in each kind of text counts
+WEIGHT_TITLE = 1.0
+WEIGHT_NAME = 0.9  # script name and keywords (see settings_registry)
+WEIGHT_ENGLISH = 0.85  # the English text (msgid) of a translated title
+WEIGHT_OTHER_LANGUAGE = 0.6  # the title in the other installed languages
+WEIGHT_SUBTITLE = 0.5
+WEIGHT_SUBTITLE_OTHER = 0.3  # the subtitle in English and the other languages
+WEIGHT_LOCATION = 0.3  # group and page titles
+# How well a word matches a token
+QUALITY_EXACT = 1.0
+QUALITY_PREFIX = 0.8
+QUALITY_SUBSTRING = 0.5
+QUALITY_FUZZY = 0.4  # times the trigram similarity
+# Words without substring matches are looked up as typos from this length,
+# keeping tokens at least this similar (shared / all distinct trigrams)
+FUZZY_MIN_LENGTH = 4
+FUZZY_THRESHOLD = 0.25
+# Bonus when the whole query appears as is in the row's own text
+PHRASE_BONUS = 0.5
+# build_step() indexes for about this long, so it can run on the main loop
+BUILD_SLICE_SECONDS = 0.004
+
+
+def strip_markup(markup):
+    """Plain text of a Pango markup string."""
+    if not markup:
+        return ""
+    return html.unescape(MARKUP_TAG_RE.sub("", markup))
+
+
+def normalize(text):
+    """Lowercase text without accents, so "configuracao" finds "configuração"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def words(text):
+    return WORD_RE.findall(normalize(text))
+
+
+def padded_trigrams(token):
+    """Trigrams used for the typo tolerant lookup; the padding makes the
+    start and the end of a word count."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def current_catalog(domain, localedir):
+    """The translation catalog of the current language as a msgid -> msgstr dict."""
+    return _catalog(gettext.translation(domain, localedir, fallback=True))
+
+
+def installed_catalogs(domain, localedir):
+    """Paths of the catalogs of domain of every installed language."""
+    try:
+        languages = sorted(os.listdir(localedir))
+    except OSError:
+        return []
+    paths = (os.path.join(localedir, language, "LC_MESSAGES", f"{domain}.mo") for language in languages)
+    return [path for path in paths if os.path.isfile(path)]
+
+
+def read_catalog(path):
+    """A .mo catalog as a msgid -> msgstr dict, or None if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            return _catalog(gettext.GNUTranslations(f))
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error reading {path}: {e}")
+        return None
+
+
+def _catalog(translations):
+    catalog = getattr(translations, "_catalog", None) or {}
+    # Plural forms are keyed by (msgid, n); the "" entry is the header
+    return {k: v for k, v in catalog.items() if isinstance(k, str) and k}
+
+
+class SearchEntry:
+    """One searchable row: its widgets and its precomputed, lowercased text."""
+
+    __slots__ = (
+        "row", "group", "page", "switch", "title", "subtitle", "subtitle_markup", "script",
+        "icon", "group_title", "keywords", "page_title", "text", "position",
+    )
+
+    def __init__(self, row, group, page, switch, title, subtitle_markup, script, icon, group_title, keywords=()):
+        self.row = row
+        self.group = group
+        self.page = page
+        self.switch = switch
+        self.title = title
+        self.subtitle_markup = subtitle_markup
+        self.subtitle = strip_markup(subtitle_markup)
+        self.script = script
+        self.icon = icon
+        self.group_title = group_title
+        self.keywords = tuple(keywords)
+        self.page_title = ""
+        self.text = ""
+        self.position = None  # in SearchIndex.entries
+
+    @property
+    def script_name(self):
+        return os.path.splitext(os.path.basename(self.script))[0]
+
+    def build_text(self, page_title):
+        self.page_title = page_title
+        self.text = normalize(" ".join(
+            (self.title, self.subtitle, self.script_name, self.group_title, page_title)
+        ))
+
+
+class SearchIndex:
+    """Search text of every settings row, built when the rows are created.
+
+    Looking a query up only reads this index; no widget is walked. Pages add
+    their rows as they are built, in display order.
+
+    Rows are found by the words of their labels in the current language, in
+    English and, once load_languages() was called, in every installed
+    language, by their script name and by their keywords. Every word of a
+    query has to match a word of the row, exactly, as a prefix, inside it or,
+    failing that, as a likely typo; results are ranked by how well and where
+    they match. Rows are indexed by build_step(), a time slice at a time, or
+    all at once by a search finding rows not indexed yet."""
+
+    def __init__(self, domain=None, localedir=None):
+        self.entries = []
+        # Changes whenever the indexed text changes, so cached results can be dropped
+        self.version = 0
+        self._page_titles = {}  # page -> sidebar title
+        self._page_order = {}  # page -> sidebar position
+        self._domain = domain
+        self._localedir = localedir
+        self._current = None  # (catalog, msgstr -> msgid) of the current language, loaded on first use
+        self._others = []  # catalogs of the installed languages loaded so far
+        self._language_queue = None  # catalog paths still to load, None until load_languages()
+        self._pending = {}  # entry positions to (re)index, in order
+        self._unindexed = 0  # pending entries never indexed, missing from searches
+        self._entry_tokens = []  # entry position -> ids of the tokens it is indexed under
+        self._tokens = []  # token id -> token
+        self._token_ids = {}  # token -> token id
+        self._postings = []  # token id -> {entry position: best weight}
+        self._trigram_counts = []  # token id -> number of padded trigrams
+        self._grams = {}  # 1 to 3 character substrings and padded trigrams -> token ids
+
+    @property
+    def ready(self):
+        """Whether every row can be found (translations may still be loading)."""
+        return not self._unindexed
+
+    @property
+    def building(self):
+        return bool(self._pending or self._language_queue)
+
+    def add(self, row, group, page, switch, title, subtitle_markup, script_path, icon, group_title="", keywords=()):
+        entry = SearchEntry(
+            row, group, page, switch, title or "", subtitle_markup or "",
+            script_path, icon, group_title or "", keywords,
+        )
+        entry.build_text(self._page_titles.get(page, ""))
+        entry.position = len(self.entries)
+        self._pending[entry.position] = None
+        self._unindexed += 1
+        self.entries.append(entry)
+        self._entry_tokens.append(None)
+        self.version += 1
+        return entry
+
+    def set_page_title(self, page, title, position=0):
+        """Make the rows of page also match its sidebar title. Rows of pages
+        with a lower sidebar position come first among equal matches."""
+        self._page_titles[page] = title
+        self._page_order[page] = position
+        for pos, entry in enumerate(self.entries):
+            if entry.page is page:
+                entry.build_text(title)
+                self._pending[pos] = None
+        self.version += 1
+
+    def load_languages(self):
+        """Also find rows by their labels in the other installed languages.
+        Their catalogs are only read by the next build steps, so startup
+        doesn't pay for them unless the user searches."""
+        if self._language_queue is None:
+            if self._domain and self._localedir:
+                self._language_queue = installed_catalogs(self._domain, self._localedir)
+            else:
+                self._language_queue = []
+
+    def search(self, query, page=None, within=None):
+        """Entries matching every word of query, best matches first.
+
+        within can be the results of an earlier search, at the same version,
+        for a query this one extends: every row matching the longer query is
+        among them, so only they are scored. That doesn't hold for a word
+        looked up as a typo, which then makes every row be scored."""
+        query_words = list(dict.fromkeys(words(query)))
+        if not query_words:
+            return []
+        if self._unindexed:
+            self.build()
+        word_tokens = [self._substring_tokens(word) for word in query_words]
+        candidates = None
+        if within is not None and all(word_tokens):
+            candidates = {entry.position for entry in within}
+        scores = None
+        for word, token_ids in zip(query_words, word_tokens):
+            word_scores = self._match_word(word, token_ids, candidates)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pos: score + word_scores[pos] for pos, score in scores.items() if pos in word_scores}
+            if not scores:
+                return []
+
+        phrase = normalize(query.strip())
+        entries = self.entries
+        results = []
+        for pos, score in scores.items():
+            entry = entries[pos]
+            if page is not None and entry.page is not page:
+                continue
+            if phrase in entry.text:
+                score += PHRASE_BONUS
+            results.append((-score, self._page_order.get(entry.page, 0), pos))
+        results.sort()
+        return [entries[pos] for _score, _order, pos in results]
+
+    def page_entries(self, page):
+        return [entry for entry in self.entries if entry.page is page]
+
+    def _match_word(self, word, token_ids, candidates=None):
+        """{entry position: score} of the entries, among candidates if given,
+        having a token matching word; token_ids are those containing word."""
+        scores = {}
+        if token_ids:
+            matches = []
+            for token_id in token_ids:
+                token = self._tokens[token_id]
+                if token == word:
+                    matches.append((token_id, QUALITY_EXACT))
+                elif token.startswith(word):
+                    matches.append((token_id, QUALITY_PREFIX))
+                else:
+                    matches.append((token_id, QUALITY_SUBSTRING))
+        elif len(word) >= FUZZY_MIN_LENGTH:
+            matches = self._similar_tokens(word)
+        else:
+            return scores
+        for token_id, quality in matches:
+            for pos, weight in self._postings[token_id].items():
+                if candidates is not None and pos not in candidates:
+                    continue
+                score = quality * weight
+                if score > scores.get(pos, 0.0):
+                    scores[pos] = score
+        return scores
+
+    def _substring_tokens(self, word):
+        """Ids of the tokens containing word."""
+        if len(word) <= 3:
+            return self._grams.get(word, ())
+        trigrams = sorted(
+            (self._grams.get(word[i:i + 3], ()) for i in range(len(word) - 2)), key=len
+        )
+        if not trigrams[0]:
+            return ()
+        candidates = trigrams[0].intersection(*trigrams[1:])
+        return [token_id for token_id in candidates if word in self._tokens[token_id]]
+
+    def _similar_tokens(self, word):
+        """(token id, quality) of the tokens close to word, for typos."""
+        trigrams = padded_trigrams(word)
+        shared = {}
+        for trigram in trigrams:
+            for token_id in self._grams.get(trigram, ()):
+                shared[token_id] = shared.get(token_id, 0) + 1
+        matches = []
+        for token_id, count in shared.items():
+            similarity = count / (len(trigrams) + self._trigram_counts[token_id] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                matches.append((token_id, QUALITY_FUZZY * similarity))
+        return matches
+
+    def _translations(self, text):
+        """The English text of a translated string and its other translations."""
+        if not text:
+            return "", []
+        if self._current is None:
+            current = current_catalog(self._domain, self._localedir) if self._domain and self._localedir else {}
+            self._current = (current, {v: k for k, v in current.items()})
+        msgid = self._current[1].get(text, text)
+        return msgid, [catalog[msgid] for catalog in self._others if msgid in catalog]
+
+    def _entry_texts(self, entry):
+        """(text, weight) of everything entry is found by."""
+        texts = [
+            (entry.title, WEIGHT_TITLE),
+            (entry.subtitle, WEIGHT_SUBTITLE),
+            (entry.group_title, WEIGHT_LOCATION),
+            (entry.page_title, WEIGHT_LOCATION),
+        ]
+        script_name = entry.script_name
+        texts.append((" ".join(NAME_PART_RE.findall(script_name) + [script_name]), WEIGHT_NAME))
+        texts.extend((keyword, WEIGHT_NAME) for keyword in entry.keywords)
+
+        msgid, translations = self._translations(entry.title)
+        texts.append((msgid, WEIGHT_ENGLISH))
+        texts.extend((text, WEIGHT_OTHER_LANGUAGE) for text in translations)
+        # Subtitles are translated with their markup
+        msgid, translations = self._translations(entry.subtitle_markup)
+        texts.extend(
+            (strip_markup(text), WEIGHT_SUBTITLE_OTHER) for text in [msgid] + translations if text
+        )
+        return texts
+
+    def build(self):
+        """Index everything still pending at once."""
+        self.build_step(float("inf"))
+
+    def build_step(self, seconds=BUILD_SLICE_SECONDS):
+        """Index pending rows, then load the queued catalogs, for about
+        seconds. Returns True while work remains, so it can be a GLib idle
+        callback."""
+        if not self.building:
+            return False
+        deadline = time.perf_counter() + seconds
+        with tracer.span("search index", "search", pending=len(self._pending)) as span:
+            indexed = loaded = 0
+            while self.building:
+                if self._pending:
+                    pos = next(iter(self._pending))
+                    del self._pending[pos]
+                    self._index_entry(pos)
+                    indexed += 1
+                else:
+                    catalog = read_catalog(self._language_queue.pop(0))
+                    if catalog:
+                        self._others.append(catalog)
+                    loaded += 1
+                    if not self._language_queue:
+                        # Every row gets the new translations
+                        self._pending.update(dict.fromkeys(range(len(self.entries))))
+                if time.perf_counter() >= deadline:
+                    break
+            span.set(indexed=indexed, catalogs=loaded, tokens=len(self._tokens))
+        self.version += 1
+        return self.building
+
+    def _index_entry(self, pos):
+        """(Re)index the entry at pos under the tokens of its texts."""
+        old_token_ids = self._entry_tokens[pos]
+        if old_token_ids is None:
+            self._unindexed -= 1
+        else:
+            for token_id in old_token_ids:
+                del self._postings[token_id][pos]
+
+        weights = {}
+        for text, weight in self._entry_texts(self.entries[pos]):
+            for token in words(text):
+                token_id = self._token_ids.get(token)
+                if token_id is None:
+                    token_id = self._add_token(token)
+                if weight > weights.get(token_id, 0.0):
+                    weights[token_id] = weight
+        for token_id, weight in weights.items():
+            self._postings[token_id][pos] = weight
+        self._entry_tokens[pos] = list(weights)
+
+    def _add_token(self, token):
+        token_id = self._token_ids[token] = len(self._tokens)
+        self._tokens.append(token)
+        self._postings.append({})
+        token_grams = padded_trigrams(token)
+        self._trigram_counts.append(len(token_grams))
+        for size in (1, 2, 3):
+            token_grams.update(token[i:i + size] for i in range(len(token) - size + 1))
+        for gram in token_grams:
+            ids = self._grams.get(gram)
+            if ids is None:
+                self._grams[gram] = {token_id}
+            else:
+                ids.add(token_id)
+        return token_id
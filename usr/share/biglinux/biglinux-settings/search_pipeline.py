@@ -0,0 +1,103 @@
+import time
+
+from gi.repository import GLib
+from tracing import tracer
+
+# Keystrokes closer than this are searched once, with the last query
+DEBOUNCE_MS = 80
+
+
+class SearchPipeline:
+    """Runs search queries against the search index, off the keystroke path.
+
+    submit() debounces bursts of keystrokes, and a query still waiting is
+    dropped by a newer one or by cancel(). When a query extends the previous
+    one (same index version), only the previous results are searched again.
+    prepare() is called before a search, to add the rows of pages not built
+    yet. The index is built in idle time slices (build_index()); a query
+    arriving before every row is indexed waits for it, and the results shown
+    are searched again once the other languages are indexed.
+    on_results(query, matches) shows the ranked entries (see search_index).
+    Each query is traced as a "search" span with its latency."""
+
+    def __init__(self, index, on_results, prepare=None, delay_ms=DEBOUNCE_MS):
+        self.index = index
+        self.on_results = on_results
+        self.prepare = prepare
+        self.delay_ms = delay_ms
+        self._timer = None
+        self._build = None
+        self._waiting = None  # (query, span, started) of a query waiting for the index
+        self._partial = None  # query of results searched while the index was still building
+        # Last search: (index version, query, matches)
+        self._last = None
+        self._first_keystroke = None
+
+    def submit(self, query):
+        """Search for query after the debounce delay."""
+        if self._first_keystroke is None:
+            self._first_keystroke = time.perf_counter()
+        if self._timer is not None:
+            GLib.source_remove(self._timer)
+        self._timer = GLib.timeout_add(self.delay_ms, self._run, query)
+
+    def cancel(self):
+        """Drop the pending search (e.g. search mode was left)."""
+        self._first_keystroke = None
+        self._partial = None
+        self._drop_waiting()
+        if self._timer is not None:
+            GLib.source_remove(self._timer)
+            self._timer = None
+
+    def build_index(self):
+        """Index the pending rows in idle time slices."""
+        if self._build is None and self.index.building:
+            self._build = GLib.idle_add(self._build_step, priority=GLib.PRIORITY_LOW)
+
+    def _build_step(self):
+        building = self.index.build_step()
+        if self._waiting is not None and self.index.ready:
+            query, span, started = self._waiting
+            self._waiting = None
+            self._search(query, span, started)
+        if building:
+            return GLib.SOURCE_CONTINUE
+        self._build = None
+        if self._partial is not None:
+            # Also show the rows found in the languages loaded meanwhile
+            self._search(self._partial, tracer.begin("search", "search", query=self._partial, refresh=True))
+        return GLib.SOURCE_REMOVE
+
+    def _drop_waiting(self):
+        if self._waiting is not None:
+            self._waiting[1].end(cancelled=True)
+            self._waiting = None
+
+    def _run(self, query):
+        self._timer = None
+        started = time.perf_counter()
+        waited = started - (self._first_keystroke or started)
+        self._first_keystroke = None
+        self._drop_waiting()
+        span = tracer.begin("search", "search", query=query, debounce_ms=round(waited * 1000, 1))
+        if self.prepare is not None:
+            self.prepare()
+        self.index.load_languages()
+        if self.index.ready:
+            self._search(query, span, started)
+        else:
+            self._waiting = (query, span, started)
+        self.build_index()
+        return GLib.SOURCE_REMOVE
+
+    def _search(self, query, span, started=None):
+        if started is None:
+            started = time.perf_counter()
+        last = self._last
+        narrowed = last is not None and last[0] == self.index.version and query.startswith(last[1])
+        matches = self.index.search(query, within=last[2] if narrowed else None)
+        self._last = (self.index.version, query, matches)
+        self._partial = query if self.index.building else None
+        span.end(narrowed=narrowed, results=len(matches), latency_ms=round((time.perf_counter() - started) * 1000, 3))
+        self.on_results(query, matches)
@@ -0,0 +1,131 @@
+import gi
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+import os
+
+from gi.repository import Gio, GObject, Gtk
+
+ICONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons")
+# Properties of a row's real widgets mirrored by its search result
+SWITCH_PROPERTIES = ("active", "state", "sensitive")
+
+
+class SearchResultItem(GObject.Object):
+    """List model item wrapping a search_index.SearchEntry."""
+
+    __gtype_name__ = "BiglinuxSearchResultItem"
+
+    def __init__(self, entry):
+        super().__init__()
+        self.entry = entry
+
+
+class SearchResultsView(Gtk.ListView):
+    """Search results rendered from a model instead of moving the real rows.
+
+    The rows found by the search are the items of a Gio.ListStore, in
+    ranked order, and only the visible ones get a (recycled) result row. A
+    result row proxies its real row: the switch mirrors the real switch and
+    toggling it toggles the real one."""
+
+    def __init__(self):
+        self.store = Gio.ListStore(item_type=SearchResultItem)
+        self._items = {}  # entry -> SearchResultItem, reused across searches
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", self._on_bind)
+        factory.connect("unbind", self._on_unbind)
+        super().__init__(model=Gtk.NoSelection(model=self.store), factory=factory)
+        self.add_css_class("boxed-list")
+
+    def show_matches(self, matches):
+        """Show the given entries, in their ranked order (see search_index).
+        Returns the number of results."""
+        items = []
+        for entry in matches:
+            # Skip rows hidden due to lack of support
+            if getattr(entry.row, "_hidden_no_support", False):
+                continue
+            item = self._items.get(entry)
+            if item is None:
+                item = self._items[entry] = SearchResultItem(entry)
+            items.append(item)
+        self.store.splice(0, self.store.get_n_items(), items)
+        return len(items)
+
+    def _on_setup(self, factory, list_item):
+        box = Gtk.Box(
+            orientation=Gtk.Orientation.HORIZONTAL,
+            spacing=12,
+            margin_top=6,
+            margin_bottom=6,
+            margin_start=12,
+            margin_end=12,
+        )
+        icon = Gtk.Image(pixel_size=24)
+        icon.add_css_class("symbolic-icon")
+        box.append(icon)
+
+        title_area = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, hexpand=True, valign=Gtk.Align.CENTER)
+        title = Gtk.Label(xalign=0)
+        title.add_css_class("title-4")
+        title_area.append(title)
+        subtitle = Gtk.Label(xalign=0, wrap=True)
+        subtitle.add_css_class("caption")
+        subtitle.add_css_class("dim-label")
+        title_area.append(subtitle)
+        location = Gtk.Label(xalign=0)
+        location.add_css_class("caption")
+        location.add_css_class("dim-label")
+        title_area.append(location)
+        box.append(title_area)
+
+        spinner = Gtk.Spinner(valign=Gtk.Align.CENTER, visible=False, spinning=True)
+        box.append(spinner)
+        switch = Gtk.Switch(valign=Gtk.Align.CENTER)
+        switch.connect("state-set", self._on_proxy_state_set, list_item)
+        box.append(switch)
+
+        list_item.set_child(box)
+        list_item.set_activatable(False)
+        list_item._widgets = (icon, title, subtitle, location, spinner, switch)
+        list_item._bindings = []
+
+    def _on_bind(self, factory, list_item):
+        entry = list_item.get_item().entry
+        icon, title, subtitle, location, spinner, switch = list_item._widgets
+        icon.set_from_gicon(
+            Gio.FileIcon.new(Gio.File.new_for_path(os.path.join(ICONS_DIR, f"{entry.icon}.svg")))
+        )
+        title.set_label(entry.title)
+        subtitle.set_label(entry.subtitle)
+        subtitle.set_visible(bool(entry.subtitle))
+        location.set_label(" › ".join(t for t in (entry.page_title, entry.group_title) if t))
+
+        # Mirror the real switch; the proxy's own state-set is blocked meanwhile
+        switch.handler_block_by_func(self._on_proxy_state_set)
+        bindings = [
+            entry.switch.bind_property(name, switch, name, GObject.BindingFlags.SYNC_CREATE)
+            for name in SWITCH_PROPERTIES
+        ]
+        switch.handler_unblock_by_func(self._on_proxy_state_set)
+        real_spinner = getattr(entry.switch, "_spinner", None)
+        if real_spinner is not None:
+            bindings.append(
+                real_spinner.bind_property("visible", spinner, "visible", GObject.BindingFlags.SYNC_CREATE)
+            )
+        list_item._bindings = bindings
+
+    def _on_unbind(self, factory, list_item):
+        for binding in list_item._bindings:
+            binding.unbind()
+        list_item._bindings = []
+
+    def _on_proxy_state_set(self, switch, state, list_item):
+        """The user toggled a result: toggle the real switch instead. Its page
+        runs the script, and the bindings bring the outcome back here."""
+        item = list_item.get_item()
+        if item is not None and item.entry.switch.get_active() != state:
+            item.entry.switch.set_active(state)
+        return True
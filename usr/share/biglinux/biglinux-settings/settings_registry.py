@@ -0,0 +1,159 @@
+import gettext
+import json
+import os
+
+_ = gettext.gettext
+
+# Groups and rows of every page. Labels are English msgids, translated when
+# they are shown; "check" and "action" are the specs of check_providers and
+# staging. Loading it needs no GTK, so it can be shared by anything that
+# needs to know the settings.
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+
+
+def _spec(value):
+    """JSON lists back to the nested tuples used by check and action specs."""
+    if isinstance(value, list):
+        return tuple(_spec(v) for v in value)
+    return value
+
+
+class SettingGroup:
+    """A PreferencesGroup of a page; its rows' scripts live in the scripts directory."""
+
+    __slots__ = ("id", "page", "title", "description", "scripts", "settings")
+
+    def __init__(self, id, page, title, description, scripts, disabled=False):
+        self.id = id
+        self.page = page
+        self.title = title
+        self.description = description
+        self.scripts = scripts
+        self.settings = []
+
+
+class Setting:
+    """One switch row. parent is the script of the row, in the same group,
+    it is a sub row of. info is shown while the switch is on; its "{}" or
+    "{ip}" is replaced by the local IP address. link fills the subtitle's
+    "{l}"."""
+
+    __slots__ = (
+        "page", "group", "title", "subtitle", "script", "icon", "timeout", "parent",
+        "info", "link", "check", "action", "keywords",
+    )
+
+    def __init__(
+        self, group, title, script, icon, subtitle=None, timeout=None, parent=None,
+        info=None, link=None, check=None, action=None, keywords=(), disabled=False,
+    ):
+        self.page = group.page
+        self.group = group
+        self.title = title
+        self.subtitle = subtitle
+        self.script = script
+        self.icon = icon
+        self.timeout = timeout
+        self.parent = parent
+        self.info = info
+        self.link = link
+        self.check = _spec(check)
+        self.action = _spec(action)
+        self.keywords = tuple(keywords)
+
+    @property
+    def script_path(self):
+        """Path of the script, relative to the application directory."""
+        return os.path.join(self.group.scripts, f"{self.script}.sh")
+
+    def subtitle_text(self):
+        """Translated subtitle markup."""
+        if not self.subtitle:
+            return None
+        subtitle = _(self.subtitle)
+        if self.link:
+            subtitle = subtitle.format(l=self.link)
+        return subtitle
+
+    def info_text(self, local_ip):
+        """Translated info text for the given local IP address."""
+        if not self.info:
+            return None
+        return _(self.info).format(local_ip, ip=local_ip)
+
+
+class SettingsRegistry:
+    """Every setting group and row, in display order."""
+
+    def __init__(self, groups=()):
+        self.groups = list(groups)
+        self.settings = [setting for group in self.groups for setting in group.settings]
+
+    def page_groups(self, page):
+        return [group for group in self.groups if group.page == page]
+
+    def page_settings(self, page):
+        return [setting for setting in self.settings if setting.page == page]
+
+    def actions(self):
+        """The batchable toggle actions of every row (see staging)."""
+        return [setting.action for setting in self.settings if setting.action is not None]
+
+    def by_script(self, script_path):
+        """Settings whose script is script_path (a script can have several rows)."""
+        return [setting for setting in self.settings if setting.script_path == script_path]
+
+
+def load(path=REGISTRY_FILE):
+    """Read the registry; invalid entries are reported and skipped."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Error loading settings registry: {e}")
+        return SettingsRegistry()
+
+    groups = {}
+    disabled_groups = set()
+    for item in data.get("groups", []):
+        try:
+            group = SettingGroup(**item)
+        except TypeError as e:
+            print(f"Invalid settings group {item.get('id')}: {e}")
+            continue
+        if item.get("disabled"):
+            disabled_groups.add(group.id)
+        else:
+            groups[group.id] = group
+
+    for item in data.get("settings", []):
+        if item.get("disabled"):
+            continue
+        item = dict(item)
+        group_id = item.pop("group", None)
+        group = groups.get(group_id)
+        if group is None:
+            if group_id not in disabled_groups:
+                print(f"Invalid setting {item.get('script')}: unknown group {group_id}")
+            continue
+        try:
+            setting = Setting(group, **item)
+        except TypeError as e:
+            print(f"Invalid setting {item.get('script')}: {e}")
+            continue
+        if setting.parent and not any(s.script == setting.parent and not s.parent for s in group.settings):
+            print(f"Invalid setting {setting.script}: parent {setting.parent} is not a row of its group")
+            continue
+        group.settings.append(setting)
+    return SettingsRegistry(groups.values())
+
+
+_registry = None
+
+
+def registry():
+    """The registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        _registry = load()
+    return _registry
@@ -0,0 +1,188 @@
+import gettext
+import getpass
+import os
+import subprocess
+
+from helper_client import HelperUnavailable
+from job_scheduler import JobCancelled, operation_resources
+
+_ = gettext.gettext
+
+BATCH_HELPER = "common/applyBatch.sh"
+
+# Toggle actions that can be batched with others, given as
+# create_row(action=...). Rows without one run their own toggle script.
+#   ("package", name)                       installed when enabled, removed when disabled
+#   ("systemd", on_operation, off_operation, unit)
+#                                           enable, disable, enable-now, disable-now, start or stop
+#   ("grub_timeout", on_value, off_value)   GRUB_TIMEOUT in /etc/default/grub
+#   ("grub_cmdline", parameters)            kernel parameters added when enabled, removed when disabled
+#   ("flag", path)                          flag file created when enabled, removed when disabled
+#   ("all", action, ...)
+
+
+def operations(action, state):
+    """Return the applyBatch.sh operations that set action to state."""
+    op, args = action[0], action[1:]
+    if op == "package":
+        return [f"{'install' if state else 'remove'}:{args[0]}"]
+    if op == "systemd":
+        return [f"{args[0] if state else args[1]}:{args[2]}"]
+    if op == "grub_timeout":
+        return [f"grub-timeout:{args[0] if state else args[1]}"]
+    if op == "grub_cmdline":
+        return [f"{'grub-add' if state else 'grub-remove'}:{args[0]}"]
+    if op == "flag":
+        return [f"{'flag-on' if state else 'flag-off'}:{args[0]}"]
+    if op == "all":
+        return [o for sub in args for o in operations(sub, state)]
+    raise ValueError(f"Unknown action: {op}")
+
+
+def declared_operations(actions):
+    """Every operation the given actions can produce, enabled or disabled."""
+    return {o for action in actions for state in (True, False) for o in operations(action, state)}
+
+
+def run_batch_helper(batch_operations, helper=None, jobs=None):
+    """Run every operation under a single elevation: through the privileged
+    helper service if it is installed, otherwise one pkexec of applyBatch.sh.
+    With a JobManager, the batch is shown as a job and waits for the jobs
+    using the same resources (pacman, GRUB).
+    Returns {operation: exit code}; operations without a result (e.g.
+    authentication cancelled or job cancelled) are missing."""
+    if jobs is None:
+        return _run_batch(batch_operations, helper, print)[0]
+    try:
+        with jobs.job(
+            _("Applying changes"), [BATCH_HELPER, *batch_operations],
+            operation_resources(batch_operations),
+        ) as job:
+            codes, job.returncode = _run_batch(
+                batch_operations, helper, lambda line: jobs.output(job, line), in_jobs=True
+            )
+            return codes
+    except JobCancelled:
+        print("Applying changes cancelled")
+        return {}
+
+
+def _run_batch(batch_operations, helper, on_output, in_jobs=False):
+    """Returns ({operation: exit code}, exit code of the batch). in_jobs:
+    applyBatch.sh writes its progress to stdout, streamed to on_output,
+    instead of showing a zenity dialog."""
+    if helper is not None and helper.available():
+        try:
+            codes = helper.apply(batch_operations, on_output=on_output)
+            return codes, 0 if codes and not any(codes.values()) else 1
+        except HelperUnavailable as e:
+            on_output(f"Privileged helper failed, using pkexec: {e}")
+    env = os.environ
+    command = [
+        "pkexec",
+        os.path.abspath(BATCH_HELPER),
+        env.get("USER") or getpass.getuser(),
+        env.get("DISPLAY", ""),
+        env.get("XAUTHORITY", ""),
+        env.get("DBUS_SESSION_BUS_ADDRESS", ""),
+        env.get("LANG", ""),
+        env.get("LANGUAGE", ""),
+        "1" if in_jobs else "",
+        *batch_operations,
+    ]
+    try:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace"
+        )
+    except OSError as e:
+        on_output(f"ERROR: Failed to run {BATCH_HELPER}: {e}")
+        return {}, 127
+    codes = {}
+    for line in process.stdout:
+        line = line.rstrip("\n")
+        if line.startswith("result "):
+            operation, _sep, code = line[len("result "):].rpartition(" ")
+            codes[operation] = int(code)
+        on_output(line)
+    returncode = process.wait()
+    if returncode != 0:
+        on_output(f"ERROR: {BATCH_HELPER} failed with exit code: {returncode}")
+    return codes, returncode
+
+
+def apply_changes(changes, run_toggle, helper=None, jobs=None):
+    """Apply staged changes. Called from a background thread.
+
+    changes is a list of (script_path, state, action or None). Changes with an
+    action are grouped into one privileged batch; the others run their own
+    toggle script afterwards, in the order they were staged.
+    Returns {script_path: success}."""
+    results = {}
+    batched = {}
+    for script_path, state, action in changes:
+        if action is not None:
+            batched[script_path] = operations(action, state)
+
+    batch_operations = []
+    for script_operations in batched.values():
+        for operation in script_operations:
+            if operation not in batch_operations:
+                batch_operations.append(operation)
+    if batch_operations:
+        codes = run_batch_helper(batch_operations, helper, jobs)
+        for script_path, script_operations in batched.items():
+            results[script_path] = all(codes.get(o) == 0 for o in script_operations)
+
+    for script_path, state, action in changes:
+        if action is None:
+            results[script_path] = run_toggle(script_path, state)
+    return results
+
+
+class StagedChanges:
+    """Switch changes collected while staging mode is on, applied together.
+
+    Pages call stage() instead of running the toggle; on_changed() is called
+    whenever the list of pending changes changes."""
+
+    def __init__(self, on_changed=None):
+        self.on_changed = on_changed
+        self.enabled = False
+        self.changes = {}  # script_path -> (page, switch, state)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def stage(self, page, switch, script_path, state):
+        if getattr(switch, "_applied_status", None) == state:
+            # Switched back to the current system state: nothing to apply
+            self.changes.pop(script_path, None)
+            switch._staged = False
+        else:
+            self.changes[script_path] = (page, switch, state)
+            switch._staged = True
+        self._changed()
+
+    def discard(self):
+        """Put every staged switch back to its current system state."""
+        for page, switch, state in self.changes.values():
+            switch._staged = False
+            switch.handler_block_by_func(page.on_switch_changed)
+            switch.set_active(not state)
+            switch.set_state(not state)
+            switch.handler_unblock_by_func(page.on_switch_changed)
+        self.changes.clear()
+        self._changed()
+
+    def take(self):
+        """Return and clear the pending changes, as (script_path, page, switch, state)."""
+        changes = [(path, *change) for path, change in self.changes.items()]
+        for path, page, switch, state in changes:
+            switch._staged = False
+        self.changes.clear()
+        self._changed()
+        return changes
+
+    def _changed(self):
+        if self.on_changed is not None:
+            self.on_changed()
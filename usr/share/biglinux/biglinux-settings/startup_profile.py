@@ -0,0 +1,161 @@
+import cProfile
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+from tracing import tracer
+
+# --profile-startup[=FILE] prints how startup time splits between phases, up
+# to the first frame and up to every row being synchronized. With FILE, a
+# cProfile dump of the same period is also written (read it with
+# "python -m pstats FILE").
+PROFILE_FLAG = "--profile-startup"
+
+
+def process_age():
+    """Seconds since this process started, from /proc; 0 if unknown."""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name can contain spaces; fields restart after ")"
+            fields = f.read().rpartition(")")[2].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - started)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+class StartupProfile:
+    """Per-phase breakdown of startup.
+
+    Phases are timed with phase() and added up by name; milestones are times
+    since the process started. The report is printed when the sync passes
+    of every page have ended, i.e. when all rows show their real state.
+    The cProfile dump, if any, starts after the imports."""
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> seconds, in first-seen order
+        self.milestones = []  # (name, seconds since the process started)
+        self.profile_path = None
+        self._profiler = None
+        self._pages_expected = 0
+        self._pages_built = 0
+        self._script_time = 0.0
+        self._scripts = 0
+        self._done = False
+
+    def enable(self, module_started, profile_path=None):
+        """module_started: perf_counter() when main.py started executing."""
+        self.enabled = True
+        self.started = time.perf_counter() - process_age()
+        self.add("interpreter startup", module_started - self.started)
+        self.add("Python and gi imports", time.perf_counter() - module_started)
+        self.profile_path = profile_path
+        if profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        # Sync passes and script runs are followed through the tracer
+        tracer.enable(report=False)
+        tracer.add_listener(self._on_span)
+
+    def add(self, name, seconds):
+        if not self.enabled:
+            return
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def phase(self, name):
+        """Context manager timing one phase; repeated phases are added up."""
+        if not self.enabled:
+            return nullcontext()
+        return _Phase(self, name)
+
+    def milestone(self, name):
+        if self.enabled:
+            self.milestones.append((name, time.perf_counter() - self.started))
+
+    def expect_pages(self, count):
+        """Rows are synchronized once count pages are built and their checks done."""
+        self._pages_expected = count
+
+    def _on_span(self, name, cat, start, end, args):
+        if cat in ("script", "check"):
+            self._script_time += end - start
+            self._scripts += 1
+            return
+        if cat == "page":
+            self._pages_built += 1
+            self.add(f"page {name}", end - start)
+        elif cat != "sync":
+            return
+        # A page without checks ends its sync pass before its own span
+        if (
+            not self._done
+            and self._pages_built >= self._pages_expected
+            and tracer.open_spans("sync") == 0
+        ):
+            self._done = True
+            self.milestone("all rows synchronized")
+            self.finish()
+
+    def report(self):
+        lines = ["Startup profile:"]
+        for name, seconds in self.phases.items():
+            lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+        lines.append(
+            f"  {self._script_time * 1000:9.1f} ms  check scripts "
+            f"({self._scripts} runs, summed over parallel workers)"
+        )
+        for name, seconds in self.milestones:
+            lines.append(f"  {seconds * 1000:9.1f} ms  -> {name}")
+        return "\n".join(lines)
+
+    def finish(self):
+        tracer.remove_listener(self._on_span)
+        if self._profiler is not None:
+            self._profiler.disable()
+            try:
+                self._profiler.dump_stats(self.profile_path)
+                print(f"cProfile data written to {self.profile_path}", file=sys.stderr)
+            except OSError as e:
+                print(f"Error writing profile: {e}")
+            self._profiler = None
+        print(self.report(), file=sys.stderr)
+
+
+class _Phase:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+startup = StartupProfile()
+
+
+def setup(argv, module_started):
+    """Enable startup profiling from the command line.
+    Returns argv without the profiling option."""
+    remaining = []
+    enabled, profile_path = False, None
+    for arg in argv:
+        if arg == PROFILE_FLAG:
+            enabled = True
+        elif arg.startswith(PROFILE_FLAG + "="):
+            enabled = True
+            profile_path = os.path.abspath(os.path.expanduser(arg[len(PROFILE_FLAG) + 1:]))
+        else:
+            remaining.append(arg)
+    if enabled:
+        startup.enable(module_started, profile_path)
+    return remaining
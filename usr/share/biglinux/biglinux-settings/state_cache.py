@@ -0,0 +1,127 @@
+import json
+import os
+import time
+
+from check_providers import spec_paths
+
+CACHE_VERSION = 2
+# Entries older than this are considered expired and evicted (seconds).
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# Returned by StateCache.get() when there is no usable entry.
+MISSING = object()
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class StateCache:
+    """On-disk cache of the last known state of each check script.
+
+    Entries are keyed by script path and carry a cheap fingerprint: the
+    mtime and size of the script and of the files its declarative check
+    reads (see check_providers.spec_paths), so editing either invalidates
+    them. The cache is only used to paint the UI immediately at startup;
+    every entry is revalidated in the background. on_change() is called
+    when unsaved changes appear, so they can be saved soon."""
+
+    def __init__(self, path, max_age: int = DEFAULT_MAX_AGE, on_change=None):
+        self.path = path
+        self.max_age = max_age
+        self.on_change = on_change
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Load the cache file, discarding it entirely if it is corrupt."""
+        self._entries = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                raise ValueError("unsupported cache version")
+            entries = data["entries"]
+            if not isinstance(entries, dict):
+                raise ValueError("invalid entries")
+            self._entries = entries
+        except (json.JSONDecodeError, OSError, KeyError, ValueError, AttributeError) as e:
+            print(f"Discarding state cache: {e}")
+            self._dirty = True
+
+    def _fingerprint(self, script_path, check=None):
+        script = _stat(script_path)
+        if script is None:
+            return None
+        inputs = [_stat(path) for path in spec_paths(check)] if check else []
+        return [script, inputs]
+
+    def _is_valid(self, script_path, entry, now):
+        try:
+            if now - entry["time"] > self.max_age:
+                return False
+            if entry["status"] not in (True, False, None, "true_disabled"):
+                return False
+            return entry["fingerprint"] == self._fingerprint(script_path, entry["check"])
+        except (KeyError, TypeError):
+            return False
+
+    def _mark_dirty(self):
+        if not self._dirty:
+            self._dirty = True
+            if self.on_change is not None:
+                self.on_change()
+
+    def get(self, script_path):
+        """Return the cached status for a script, or MISSING."""
+        entry = self._entries.get(script_path)
+        if entry is None:
+            return MISSING
+        if not self._is_valid(script_path, entry, time.time()):
+            del self._entries[script_path]
+            self._mark_dirty()
+            return MISSING
+        return entry["status"]
+
+    def put(self, script_path, status, check=None):
+        """Store the latest known status of a script whose declarative
+        check, if any, is check."""
+        fingerprint = self._fingerprint(script_path, check)
+        if fingerprint is None:
+            if self._entries.pop(script_path, None) is not None:
+                self._mark_dirty()
+            return
+        # Always refresh the timestamp: a revalidated entry is fresh again
+        self._entries[script_path] = {
+            "status": status,
+            "fingerprint": fingerprint,
+            "check": check,
+            "time": time.time(),
+        }
+        self._mark_dirty()
+
+    def save(self):
+        """Write the cache to disk atomically, evicting expired entries."""
+        now = time.time()
+        for script_path, entry in list(self._entries.items()):
+            if not self._is_valid(script_path, entry, now):
+                del self._entries[script_path]
+                self._dirty = True
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "entries": self._entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"Error saving state cache: {e}")
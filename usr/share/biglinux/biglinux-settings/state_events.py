@@ -0,0 +1,266 @@
+import os
+import threading
+
+from check_providers import ProviderUnavailable
+from gi.repository import Gio, GLib
+from grub_config import GRUB_DEFAULT_FILE
+from package_index import PACMAN_LOCAL_DB
+from systemd_state import (
+    SYSTEMD_BUS_NAME,
+    SYSTEMD_MANAGER_IFACE,
+    SYSTEMD_OBJECT_PATH,
+    unit_name,
+)
+
+PROPERTIES_IFACE = "org.freedesktop.DBus.Properties"
+SYSTEMD_UNIT_IFACE = "org.freedesktop.systemd1.Unit"
+# Changes arriving within this window are refreshed together (milliseconds).
+DEBOUNCE_MS = 300
+
+# Change sources of scripts whose state can't be derived from a check spec.
+#   ("file", path)
+#   ("unit", unit, user)
+#   ("dbus_property", bus, sender, object path or None, interface, property)
+EXTRA_SOURCES = {
+    "devices/wifi.sh": [
+        ("dbus_property", "system", "org.freedesktop.NetworkManager",
+         "/org/freedesktop/NetworkManager", "org.freedesktop.NetworkManager", "WirelessEnabled"),
+    ],
+    "devices/bluetooth.sh": [
+        ("dbus_property", "system", "org.bluez", None, "org.bluez.Adapter1", "Powered"),
+    ],
+    "devices/jamesdsp.sh": [
+        ("file", PACMAN_LOCAL_DB),
+        ("unit", "jamesdsp-autostart", True),
+    ],
+    "devices/reverse-mouse_scroll.sh": [("file", "~/.config/kcminputrc")],
+    "usability/kzones.sh": [("file", "~/.config/kwinrc"), ("file", PACMAN_LOCAL_DB)],
+    "usability/numLock.sh": [("file", "~/.config/kcminputrc"), ("file", "/etc/sddm.conf")],
+    "usability/recentFiles.sh": [
+        ("file", "~/.config/kdeglobals"),
+        ("file", "~/.config/kioslaverc"),
+        ("file", "~/.config/kactivitymanagerd-pluginsrc"),
+    ],
+    "ai/chatai.sh": [("file", "~/.config/plasma-org.kde.plasma.desktop-appletsrc")],
+    "performance/unloadSmartMonitor.sh": [("unit", "smartd", False)],
+    "performance/cpuMaximumPerformance.sh": [
+        ("dbus_property", "system", "net.hadess.PowerProfiles",
+         "/net/hadess/PowerProfiles", "net.hadess.PowerProfiles", "ActiveProfile"),
+    ],
+}
+
+
+def unit_object_path(unit):
+    """D-Bus object path of a systemd unit ("sshd" -> .../unit/sshd_2eservice)."""
+    escaped = "".join(
+        c if c.isascii() and c.isalnum() else f"_{ord(c):02x}"
+        for c in unit_name(unit)
+    )
+    return f"{SYSTEMD_OBJECT_PATH}/unit/{escaped}"
+
+
+def spec_sources(spec):
+    """Yield the change sources of a check spec (see check_providers)."""
+    op, args = spec[0], spec[1:]
+    if op in ("file", "dir", "grep", "key_value"):
+        # Kernel files such as /proc/cmdline can't be watched; they only
+        # change on reboot anyway.
+        if not args[0].startswith("/proc/"):
+            yield ("file", args[0])
+    elif op == "package":
+        yield ("file", PACMAN_LOCAL_DB)
+    elif op in ("unit_active", "unit_enabled"):
+        yield ("unit", args[0], len(args) > 1 and args[1] == "user")
+    elif op == "compose_running":
+        yield ("docker",)
+    elif op == "kernel_param":
+        yield ("file", GRUB_DEFAULT_FILE)
+    elif op in ("all", "any", "not", "requires"):
+        for sub in args:
+            yield from spec_sources(sub)
+
+
+def _walk(spec):
+    yield spec
+    if spec[0] in ("all", "any", "not", "requires"):
+        for sub in spec[1:]:
+            yield from _walk(sub)
+
+
+class StateEvents:
+    """Keeps rows up to date when their state is changed outside the app.
+
+    Scripts are registered with their check spec; the matching change
+    sources are watched (inotify through Gio.FileMonitor, systemd,
+    NetworkManager and BlueZ D-Bus signals, Docker events) and on_change is
+    called on the main loop with the set of affected scripts. Nothing is
+    polled: when nothing changes, nothing runs."""
+
+    def __init__(self, on_change, docker_state=None):
+        self.on_change = on_change
+        self.docker_state = docker_state
+        self._registered = set()
+        self._file_monitors = {}  # path -> (Gio.FileMonitor, set of scripts)
+        self._unit_scripts = {False: {}, True: {}}  # object path -> set of scripts
+        self._enabled_scripts = {False: set(), True: set()}
+        self._systemd_subscribed = {False: False, True: False}
+        self._property_scripts = {}  # (sender, iface, prop) -> set of scripts
+        self._subscriptions = []  # (bus, subscription id)
+        self._docker_scripts = set()
+        self._docker_thread = None
+        self._pending = set()
+        self._flush_source = None
+
+    def register(self, script_path, check=None):
+        """Watch the change sources of a script (from its check spec and EXTRA_SOURCES)."""
+        if script_path in self._registered:
+            return
+        self._registered.add(script_path)
+        sources = list(spec_sources(check)) if check is not None else []
+        sources += EXTRA_SOURCES.get(script_path, [])
+        for source in sources:
+            try:
+                self._watch(source, script_path, check)
+            except (GLib.Error, ProviderUnavailable) as e:
+                print(f"Cannot watch {source} for {script_path}: {e}")
+
+    def _watch(self, source, script_path, check):
+        kind = source[0]
+        if kind == "file":
+            self._watch_file(source[1], script_path)
+        elif kind == "unit":
+            enabled = check is not None and any(
+                s[0] == "unit_enabled" for s in _walk(check)
+            )
+            self._watch_unit(source[1], source[2], script_path, enabled)
+        elif kind == "dbus_property":
+            self._watch_property(*source[1:], script_path)
+        elif kind == "docker":
+            self._docker_scripts.add(script_path)
+            self._start_docker_events()
+
+    # Files
+
+    def _watch_file(self, path, script_path):
+        path = os.path.expanduser(path)
+        if path in self._file_monitors:
+            self._file_monitors[path][1].add(script_path)
+            return
+        gfile = Gio.File.new_for_path(path)
+        if os.path.isdir(path):
+            monitor = gfile.monitor_directory(Gio.FileMonitorFlags.NONE, None)
+        else:
+            # Works for files that don't exist yet, e.g. /etc/big-preload/enable-*
+            monitor = gfile.monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        scripts = {script_path}
+        monitor.connect("changed", lambda *args: self._notify(scripts))
+        self._file_monitors[path] = (monitor, scripts)
+
+    # systemd
+
+    def _bus(self, user):
+        bus_type = Gio.BusType.SESSION if user else Gio.BusType.SYSTEM
+        return Gio.bus_get_sync(bus_type, None)
+
+    def _watch_unit(self, unit, user, script_path, enabled):
+        self._unit_scripts[user].setdefault(unit_object_path(unit), set()).add(script_path)
+        if enabled:
+            self._enabled_scripts[user].add(script_path)
+        if self._systemd_subscribed[user]:
+            return
+        bus = self._bus(user)
+        self._subscriptions.append((bus, bus.signal_subscribe(
+            SYSTEMD_BUS_NAME, PROPERTIES_IFACE, "PropertiesChanged", None,
+            SYSTEMD_UNIT_IFACE, Gio.DBusSignalFlags.NONE,
+            self._on_unit_properties_changed, user,
+        )))
+        self._subscriptions.append((bus, bus.signal_subscribe(
+            SYSTEMD_BUS_NAME, SYSTEMD_MANAGER_IFACE, "UnitFilesChanged",
+            SYSTEMD_OBJECT_PATH, None, Gio.DBusSignalFlags.NONE,
+            self._on_unit_files_changed, user,
+        )))
+        # systemd only emits unit signals to subscribed clients
+        bus.call(
+            SYSTEMD_BUS_NAME, SYSTEMD_OBJECT_PATH, SYSTEMD_MANAGER_IFACE, "Subscribe",
+            None, None, Gio.DBusCallFlags.NONE, -1, None, None, None,
+        )
+        self._systemd_subscribed[user] = True
+
+    def _on_unit_properties_changed(self, bus, sender, path, iface, signal, params, user):
+        scripts = self._unit_scripts[user].get(path)
+        if not scripts:
+            return
+        changed = params.unpack()[1]
+        if "ActiveState" in changed:
+            self._notify(scripts)
+            if path == unit_object_path("docker") and not user:
+                self._start_docker_events()
+
+    def _on_unit_files_changed(self, bus, sender, path, iface, signal, params, user):
+        if self._enabled_scripts[user]:
+            self._notify(self._enabled_scripts[user])
+
+    # Other D-Bus services (NetworkManager, BlueZ, ...)
+
+    def _watch_property(self, bus_name, sender, path, iface, prop, script_path):
+        key = (sender, iface, prop)
+        if key in self._property_scripts:
+            self._property_scripts[key].add(script_path)
+            return
+        scripts = {script_path}
+        self._property_scripts[key] = scripts
+        bus = self._bus(bus_name == "session")
+
+        def on_properties_changed(bus, sender, path, iface, signal, params):
+            changed, invalidated = params.unpack()[1:]
+            if prop in changed or prop in invalidated:
+                self._notify(scripts)
+
+        self._subscriptions.append((bus, bus.signal_subscribe(
+            sender, PROPERTIES_IFACE, "PropertiesChanged", path, iface,
+            Gio.DBusSignalFlags.NONE, on_properties_changed,
+        )))
+
+    # Docker
+
+    def _start_docker_events(self):
+        if self.docker_state is None or not self._docker_scripts:
+            return
+        if self._docker_thread is not None and self._docker_thread.is_alive():
+            return
+        self._docker_thread = threading.Thread(
+            target=self.docker_state.watch_events,
+            args=(lambda: GLib.idle_add(self._notify_docker),),
+            name="docker-events",
+            daemon=True,
+        )
+        self._docker_thread.start()
+
+    def _notify_docker(self):
+        self._notify(self._docker_scripts)
+        return GLib.SOURCE_REMOVE
+
+    # Delivery
+
+    def _notify(self, scripts):
+        self._pending.update(scripts)
+        if self._flush_source is None:
+            self._flush_source = GLib.timeout_add(DEBOUNCE_MS, self._flush)
+
+    def _flush(self):
+        self._flush_source = None
+        scripts, self._pending = self._pending, set()
+        if scripts:
+            self.on_change(scripts)
+        return GLib.SOURCE_REMOVE
+
+    def stop(self):
+        for monitor, scripts in self._file_monitors.values():
+            monitor.cancel()
+        self._file_monitors.clear()
+        for bus, subscription in self._subscriptions:
+            bus.signal_unsubscribe(subscription)
+        self._subscriptions.clear()
+        if self._flush_source is not None:
+            GLib.source_remove(self._flush_source)
+            self._flush_source = None
@@ -29,8 +29,7 @@ runAsUser "zenity --progress --title='grub' --text=\"$zenityText\" --pulsate --a
 
 # 3. Executes the root tasks.
 updateGrubTask() {
-  sed -i "/GRUB_TIMEOUT=/s/=.*/=$timeout/" /etc/default/grub
-  update-grub > "$pipePath"
+  python3 "${BASH_SOURCE%/*}/../grub_config.py" --timeout "$timeout" > "$pipePath"
 }
 updateGrubTask
 exitCode=$?
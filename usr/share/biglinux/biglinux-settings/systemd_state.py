@@ -0,0 +1,126 @@
+import os
+import threading
+
+from check_providers import ProviderUnavailable
+from gi.repository import Gio, GLib
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_OBJECT_PATH = "/org/freedesktop/systemd1"
+SYSTEMD_MANAGER_IFACE = "org.freedesktop.systemd1.Manager"
+DBUS_TIMEOUT_MS = 5000
+
+UNIT_SUFFIXES = (
+    ".service", ".socket", ".target", ".timer", ".mount", ".path", ".slice", ".scope", ".device", ".swap", ".automount",
+)
+
+
+def unit_name(unit):
+    """Return the full unit name, as systemctl does ("sshd" -> "sshd.service")."""
+    return unit if unit.endswith(UNIT_SUFFIXES) else f"{unit}.service"
+
+
+class SystemdState:
+    """ActiveState and UnitFileState of systemd units, fetched over D-Bus.
+
+    Units registered with begin_pass() are fetched together, with one
+    ListUnitsByNames and one ListUnitFilesByPatterns call per bus, the first
+    time any of them is needed in a sync pass. Buses can be passed in (e.g. a
+    connection to a private test bus); by default the system and session
+    buses are used."""
+
+    def __init__(self, system_bus=None, user_bus=None):
+        self._buses = {False: system_bus, True: user_bus}
+        self._lock = threading.Lock()
+        self._wanted = {False: set(), True: set()}
+        self._states = {False: {}, True: {}}
+        self._stale = {False: True, True: True}
+
+    def begin_pass(self, units):
+        """Start a new sync pass. units is an iterable of (unit, user) pairs."""
+        with self._lock:
+            for unit, user in units:
+                self._wanted[user].add(unit_name(unit))
+            self._stale = {False: True, True: True}
+
+    def invalidate(self, unit=None, user=False):
+        """Forget cached states, for one unit or for everything."""
+        with self._lock:
+            if unit is None:
+                self._stale = {False: True, True: True}
+            elif self._states[user] is not None:
+                self._states[user].pop(unit_name(unit), None)
+
+    def get(self, unit, prop, user=False):
+        """Return the ActiveState or UnitFileState of a unit.
+        Raises ProviderUnavailable if systemd cannot be reached over D-Bus."""
+        name = unit_name(unit)
+        with self._lock:
+            self._wanted[user].add(name)
+            if self._stale[user]:
+                self._stale[user] = False
+                try:
+                    self._states[user] = self._fetch(self._wanted[user], user)
+                except ProviderUnavailable:
+                    # Don't retry on every check until the next pass
+                    self._states[user] = None
+                    raise
+            states = self._states[user]
+            if states is None:
+                raise ProviderUnavailable("systemd is not reachable over D-Bus")
+            if name not in states:
+                states.update(self._fetch({name}, user))
+            return states[name][prop]
+
+    def _bus(self, user):
+        bus = self._buses[user]
+        if bus is None:
+            bus_type = Gio.BusType.SESSION if user else Gio.BusType.SYSTEM
+            try:
+                bus = Gio.bus_get_sync(bus_type, None)
+            except GLib.Error as e:
+                raise ProviderUnavailable(e.message)
+            self._buses[user] = bus
+        return bus
+
+    def _call(self, bus, method, parameters, reply_type):
+        try:
+            reply = bus.call_sync(
+                SYSTEMD_BUS_NAME,
+                SYSTEMD_OBJECT_PATH,
+                SYSTEMD_MANAGER_IFACE,
+                method,
+                parameters,
+                GLib.VariantType.new(reply_type),
+                Gio.DBusCallFlags.NONE,
+                DBUS_TIMEOUT_MS,
+                None,
+            )
+        except GLib.Error as e:
+            raise ProviderUnavailable(e.message)
+        return reply.unpack()[0]
+
+    def _fetch(self, names, user):
+        names = sorted(names)
+        bus = self._bus(user)
+        # Units that are not loaded are reported as "inactive", like systemctl does
+        states = {
+            name: {"ActiveState": "inactive", "UnitFileState": "not-found"}
+            for name in names
+        }
+        units = self._call(
+            bus, "ListUnitsByNames", GLib.Variant("(as)", (names,)), "(a(ssssssouso))"
+        )
+        for unit in units:
+            if unit[0] in states:
+                states[unit[0]]["ActiveState"] = unit[3]
+        unit_files = self._call(
+            bus,
+            "ListUnitFilesByPatterns",
+            GLib.Variant("(asas)", ([], names)),
+            "(a(ss))",
+        )
+        for path, state in unit_files:
+            name = os.path.basename(path)
+            if name in states:
+                states[name]["UnitFileState"] = state
+        return states
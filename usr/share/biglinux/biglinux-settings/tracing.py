@@ -0,0 +1,249 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Tracing is enabled with BIGLINUX_SETTINGS_TRACE or --trace:
+#   BIGLINUX_SETTINGS_TRACE=1 / --trace             ranked summary printed on exit
+#   BIGLINUX_SETTINGS_TRACE=FILE / --trace=FILE     also writes FILE (e.g. ~/trace.json) as Chrome
+#                                                   trace-event JSON (chrome://tracing, Perfetto)
+TRACE_ENV = "BIGLINUX_SETTINGS_TRACE"
+TRACE_FLAG = "--trace"
+# Number of scripts listed in the summary
+SUMMARY_LIMIT = 20
+
+
+class Span:
+    """A traced operation. Ends when end() is called, or when every hold()
+    taken on it has been released, for operations made of async parts."""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start", "tid", "_holds", "_lock")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = time.perf_counter()
+        self.tid = threading.get_ident()
+        self._holds = 1
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def hold(self):
+        with self._lock:
+            self._holds += 1
+
+    def release(self):
+        with self._lock:
+            self._holds -= 1
+            done = self._holds == 0
+        if done:
+            self.tracer._record(self, time.perf_counter())
+
+    def wrap(self, callback):
+        """Hold the span until callback has been called."""
+        self.hold()
+
+        def wrapped(*args):
+            try:
+                return callback(*args)
+            finally:
+                self.release()
+
+        return wrapped
+
+    def end(self, **args):
+        self.args.update(args)
+        self.release()
+
+
+class _NoSpan:
+    """Returned while tracing is disabled; every method does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+    def hold(self):
+        pass
+
+    def release(self):
+        pass
+
+    def wrap(self, callback):
+        return callback
+
+    def end(self, **args):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Records spans of page construction, sync passes, scripts and toggles.
+
+    Disabled by default: span() and begin() then return NO_SPAN, so tracing
+    costs nothing unless it is turned on."""
+
+    def __init__(self):
+        self.enabled = False
+        self.report = False
+        self.output_path = None
+        self._origin = time.perf_counter()
+        self._events = []
+        self._open = {}  # category -> number of spans begun and not ended yet
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def enable(self, output_path=None, report=True):
+        """Start recording. report: write the trace and summary on exit."""
+        if not self.enabled:
+            self._origin = time.perf_counter()
+        self.enabled = True
+        if report:
+            self.report = True
+            self.output_path = output_path
+
+    def add_listener(self, listener):
+        """Call listener(name, cat, start, end, args) whenever a span ends."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def open_spans(self, cat):
+        with self._lock:
+            return self._open.get(cat, 0)
+
+    def begin(self, name, cat, **args):
+        """Start a span that is ended later with end() (or with holds)."""
+        if not self.enabled:
+            return NO_SPAN
+        with self._lock:
+            self._open[cat] = self._open.get(cat, 0) + 1
+        return Span(self, name, cat, args)
+
+    # A span is also a context manager
+    span = begin
+
+    def instant(self, name, cat, **args):
+        if self.enabled:
+            now = time.perf_counter()
+            with self._lock:
+                self._events.append((name, cat, now, None, threading.get_ident(), args))
+
+    def _record(self, span, end):
+        with self._lock:
+            self._events.append((span.name, span.cat, span.start, end, span.tid, span.args))
+            self._open[span.cat] -= 1
+        for listener in list(self._listeners):
+            listener(span.name, span.cat, span.start, end, span.args)
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def chrome_trace(self):
+        """Return the recorded spans in Chrome trace-event format."""
+        pid = os.getpid()
+        trace = []
+        for name, cat, start, end, tid, args in self.events():
+            event = {
+                "name": name,
+                "cat": cat,
+                "ts": round((start - self._origin) * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+            if end is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=round((end - start) * 1e6, 1))
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path):
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.chrome_trace(), f)
+        except OSError as e:
+            print(f"Error writing trace file: {e}")
+
+    def summary(self, limit=SUMMARY_LIMIT):
+        """Ranked text summary: scripts by total time, then the other spans."""
+        scripts = {}
+        others = {}
+        for name, cat, start, end, tid, args in self.events():
+            if end is None:
+                continue
+            stats = (scripts if cat == "script" else others).setdefault((cat, name), [])
+            stats.append(end - start)
+
+        lines = [f"Slowest scripts (of {len(scripts)}):"]
+        lines.append(f"{'total ms':>10} {'runs':>5} {'mean ms':>9} {'max ms':>9}  script")
+        ranked = sorted(scripts.items(), key=lambda item: sum(item[1]), reverse=True)
+        for (cat, name), durations in ranked[:limit]:
+            total = sum(durations) * 1000
+            lines.append(
+                f"{total:10.1f} {len(durations):5d} {total / len(durations):9.1f} "
+                f"{max(durations) * 1000:9.1f}  {name}"
+            )
+        lines.append("")
+        lines.append("Other spans:")
+        ranked = sorted(others.items(), key=lambda item: sum(item[1]), reverse=True)
+        for (cat, name), durations in ranked[:limit]:
+            total = sum(durations) * 1000
+            lines.append(f"{total:10.1f} {len(durations):5d} {'':9} {max(durations) * 1000:9.1f}  {cat}: {name}")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Write the trace file, if any, and print the summary. Called on exit."""
+        if not self.report:
+            return
+        if self.output_path:
+            self.export_chrome(self.output_path)
+            print(f"Trace written to {self.output_path}", file=sys.stderr)
+        print(self.summary(), file=sys.stderr)
+
+
+tracer = Tracer()
+
+
+def setup(argv):
+    """Enable tracing from the environment or the command line.
+    Returns argv without the tracing option."""
+    remaining = []
+    value = os.environ.get(TRACE_ENV)
+    for arg in argv:
+        if arg == TRACE_FLAG:
+            value = "1"
+        elif arg.startswith(TRACE_FLAG + "="):
+            value = arg[len(TRACE_FLAG) + 1:]
+        else:
+            remaining.append(arg)
+    if value and value != "0":
+        tracer.enable(None if value == "1" else os.path.abspath(os.path.expanduser(value)))
+    return remaining